@@ -0,0 +1,238 @@
+---
+layout: null
+---
+// Service worker: keeps the parts of the site that don't change between
+// visits on the device, so a returning daily reader loads almost nothing
+// but the new day's post.
+//
+//   - PDF.js (assets/pdfjs/): precached under a cache named for the
+//     vendored release (_config.yml pdfjs_version). The core viewer files
+//     are fetched at install; fonts/cmaps/wasm join the same cache the
+//     first time the viewer asks for them. Re-vendoring = new name = the
+//     old cache is dropped on activate.
+//   - artifacts (on raw.githubusercontent.com, or wherever the artifact
+//     backend keeps them): cache-first. Artifact URLs are
+//     content-addressed (artifact_store.py), and assets/artifacts.json
+//     carries each one's SHA-256 -- whenever a fresh manifest comes through, cached
+//     copies whose hash changed or that are no longer listed are evicted,
+//     so cache-first never serves a stale file for long.
+//   - pages (and the /epaper/ archive shards and /search/ index):
+//     stale-while-revalidate -- shown instantly from cache, refreshed in
+//     the background for the next visit.
+//
+// Artifacts and post pages older than the retention window
+// (_config.yml retention_days, the shortest retention tier) are evicted on
+// activate and on every manifest refresh, so the cache stays a rolling
+// week even though the repo keeps thumbnails and posts longer.
+
+var BASE = "{{ site.baseurl }}";
+var RETENTION_DAYS = {{ site.retention_days | default: 7 }};
+var PDFJS_CACHE = "pdfjs-{{ site.pdfjs_version }}";
+var ARTIFACT_CACHE = "artifacts-v1";
+var PAGE_CACHE = "pages-v1";
+var KNOWN_CACHES = [PDFJS_CACHE, ARTIFACT_CACHE, PAGE_CACHE];
+
+var PDFJS_PRECACHE = [
+  "/assets/pdfjs/web/viewer.html",
+  "/assets/pdfjs/web/viewer.mjs",
+  "/assets/pdfjs/web/viewer.css",
+  "/assets/pdfjs/build/pdf.mjs",
+  "/assets/pdfjs/build/pdf.worker.mjs",
+  "/assets/pdfjs/web/locale/locale.json",
+].map(function (path) { return BASE + path; });
+
+var MANIFEST_PATH = BASE + "/assets/artifacts.json";
+// artifacts/objects/ab/<sha>.<ext> (content-addressed), or
+// artifacts/YYYY-MM-DD/<name> from before the store existed -- on
+// raw.githubusercontent.com or whichever host the artifact backend
+// (artifact_store.py) links to; the key is the path from artifacts/ on
+var ARTIFACT_RE = /^https?:\/\/[^/]+\/(?:[^?#]*\/)?(artifacts\/(?:(\d{4}-\d{2}-\d{2})\/)?.+)$/;
+var POST_RE = /\/epaper\/(\d{2})-(\d{2})-(\d{4})\/$/;
+
+self.addEventListener("install", function (event) {
+  event.waitUntil(
+    caches.open(PDFJS_CACHE)
+      .then(function (cache) { return cache.addAll(PDFJS_PRECACHE); })
+      .then(function () { return self.skipWaiting(); })
+  );
+});
+
+self.addEventListener("activate", function (event) {
+  event.waitUntil(
+    caches.keys()
+      .then(function (names) {
+        return Promise.all(names.map(function (name) {
+          if (KNOWN_CACHES.indexOf(name) === -1) return caches.delete(name);
+        }));
+      })
+      .then(evictExpired)
+      .then(function () { return self.clients.claim(); })
+  );
+});
+
+function cutoffDate() {
+  var d = new Date();
+  d.setUTCDate(d.getUTCDate() - RETENTION_DAYS);
+  return d.toISOString().slice(0, 10);
+}
+
+function evictExpired() {
+  var cutoff = cutoffDate();
+  var artifacts = caches.open(ARTIFACT_CACHE).then(function (cache) {
+    return cache.keys().then(function (requests) {
+      return Promise.all(requests.map(function (req) {
+        var m = req.url.match(ARTIFACT_RE);
+        // objects carry no date -- reconcileArtifacts drops them once the
+        // manifest stops listing them
+        if (!m || (m[2] && m[2] < cutoff)) return cache.delete(req);
+      }));
+    });
+  });
+  var pages = caches.open(PAGE_CACHE).then(function (cache) {
+    return cache.keys().then(function (requests) {
+      return Promise.all(requests.map(function (req) {
+        var m = new URL(req.url).pathname.match(POST_RE);
+        if (m && m[3] + "-" + m[2] + "-" + m[1] < cutoff) return cache.delete(req);
+      }));
+    });
+  });
+  return Promise.all([artifacts, pages]);
+}
+
+// Drop cached artifacts the manifest no longer vouches for: removed by
+// cleanup, or re-published with different content under the same name.
+function reconcileArtifacts(manifest) {
+  return caches.open(ARTIFACT_CACHE).then(function (cache) {
+    return cache.keys().then(function (requests) {
+      return Promise.all(requests.map(function (req) {
+        var m = req.url.match(ARTIFACT_RE);
+        var entry = m && manifest.artifacts[decodeURIComponent(m[1])];
+        if (!entry) return cache.delete(req);
+        return cache.match(req).then(function (res) {
+          if (res && res.headers.get("X-Artifact-SHA256") !== entry.sha256) {
+            return cache.delete(req);
+          }
+        });
+      }));
+    });
+  }).then(evictExpired);
+}
+
+// The manifest itself is network-first: it's tiny, and it's what keeps
+// the cache-first artifacts honest.
+function manifestFirst(request) {
+  return fetch(request)
+    .then(function (res) {
+      if (res.ok) {
+        var copy = res.clone();
+        caches.open(PAGE_CACHE).then(function (cache) { cache.put(MANIFEST_PATH, copy.clone()); });
+        copy.json().then(function (manifest) {
+          self.manifest = manifest;
+          return reconcileArtifacts(manifest);
+        }).catch(function () {});
+      }
+      return res;
+    })
+    .catch(function () {
+      return caches.match(MANIFEST_PATH, { cacheName: PAGE_CACHE });
+    });
+}
+
+function stamp(res, sha256) {
+  // remember which content this copy is, for reconcileArtifacts -- a
+  // Response's headers are immutable, so rebuild it around the same body
+  var headers = new Headers(res.headers);
+  headers.set("X-Artifact-SHA256", sha256 || "");
+  return res.blob().then(function (body) {
+    return new Response(body, { status: res.status, statusText: res.statusText, headers: headers });
+  });
+}
+
+// the worker can be stopped between fetches, so fall back to the last
+// manifest copy in the cache rather than trusting a global
+function currentManifest() {
+  if (self.manifest) return Promise.resolve(self.manifest);
+  return caches.match(MANIFEST_PATH, { cacheName: PAGE_CACHE })
+    .then(function (res) { return res ? res.json() : { artifacts: {} }; })
+    .then(function (manifest) { self.manifest = manifest; return manifest; })
+    .catch(function () { return { artifacts: {} }; });
+}
+
+function artifactFirst(event, path) {
+  var request = event.request;
+  return caches.open(ARTIFACT_CACHE).then(function (cache) {
+    return cache.match(request).then(function (cached) {
+      if (cached) return cached;
+      return fetch(request).then(function (res) {
+        // opaque (no-cors <img>) and partial responses aren't cacheable
+        // usefully -- only keep full, readable ones
+        if (res.status !== 200 || res.type === "opaque") return res;
+        var copy = res.clone();
+        event.waitUntil(currentManifest().then(function (manifest) {
+          var entry = manifest.artifacts[decodeURIComponent(path)];
+          // unlisted means the manifest hasn't caught up with this file
+          // yet -- serve it, but don't pin an unverifiable copy
+          if (!entry) return;
+          return stamp(copy, entry.sha256).then(function (stamped) {
+            return cache.put(request, stamped);
+          });
+        }));
+        return res;
+      });
+    });
+  });
+}
+
+function cacheFirst(request, cacheName) {
+  return caches.open(cacheName).then(function (cache) {
+    return cache.match(request).then(function (cached) {
+      return cached || fetch(request).then(function (res) {
+        if (res.ok) cache.put(request, res.clone());
+        return res;
+      });
+    });
+  });
+}
+
+function staleWhileRevalidate(event) {
+  var request = event.request;
+  return caches.open(PAGE_CACHE).then(function (cache) {
+    return cache.match(request).then(function (cached) {
+      var refresh = fetch(request).then(function (res) {
+        if (res.ok) cache.put(request, res.clone());
+        return res;
+      });
+      if (cached) {
+        event.waitUntil(refresh.catch(function () {}));
+        return cached;
+      }
+      return refresh;
+    });
+  });
+}
+
+self.addEventListener("fetch", function (event) {
+  var request = event.request;
+  // PDF.js switches to range requests for large files; partial responses
+  // can't go in the Cache API, so those always go straight to the network
+  if (request.method !== "GET" || request.headers.has("range")) return;
+
+  var artifact = request.url.match(ARTIFACT_RE);
+  if (artifact) {
+    event.respondWith(artifactFirst(event, artifact[1]));
+    return;
+  }
+
+  var url = new URL(request.url);
+  if (url.origin !== self.location.origin || url.pathname.indexOf(BASE + "/") !== 0) return;
+
+  if (url.pathname === MANIFEST_PATH) {
+    event.respondWith(manifestFirst(request));
+  } else if (url.pathname.indexOf(BASE + "/assets/pdfjs/") === 0) {
+    event.respondWith(cacheFirst(request, PDFJS_CACHE));
+  } else if (request.mode === "navigate" || request.destination === "style"
+             || url.pathname.indexOf(BASE + "/assets/archive/") === 0
+             || url.pathname.indexOf(BASE + "/assets/search/") === 0) {
+    event.respondWith(staleWhileRevalidate(event));
+  }
+});
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Content-addressed storage for artifacts, with pluggable backends.
+
+The scrapers still write human-named files into artifacts/YYYY-MM-DD/
+(TH-EDITORIAL-14-08-26.pdf, ...) -- that's what extraction, Discord
+attachments and local debugging want. What gets published, though, is
+each file's bytes once, under its SHA-256:
+
+    artifacts/objects/ab/ab12...ef.pdf     # the bytes, named by hash
+    artifacts/2026-08-14/refs.json         # {"TH-EDITORIAL-14-08-26.pdf": {"sha256": "ab12...ef", "bytes": ...}}
+
+(.gitignore keeps the human-named copies out of the commit.) So:
+
+  - a re-run that produces identical output stores no new object and
+    leaves refs.json unchanged -- no diff, no commit, no upload;
+  - primary and fallback extracting the same Hindu page on the same day
+    land on the same object, and so does an edition that repeats a page;
+  - links (common.raw_url, and so the site and the archive) point at the
+    object, which never changes once written -- safe to cache forever.
+
+This only dedupes if extraction is deterministic, which is why every PDF
+save in editorial.py passes no_new_id=True (MuPDF otherwise stamps a fresh
+random /ID on each save) and qpdf runs with --deterministic-id.
+
+Where the objects live is up to the backend (ARTIFACT_BACKEND):
+
+  - git (default): committed to the repo under artifacts/objects/ and
+    linked via raw.githubusercontent.com. Cleanup removes them from the
+    tree but never from history, so the clone grows by every PDF ever
+    published.
+  - local: a directory outside the repo (ARTIFACT_LOCAL_DIR -- a mounted
+    volume, a web server's root), linked under ARTIFACT_BASE_URL, which
+    it requires. For self-hosted runs only: a CI runner's disk is gone
+    when the job ends, so the workflows don't offer it.
+  - s3: any S3-compatible bucket (ARTIFACT_S3_BUCKET, plus
+    ARTIFACT_S3_ENDPOINT for anything that isn't AWS -- R2, MinIO, or a
+    MinIO/moto_server on localhost for testing). Files over
+    MULTIPART_THRESHOLD go up as concurrent multipart uploads, and a
+    bucket lifecycle rule expires anything left past the longest retention
+    tier. Needs boto3, which is only imported when s3 is selected.
+
+Whatever the backend, object keys keep the artifacts/objects/... shape --
+the site's expiry check and service worker key off /artifacts/ in the
+URL -- and refs.json always stays in the repo: it's a few hundred bytes a
+day, and it's what the manifest and gc() work from.
+
+Every stored file is recorded in retention.py's index, and that's what
+expires it: retention.cleanup() drops the name from its refs.json
+(forget()) and deletes the object once no other indexed artifact shares
+it, without rescanning the store. gc() is still there to sweep objects
+nothing references after hand edits; on s3 the lifecycle rule does that.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import logging
+import tempfile
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import common
+
+logger = logging.getLogger(__name__)
+
+OBJECTS_DIR = os.path.join(common.ARTIFACTS_DIR, "objects")
+REFS_FILE = "refs.json"
+
+ARTIFACT_BACKEND = os.getenv("ARTIFACT_BACKEND", "git").lower() or "git"
+ARTIFACT_LOCAL_DIR = os.getenv("ARTIFACT_LOCAL_DIR", "")
+ARTIFACT_BASE_URL = os.getenv("ARTIFACT_BASE_URL", "").rstrip("/")
+ARTIFACT_S3_BUCKET = os.getenv("ARTIFACT_S3_BUCKET", "")
+ARTIFACT_S3_ENDPOINT = os.getenv("ARTIFACT_S3_ENDPOINT", "")
+
+MULTIPART_THRESHOLD = 8 * 1024 * 1024
+UPLOAD_CONCURRENCY = 4
+
+_CONTENT_TYPES = {
+    ".pdf": "application/pdf",
+    ".png": "image/png",
+    ".webp": "image/webp",
+}
+
+
+class GitBackend:
+    """Objects in the repo itself, committed by the workflow."""
+
+    name = "git"
+
+    def __init__(self, root="."):
+        self.root = root
+
+    def _path(self, key):
+        return os.path.join(self.root, key)
+
+    def exists(self, key):
+        return os.path.exists(self._path(key))
+
+    def upload(self, path, key):
+        dest = self._path(key)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        # write-then-rename, so a half-written object never exists under
+        # the name that claims its hash
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(dest), suffix=".tmp")
+        with os.fdopen(fd, "wb") as out, open(path, "rb") as src:
+            shutil.copyfileobj(src, out, 1 << 20)
+        os.replace(tmp, dest)
+
+    def url(self, key):
+        return f"https://raw.githubusercontent.com/{common.GITHUB_REPOSITORY}/main/{key}"
+
+    def keys(self):
+        root = self._path(OBJECTS_DIR)
+        for dirpath, _, filenames in os.walk(root):
+            for name in filenames:
+                rel = os.path.relpath(os.path.join(dirpath, name), self.root)
+                yield rel.replace(os.sep, "/")
+
+    def delete(self, key):
+        path = self._path(key)
+        os.remove(path)
+        shard = os.path.dirname(path)
+        if not os.listdir(shard):
+            os.rmdir(shard)
+
+
+class LocalDirBackend(GitBackend):
+    """Objects in a directory outside the repo, linked under a base URL."""
+
+    name = "local"
+
+    def __init__(self, root, base_url=""):
+        if not root:
+            raise ValueError("ARTIFACT_BACKEND=local needs ARTIFACT_LOCAL_DIR")
+        # links go into public posts and the manifest -- a file:// URL
+        # would only ever open on this machine
+        if not base_url:
+            raise ValueError("ARTIFACT_BACKEND=local needs ARTIFACT_BASE_URL")
+        super().__init__(root)
+        self.base_url = base_url
+
+    def url(self, key):
+        return f"{self.base_url}/{key}"
+
+
+class S3Backend:
+    """Objects in an S3-compatible bucket, expired by a lifecycle rule."""
+
+    name = "s3"
+    LIFECYCLE_RULE_ID = "epaper-artifact-retention"
+
+    def __init__(self, bucket, endpoint_url="", base_url="", expire_days=None):
+        try:
+            import boto3
+            from boto3.s3.transfer import TransferConfig
+        except ImportError as e:
+            raise RuntimeError("ARTIFACT_BACKEND=s3 needs boto3 (pip install boto3)") from e
+        if not bucket:
+            raise ValueError("ARTIFACT_BACKEND=s3 needs ARTIFACT_S3_BUCKET")
+        self.bucket = bucket
+        self.endpoint_url = endpoint_url.rstrip("/")
+        self.base_url = base_url
+        # credentials and region come from the standard AWS_* variables
+        self.client = boto3.client("s3", endpoint_url=self.endpoint_url or None)
+        self.transfer = TransferConfig(
+            multipart_threshold=MULTIPART_THRESHOLD,
+            multipart_chunksize=MULTIPART_THRESHOLD,
+            max_concurrency=UPLOAD_CONCURRENCY,
+        )
+        # a day past the longest retention tier, like the manifest's
+        # "expires" -- a backstop: retention.cleanup() deletes each object
+        # when its own tier runs out. An object a newer date still
+        # references may expire under it; exists() asks the bucket, so the
+        # next put re-uploads it.
+        if expire_days is None:
+            expire_days = max([common.STALE_ARTIFACT_DAYS, *common.RETENTION_TIERS.values()]) + 1
+        self.expire_days = expire_days
+        self._lifecycle_checked = False
+
+    def ensure_lifecycle(self):
+        """Install (or update) the bucket rule expiring artifacts/objects/."""
+        if self._lifecycle_checked:
+            return
+        self._lifecycle_checked = True
+        from botocore.exceptions import ClientError
+
+        rule = {
+            "ID": self.LIFECYCLE_RULE_ID,
+            "Filter": {"Prefix": OBJECTS_DIR.replace(os.sep, "/") + "/"},
+            "Status": "Enabled",
+            "Expiration": {"Days": self.expire_days},
+        }
+        try:
+            try:
+                rules = self.client.get_bucket_lifecycle_configuration(Bucket=self.bucket)["Rules"]
+            except ClientError:
+                rules = []  # the bucket has no lifecycle configuration yet
+            if rule in rules:
+                return
+            # the put replaces the whole configuration -- keep any other rules
+            rules = [r for r in rules if r.get("ID") != self.LIFECYCLE_RULE_ID] + [rule]
+            self.client.put_bucket_lifecycle_configuration(
+                Bucket=self.bucket, LifecycleConfiguration={"Rules": rules},
+            )
+            logger.info("S3 lifecycle rule set: %s expires after %d days",
+                        rule["Filter"]["Prefix"], self.expire_days)
+        except ClientError as e:
+            logger.warning("Couldn't set the S3 lifecycle rule, objects won't expire server-side: %s", e)
+
+    def exists(self, key):
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def upload(self, path, key):
+        self.ensure_lifecycle()
+        extra = {
+            "ContentType": _CONTENT_TYPES.get(os.path.splitext(key)[1], "application/octet-stream"),
+            # content-addressed: the bytes behind a key never change
+            "CacheControl": "public, max-age=31536000, immutable",
+        }
+        self.client.upload_file(path, self.bucket, key, ExtraArgs=extra, Config=self.transfer)
+
+    def url(self, key):
+        if self.base_url:
+            return f"{self.base_url}/{key}"
+        if self.endpoint_url:
+            return f"{self.endpoint_url}/{self.bucket}/{key}"
+        return f"https://{self.bucket}.s3.amazonaws.com/{key}"
+
+    def keys(self):
+        return iter(())  # nothing for gc() to do -- the lifecycle rule expires objects
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+
+_backend = None
+
+
+def backend():
+    """The configured backend, built once per process."""
+    global _backend
+    if _backend is None:
+        if ARTIFACT_BACKEND == "git":
+            _backend = GitBackend()
+        elif ARTIFACT_BACKEND == "local":
+            _backend = LocalDirBackend(ARTIFACT_LOCAL_DIR, ARTIFACT_BASE_URL)
+        elif ARTIFACT_BACKEND == "s3":
+            _backend = S3Backend(ARTIFACT_S3_BUCKET, ARTIFACT_S3_ENDPOINT, ARTIFACT_BASE_URL)
+        else:
+            raise ValueError(f"Unknown ARTIFACT_BACKEND {ARTIFACT_BACKEND!r} (expected git, local or s3)")
+    return _backend
+
+
+def sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _ext(filename):
+    return os.path.splitext(filename)[1].lstrip(".") or "bin"
+
+
+def object_path(sha, ext):
+    """Key of the object for `sha` (ext without the dot) -- its repo path under git."""
+    return f"{OBJECTS_DIR}/{sha[:2]}/{sha}.{ext}".replace(os.sep, "/")
+
+
+def load_refs(date_dir):
+    """{filename: {"sha256": ..., "bytes": ...}} for one date folder."""
+    path = os.path.join(date_dir, REFS_FILE)
+    if os.path.exists(path):
+        try:
+            with open(path) as f:
+                refs = json.load(f)
+            # the first refs.json files mapped names to the bare hash
+            return {name: ref if isinstance(ref, dict) else {"sha256": ref} for name, ref in refs.items()}
+        except json.JSONDecodeError:
+            logger.warning("Invalid %s, rebuilding it", path)
+    return {}
+
+
+def _save_refs(date_dir, refs):
+    text = json.dumps(refs, indent=2, sort_keys=True) + "\n"
+    path = os.path.join(date_dir, REFS_FILE)
+    if os.path.exists(path):
+        with open(path) as f:
+            if f.read() == text:
+                return
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def _store(path):
+    sha = sha256_file(path)
+    key = object_path(sha, _ext(path))
+    store = backend()
+    if store.exists(key):
+        logger.info("Artifact unchanged, reusing object: %s -> %s", os.path.basename(path), key)
+    else:
+        store.upload(path, key)
+        logger.info("Artifact stored (%s): %s -> %s", store.name, os.path.basename(path), key)
+    return key, {"sha256": sha, "bytes": os.path.getsize(path)}
+
+
+def put_all(paths):
+    """Store each of `paths` (None skipped) by hash and record its name; {path: object key}.
+
+    Idempotent: an object that already exists is never re-sent. Files are
+    hashed and stored in parallel -- on a remote backend that's several
+    uploads in flight, each of them multipart above MULTIPART_THRESHOLD --
+    and each date folder's refs.json is written once at the end.
+    """
+    paths = [p for p in paths if p]
+    with ThreadPoolExecutor(max_workers=UPLOAD_CONCURRENCY, thread_name_prefix="artifact-store") as pool:
+        stored = dict(zip(paths, pool.map(_store, paths)))
+
+    by_dir = defaultdict(dict)
+    for path, (_, ref) in stored.items():
+        by_dir[os.path.dirname(path)][os.path.basename(path)] = ref
+    for date_dir, new_refs in by_dir.items():
+        refs = load_refs(date_dir)
+        refs.update(new_refs)
+        _save_refs(date_dir, refs)
+
+    import retention
+    retention.record(stored)
+    return {path: key for path, (key, _) in stored.items()}
+
+
+def forget(date_dir, names):
+    """Drop `names` from a date folder's refs.json, along with their working
+    copies; the folder goes too once nothing is left in it."""
+    refs = load_refs(date_dir)
+    for name in names:
+        refs.pop(name, None)
+        path = os.path.join(date_dir, name)
+        if os.path.isfile(path):
+            os.remove(path)
+    if refs:
+        _save_refs(date_dir, refs)
+    elif os.path.exists(os.path.join(date_dir, REFS_FILE)):
+        os.remove(os.path.join(date_dir, REFS_FILE))
+    if os.path.isdir(date_dir) and not os.listdir(date_dir):
+        os.rmdir(date_dir)
+
+
+def put(path):
+    """put_all() for one file; returns its object key."""
+    return put_all([path])[path]
+
+
+def resolve(path):
+    """Object key for a stored artifact's working path, or None.
+
+    Anything not recorded in its folder's refs.json -- files from before
+    the store existed, or paths that aren't artifacts at all -- is None.
+    """
+    ref = load_refs(os.path.dirname(path)).get(os.path.basename(path))
+    return object_path(ref["sha256"], _ext(path)) if ref else None
+
+
+def url_for(path):
+    """Public URL of a stored artifact, from whichever backend holds it; None if not stored."""
+    key = resolve(path)
+    return backend().url(key) if key else None
+
+
+def live_objects():
+    """{object key: newest date folder referencing it}, over every live date."""
+    live = {}
+    if not os.path.isdir(common.ARTIFACTS_DIR):
+        return live
+    for name in sorted(os.listdir(common.ARTIFACTS_DIR)):
+        date_dir = os.path.join(common.ARTIFACTS_DIR, name)
+        if name == os.path.basename(OBJECTS_DIR) or not os.path.isdir(date_dir):
+            continue
+        for filename, ref in load_refs(date_dir).items():
+            live[object_path(ref["sha256"], _ext(filename))] = name
+    return live
+
+
+def gc():
+    """Delete objects no live date folder references; returns how many."""
+    store = backend()
+    live = set(live_objects())
+    removed = 0
+    for key in list(store.keys()):
+        if key not in live:
+            store.delete(key)
+            removed += 1
+    if removed:
+        logger.info("Removed %d unreferenced artifact object(s) from %s", removed, store.name)
+    return removed
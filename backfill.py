@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Backfill / reprocess: run the extraction pipeline over many days at once.
+
+The daily scrapers only ever handle common.now_ist(). After an extractor
+change (or a new paper), this regenerates past days from full-paper PDFs:
+
+    python backfill.py --from 2026-10-12 --to 2026-10-18      # The Hindu, from preppyq
+    python backfill.py --pdf-dir ~/papers                     # local full papers
+    python backfill.py --pdf-dir ~/papers --from 2026-10-15 --workers 8
+
+--pdf-dir takes files named the way the scrapers name their downloads,
+{CODE}-FULL-DD-MM-YY.pdf (TH-FULL-15-10-26.pdf, IE-FULL-15-10-26.pdf);
+anything else in the directory is ignored. A date range on its own
+downloads The Hindu from preppyq, the only source that keeps past dates
+(indiags hands out today's papers only) -- --keep-downloads DIR keeps those
+PDFs, named the same way, for the next --pdf-dir run.
+
+Each paper's locate/crop/encode (pipeline.extract_in_worker) runs in a worker
+process, with downloads overlapping it on a few threads. Storing,
+publishing and history stay in this process, one paper at a time: they
+read-modify-write shared files (the day's post, the archive shard,
+download_history.json). All of it is idempotent -- artifacts are content
+addressed, each paper's post section is replaced in place -- so re-running
+over the same days only rewrites what actually changed.
+
+Nothing is posted to Discord. History gets a "backfilled" entry for any
+paper/date that has none yet; existing entries are left as they are. Days
+older than the retention window are processed, but the next daily run's
+cleanup removes them again.
+
+Ends with a throughput line -- papers, pages scanned, wall time, pages/s --
+and peak RSS, of this process and of the largest worker. --low-memory
+(common.LOW_MEMORY) is what makes a high --workers count fit a small box.
+"""
+
+import os
+import re
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import requests
+
+import common
+import pipeline
+import profiling
+import retention
+import scraper
+import search_index
+import site_publish
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+_FULL_PDF_RE = re.compile(r"^([A-Z]+)-FULL-(\d{2}-\d{2}-\d{2})\.pdf$")
+DOWNLOAD_THREADS = 4
+
+
+def _day(date_str, fmt):
+    return datetime.strptime(date_str, fmt).replace(tzinfo=common.IST)
+
+
+def _in_range(day, start, end):
+    return (start is None or day.date() >= start) and (end is None or day.date() <= end)
+
+
+def jobs_from_dir(pdf_dir, codes, start=None, end=None):
+    """[(code, day, path)] for the {CODE}-FULL-DD-MM-YY.pdf files in `pdf_dir`."""
+    jobs = []
+    for name in sorted(os.listdir(pdf_dir)):
+        m = _FULL_PDF_RE.match(name)
+        if not m or m.group(1) not in codes:
+            continue
+        day = _day(m.group(2), "%d-%m-%y")
+        if _in_range(day, start, end):
+            jobs.append((m.group(1), day, os.path.join(pdf_dir, name)))
+    return jobs
+
+
+def _download(url, path):
+    r = requests.get(url, headers=scraper.HEADERS, timeout=60, stream=True)
+    r.raise_for_status()
+    return common.stream_to_file(r, path)
+
+
+def download_jobs(start, end, download_dir):
+    """Yield (code, day, path, editions) as each date's Hindu PDF finishes downloading."""
+    html = scraper.fetch_index()
+    wanted = {}
+    day = start
+    while day <= end:
+        today = datetime(day.year, day.month, day.day, tzinfo=common.IST)
+        editions = scraper.find_today_editions(today, html=html)
+        if not editions:
+            logger.warning("%s: no Hindu link on preppyq, skipping", day.isoformat())
+        else:
+            edition = "International" if "International" in editions else next(iter(editions))
+            path = os.path.join(download_dir, common.dated_filename(scraper.PAPER_NAME, "FULL", today, "pdf"))
+            wanted[(today, path)] = (editions[edition], editions)
+        day += timedelta(days=1)
+
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_THREADS, thread_name_prefix="backfill-dl") as pool:
+        futures = {
+            pool.submit(_download, url, path): (today, path, editions)
+            for (today, path), (url, editions) in wanted.items()
+        }
+        for future in as_completed(futures):
+            today, path, editions = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                logger.error("%s: download failed: %s", today.strftime("%Y-%m-%d"), e)
+                continue
+            yield scraper.PAPER_CODE, today, path, editions
+
+
+def _publish(code, today, result, editions, history):
+    paper_name = common.PAPERS[code]["name"]
+    date_key = today.strftime("%Y-%m-%d")
+    month_key = today.strftime("%m-%Y")
+    if result is not None:
+        pipeline.store(result)
+        crops = result["articles"]
+        site_publish.publish_post(
+            paper_name, code, today,
+            editorial_pdf_path=result["editorial_pdf"],
+            thumbnail_path=result["thumbnail"],
+            article_image_paths=crops["png"] or None,
+            article_pdf_paths=crops["pdf"] or None,
+            article_webp_paths=crops["webp"] or None,
+            edition_urls=editions,
+        )
+    if not common.already_processed(history, date_key, month_key, paper_name):
+        entry = {"status": "backfilled" if result else "skipped_not_published",
+                 "timestamp": common.now_ist().isoformat()}
+        if result:
+            entry["editorial_page_index"] = result["page_index"]
+            entry["artifact_dir"] = os.path.dirname(result["editorial_pdf"])
+        common.record_history(history, date_key, month_key, paper_name, entry)
+
+
+def run(jobs, workers):
+    """Extract `jobs` ((code, day, path, editions) iterable) in a process pool; returns stats."""
+    stats = {"papers": 0, "skipped": 0, "failed": 0, "pages": 0}
+    history = common.load_history()
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for code, today, path, editions in jobs:
+            futures[pool.submit(pipeline.extract_in_worker, code, today, path)] = (code, today, editions)
+        for future in as_completed(futures):
+            code, today, editions = futures[future]
+            label = f"{code} {today.strftime('%Y-%m-%d')}"
+            try:
+                result, pages, elapsed = future.result()
+                _publish(code, today, result, editions, history)
+            except Exception as e:
+                logger.error("%s: failed: %s", label, e)
+                stats["failed"] += 1
+                continue
+            stats["pages"] += pages
+            if result is None:
+                logger.info("%s: no editorial page, skipped (%.1fs)", label, elapsed)
+                stats["skipped"] += 1
+            else:
+                logger.info("%s: page %d of %d (%.1fs)", label, result["page_index"] + 1, pages, elapsed)
+                stats["papers"] += 1
+    stats["seconds"] = time.perf_counter() - t0
+
+    retention.write_manifest()
+    search_index.export()
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backfill or reprocess editorials over a date range")
+    parser.add_argument("--from", dest="start", help="first date, YYYY-MM-DD")
+    parser.add_argument("--to", dest="end", help="last date, YYYY-MM-DD (default: same as --from when downloading)")
+    parser.add_argument("--pdf-dir", help="directory of {CODE}-FULL-DD-MM-YY.pdf full papers")
+    parser.add_argument("--papers", nargs="+", choices=list(common.PAPERS), default=list(common.PAPERS),
+                        help="paper codes to process from --pdf-dir (default: all)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="extraction processes (default: CPU count)")
+    parser.add_argument("--keep-downloads", metavar="DIR",
+                        help="keep downloaded full papers here instead of a temp dir")
+    parser.add_argument("--low-memory", action="store_true",
+                        help="bounded MuPDF store, banded renders, one crop at a time (EPAPER_LOW_MEMORY)")
+    args = parser.parse_args(argv)
+
+    if args.low_memory:
+        # before the pool starts, so every worker inherits it
+        os.environ["EPAPER_LOW_MEMORY"] = "1"
+        common.LOW_MEMORY = True
+
+    start = datetime.strptime(args.start, "%Y-%m-%d").date() if args.start else None
+    end = datetime.strptime(args.end, "%Y-%m-%d").date() if args.end else None
+
+    scratch = None
+    if args.pdf_dir:
+        jobs = [(code, day, path, None) for code, day, path in jobs_from_dir(args.pdf_dir, args.papers, start, end)]
+        if not jobs:
+            logger.error("No {CODE}-FULL-DD-MM-YY.pdf files to process in %s", args.pdf_dir)
+            sys.exit(2)
+    elif start:
+        end = end or start
+        download_dir = args.keep_downloads or tempfile.mkdtemp(prefix="epaper-backfill-")
+        os.makedirs(download_dir, exist_ok=True)
+        scratch = None if args.keep_downloads else download_dir
+        jobs = download_jobs(start, end, download_dir)
+    else:
+        parser.error("give --pdf-dir, or a --from date to download")
+
+    try:
+        stats = run(jobs, args.workers)
+    finally:
+        if scratch:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    rate = stats["pages"] / stats["seconds"] if stats["seconds"] else 0.0
+    logger.info(
+        "=== Backfill: %d paper(s), %d skipped, %d failed; %d pages in %.1fs (%.1f pages/s, %d workers) ===",
+        stats["papers"], stats["skipped"], stats["failed"], stats["pages"], stats["seconds"], rate, args.workers,
+    )
+    profiling.log_peak_rss("backfill", children=True)
+    if stats["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Offline benchmarks: synthetic paper generator + timing harness (see run.py)."""
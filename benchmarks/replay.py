@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Record/replay harness for end-to-end runs against local stand-ins.
+
+End-to-end latency of scraper.main / fallback_scraper.main otherwise only
+exists against the live preppyq, indiags and Discord endpoints -- one
+shot per day, with one-time download tokens. This captures a real run's
+HTTP exchanges once, then replays them from a local server as many times
+as needed, with injected latency, bandwidth limits and failures:
+
+    python -m benchmarks.replay record cassettes/fallback fallback
+    python -m benchmarks.replay replay cassettes/fallback fallback \\
+        --latency 0.15 --bandwidth 2000000 --runs 10 --concurrency 4
+    python -m benchmarks.replay replay cassettes/primary primary \\
+        --fail preppyq.in/wp-content:503        # force the failover path
+
+Interception is at requests' transport adapter (HTTPAdapter.send), which
+sees every hop individually -- including the 302 carrying indiags'
+`#unlock=` fragment, which Session.send would otherwise fold into a single
+redirect-followed response. Both scrapers and common.post_discord go
+through requests, so nothing in the pipeline needs to know it's being
+recorded or replayed.
+
+A cassette is a directory: cassette.json (exchange metadata, in order,
+plus the wall-clock time of the recording) and bodies/ (raw response
+bodies -- the PDFs, mostly). On replay:
+  - every outgoing request is rewritten to the local server, with the
+    original origin in an X-Replay-Origin header; the response handed
+    back to the caller carries the original URL again, so redirects,
+    relative links and the unlock fragment all resolve as they did live
+  - a URL requested N times is answered with its N recorded responses in
+    order (the /go/{token} link returned the PDF once, then HTML)
+  - common.now_ist is frozen to the recording time, so "today's" table
+    row and artifact dates match what was captured
+  - each run executes in its own scratch working directory, so history,
+    artifacts and posts never touch the repo checkout
+
+The Discord webhook URL is replaced with a placeholder before anything is
+written -- but cassettes still hold full PDFs and are gitignored; don't
+commit them.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import logging
+import tempfile
+import argparse
+import threading
+import contextlib
+import urllib.parse
+from datetime import datetime
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ProcessPoolExecutor
+
+import requests.adapters
+
+import common
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_FILE = "cassette.json"
+BODIES_DIR = "bodies"
+DISCORD_PLACEHOLDER = "https://discord.invalid/api/webhooks/replay"
+ORIGIN_HEADER = "X-Replay-Origin"
+# stored bodies are already decoded, and the replay server frames them itself
+_DROP_HEADERS = {"content-encoding", "transfer-encoding", "content-length", "connection"}
+
+ENTRY_POINTS = {
+    "primary": ("scraper", "main"),
+    "fallback": ("fallback_scraper", "main"),
+}
+
+_original_adapter_send = requests.adapters.HTTPAdapter.send
+
+
+def _key(method, url):
+    """Match key for one exchange -- fragment dropped, it never hits the wire."""
+    parts = urllib.parse.urlsplit(url)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    return f"{method.upper()} {parts.scheme}://{parts.netloc}{path}"
+
+
+def _redact(url):
+    if common.DISCORD_WEBHOOK_URL and url.startswith(common.DISCORD_WEBHOOK_URL):
+        return DISCORD_PLACEHOLDER + url[len(common.DISCORD_WEBHOOK_URL):]
+    return url
+
+
+# --- record --------------------------------------------------------------
+
+@contextlib.contextmanager
+def recording(cassette_dir):
+    """Capture every HTTP hop made inside the block into `cassette_dir`."""
+    bodies = os.path.join(cassette_dir, BODIES_DIR)
+    os.makedirs(bodies, exist_ok=True)
+    exchanges = []
+    lock = threading.Lock()
+
+    def send(adapter, request, *args, **kwargs):
+        response = _original_adapter_send(adapter, request, *args, **kwargs)
+        body = response.content
+        with lock:
+            name = os.path.join(BODIES_DIR, f"{len(exchanges):04d}.bin")
+            with open(os.path.join(cassette_dir, name), "wb") as f:
+                f.write(body)
+            exchanges.append({
+                "method": request.method,
+                "url": _redact(request.url),
+                "status": response.status_code,
+                "headers": {
+                    k: _redact(v) for k, v in response.headers.items()
+                    if k.lower() not in _DROP_HEADERS
+                },
+                "body": name,
+                "elapsed": response.elapsed.total_seconds(),
+            })
+        return response
+
+    recorded_at = common.now_ist()
+    requests.adapters.HTTPAdapter.send = send
+    try:
+        yield exchanges
+    finally:
+        requests.adapters.HTTPAdapter.send = _original_adapter_send
+        with open(os.path.join(cassette_dir, CASSETTE_FILE), "w") as f:
+            json.dump({"recorded_at": recorded_at.isoformat(), "exchanges": exchanges}, f, indent=2)
+        logger.info("Recorded %d exchanges into %s", len(exchanges), cassette_dir)
+
+
+# --- replay server -------------------------------------------------------
+
+class FaultRule:
+    """`--fail PATTERN[:STATUS[:RATE]]` -- STATUS 0 drops the connection."""
+
+    def __init__(self, spec):
+        parts = spec.split(":")
+        self.pattern = parts[0]
+        self.status = int(parts[1]) if len(parts) > 1 else 503
+        self.rate = float(parts[2]) if len(parts) > 2 else 1.0
+
+    def matches(self, key, rng):
+        return self.pattern in key and rng.random() < self.rate
+
+
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, cassette_dir, latency=0.0, jitter=0.0, bandwidth=None,
+                 faults=(), seed=0):
+        super().__init__(("127.0.0.1", 0), _ReplayHandler)
+        with open(os.path.join(cassette_dir, CASSETTE_FILE)) as f:
+            data = json.load(f)
+        self.cassette_dir = cassette_dir
+        self.recorded_at = datetime.fromisoformat(data["recorded_at"])
+        self.exchanges = defaultdict(list)
+        for ex in data["exchanges"]:
+            self.exchanges[_key(ex["method"], ex["url"])].append(ex)
+        # a recording made without a webhook configured has no Discord
+        # exchange to replay -- runs then skip posting, same as it did
+        self.webhook_url = DISCORD_PLACEHOLDER if any(
+            ex["url"].startswith(DISCORD_PLACEHOLDER) for ex in data["exchanges"]
+        ) else ""
+        self.latency = latency
+        self.jitter = jitter
+        self.bandwidth = bandwidth
+        self.faults = list(faults)
+        self.rng = random.Random(seed)
+        self._served = defaultdict(int)
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def next_exchange(self, key):
+        """Recorded responses for `key`, in order; the last one repeats."""
+        with self._lock:
+            recorded = self.exchanges.get(key)
+            if not recorded:
+                return None
+            n = self._served[key]
+            self._served[key] += 1
+            return recorded[min(n, len(recorded) - 1)]
+
+    def reset(self):
+        with self._lock:
+            self._served.clear()
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt, *args):
+        logger.debug("replay: " + fmt, *args)
+
+    def _serve(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        origin = self.headers.get(ORIGIN_HEADER, "")
+        key = f"{self.command} {origin}{self.path}"
+
+        delay = server.latency + (server.rng.uniform(0, server.jitter) if server.jitter else 0)
+        if delay:
+            time.sleep(delay)
+
+        for rule in server.faults:
+            if rule.matches(key, server.rng):
+                if rule.status == 0:
+                    self.close_connection = True
+                    self.connection.close()
+                    return
+                self._respond(rule.status, {"Content-Type": "text/plain"}, b"injected failure\n")
+                return
+
+        ex = server.next_exchange(key)
+        if ex is None:
+            logger.warning("replay: no recorded exchange for %s", key)
+            self._respond(404, {"Content-Type": "text/plain"}, b"not in cassette\n")
+            return
+        with open(os.path.join(server.cassette_dir, ex["body"]), "rb") as f:
+            body = f.read()
+        self._respond(ex["status"], ex["headers"], body)
+
+    def _respond(self, status, headers, body):
+        self.send_response(status)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        # a HEAD answer is the headers alone -- a body here would be read as
+        # the start of the next response on a keep-alive connection
+        if self.command == "HEAD":
+            return
+        bandwidth = self.server.bandwidth
+        if not bandwidth:
+            self.wfile.write(body)
+            return
+        chunk = 16 * 1024
+        for i in range(0, len(body), chunk):
+            piece = body[i:i + chunk]
+            self.wfile.write(piece)
+            time.sleep(len(piece) / bandwidth)
+
+    do_GET = do_POST = do_HEAD = _serve
+
+
+@contextlib.contextmanager
+def replaying(base_url, recorded_at, webhook_url):
+    """Route every requests call to the replay server at `base_url`."""
+
+    def send(adapter, request, *args, **kwargs):
+        original_url = request.url
+        parts = urllib.parse.urlsplit(original_url)
+        local = request.copy()
+        local.url = base_url + (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        local.headers[ORIGIN_HEADER] = f"{parts.scheme}://{parts.netloc}"
+        response = _original_adapter_send(adapter, local, *args, **kwargs)
+        response.url = original_url
+        response.request = request
+        return response
+
+    saved = (common.now_ist, common.DISCORD_WEBHOOK_URL)
+    requests.adapters.HTTPAdapter.send = send
+    common.now_ist = lambda: recorded_at
+    common.DISCORD_WEBHOOK_URL = webhook_url
+    try:
+        yield
+    finally:
+        requests.adapters.HTTPAdapter.send = _original_adapter_send
+        common.now_ist, common.DISCORD_WEBHOOK_URL = saved
+
+
+# --- running the pipeline ------------------------------------------------
+
+def _run_entry_point(name):
+    """Import and run one entry point; returns (exit_code, seconds)."""
+    module_name, func_name = ENTRY_POINTS[name]
+    module = __import__(module_name)
+    start = time.perf_counter()
+    code = 0
+    try:
+        getattr(module, func_name)()
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except Exception:
+        # an uncaught exception is how a run fails in CI too (nonzero exit)
+        logger.exception("%s raised", name)
+        code = 1
+    return code, time.perf_counter() - start
+
+
+@contextlib.contextmanager
+def _scratch_workdir(keep=False):
+    # relative paths throughout (download_history.json, artifacts/,
+    # app/_posts/) mean the working directory *is* the output location
+    repo_root = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="epaper-replay-")
+    if repo_root not in sys.path:
+        sys.path.insert(0, repo_root)
+    os.chdir(workdir)
+    try:
+        yield workdir
+    finally:
+        os.chdir(repo_root)
+        if keep:
+            logger.info("Run output kept in %s", workdir)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _replay_once(entry_point, base_url, recorded_at, webhook_url, keep):
+    with _scratch_workdir(keep), replaying(base_url, recorded_at, webhook_url):
+        return _run_entry_point(entry_point)
+
+
+def record(cassette_dir, entry_point, keep=False):
+    cassette_dir = os.path.abspath(cassette_dir)
+    with _scratch_workdir(keep), recording(cassette_dir):
+        code, seconds = _run_entry_point(entry_point)
+    print(f"recorded {entry_point}: exit {code}, {seconds:.2f}s -> {cassette_dir}")
+    return code
+
+
+def replay(cassette_dir, entry_point, runs=1, concurrency=1, keep=False, **server_opts):
+    server = ReplayServer(os.path.abspath(cassette_dir), **server_opts)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    results = []
+    wall_start = time.perf_counter()
+    try:
+        if concurrency > 1:
+            # separate processes, not threads -- every run chdirs into its
+            # own scratch dir, and the working directory is process-wide.
+            # Children share the server (and its per-URL response order),
+            # so concurrent runs of a one-time-token flow see the
+            # post-token responses, same as concurrent live runs would.
+            with ProcessPoolExecutor(max_workers=concurrency) as pool:
+                futures = [
+                    pool.submit(_replay_once, entry_point, server.base_url, server.recorded_at,
+                                server.webhook_url, keep)
+                    for _ in range(runs)
+                ]
+                results = [f.result() for f in futures]
+        else:
+            for _ in range(runs):
+                server.reset()
+                results.append(_replay_once(
+                    entry_point, server.base_url, server.recorded_at, server.webhook_url, keep,
+                ))
+    finally:
+        server.shutdown()
+    wall = time.perf_counter() - wall_start
+
+    times = sorted(s for _, s in results)
+    failures = sum(1 for code, _ in results if code != 0)
+    print(
+        f"replayed {entry_point} x{runs} (concurrency {concurrency}): "
+        f"min {times[0]:.2f}s, median {times[len(times) // 2]:.2f}s, max {times[-1]:.2f}s, "
+        f"{failures} failed, {runs / wall:.2f} runs/s"
+    )
+    return 1 if failures else 0
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Record/replay end-to-end runs")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="run against live endpoints, capture a cassette")
+    rec.add_argument("cassette")
+    rec.add_argument("entry_point", choices=sorted(ENTRY_POINTS))
+    rec.add_argument("--keep", action="store_true", help="keep the run's scratch output dir")
+
+    rep = sub.add_parser("replay", help="run against a local replay of a cassette")
+    rep.add_argument("cassette")
+    rep.add_argument("entry_point", choices=sorted(ENTRY_POINTS))
+    rep.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    rep.add_argument("--jitter", type=float, default=0.0, help="extra random 0..N seconds per response")
+    rep.add_argument("--bandwidth", type=float, default=None, help="bytes/second per response body")
+    rep.add_argument("--fail", action="append", default=[], metavar="PATTERN[:STATUS[:RATE]]",
+                     help="inject failures for URLs containing PATTERN (STATUS 0 = drop connection)")
+    rep.add_argument("--seed", type=int, default=0, help="seed for jitter and fault rates")
+    rep.add_argument("--runs", type=int, default=1)
+    rep.add_argument("--concurrency", type=int, default=1)
+    rep.add_argument("--keep", action="store_true", help="keep each run's scratch output dir")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        sys.exit(record(args.cassette, args.entry_point, keep=args.keep))
+    sys.exit(replay(
+        args.cassette, args.entry_point, runs=args.runs, concurrency=args.concurrency,
+        keep=args.keep, latency=args.latency, jitter=args.jitter, bandwidth=args.bandwidth,
+        faults=[FaultRule(spec) for spec in args.fail], seed=args.seed,
+    ))
+
+
+if __name__ == "__main__":
+    main()
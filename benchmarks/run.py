@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Repeatable offline benchmarks for the extraction pipeline.
+
+Runs the hot paths against synthetic papers (benchmarks/synthetic.py)
+across page counts and DPIs, and writes the timings as JSON:
+
+    python -m benchmarks.run                          # full matrix
+    python -m benchmarks.run --only locate_text --pages 8 48
+    python -m benchmarks.run --save-baseline          # record a new baseline
+    python -m benchmarks.run --baseline benchmarks/baseline.json
+    python -m benchmarks.run --only segment_raster_articles --raster-pdf artifacts/*/IE-EDITORIAL-*.pdf
+
+Each case is timed `--repeat` times after one untimed warm-up call (the
+first call pays for font loading and MuPDF's store filling up, which is a
+cold-start cost, not the thing being measured). min and median are both
+recorded; regression checks compare medians, since min is too flattering
+on a noisy shared CI runner and mean is dragged around by a single GC
+pause.
+
+With --baseline, any case whose median exceeds the baseline median by
+more than its threshold ratio (--threshold, or a per-case override in the
+baseline file's "thresholds" map) is reported and the run exits 1. A
+baseline only means anything on the machine it was recorded on -- record
+one per runner class, don't compare a laptop against CI.
+
+OCR cases need the tesseract binary and are recorded as skipped without
+it, rather than failing the whole run.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import argparse
+import platform
+import contextlib
+import statistics
+from datetime import datetime, timedelta
+
+import fitz  # PyMuPDF
+
+import common
+import editorial
+import retention
+import search_index
+import site_publish
+from benchmarks import synthetic
+
+RESULTS_DIR = os.path.join("benchmarks", "results")
+DEFAULT_BASELINE = os.path.join("benchmarks", "baseline.json")
+DEFAULT_THRESHOLD = 1.30
+
+_docs = {}
+
+
+def _paper(kind, pages):
+    """Build (once) and cache a synthetic paper; returns (doc, editorial_index)."""
+    key = (kind, pages)
+    if key not in _docs:
+        build = synthetic.hindu_paper if kind == "hindu" else synthetic.express_paper
+        editorial_index = (pages * 2) // 3
+        _docs[key] = (build(pages=pages, editorial_index=editorial_index), editorial_index)
+    return _docs[key]
+
+
+def _tesseract_available():
+    try:
+        import pytesseract
+        pytesseract.get_tesseract_version()
+        return True
+    except Exception:
+        return False
+
+
+def case_locate_text(pages, dpi, scratch):
+    doc, _ = _paper("hindu", pages)
+    return lambda: editorial.locate_editorial_page_text(doc)
+
+
+def case_locate_ocr(pages, dpi, scratch):
+    doc, _ = _paper("express", pages)
+    return lambda: editorial.locate_editorial_page_ocr(doc, dpi=dpi)
+
+
+def case_extract_hindu_articles(pages, dpi, scratch):
+    doc, idx = _paper("hindu", pages)
+    return lambda: editorial.extract_hindu_articles(doc, idx, dpi=dpi)
+
+
+def case_segment_raster_articles(pages, dpi, scratch):
+    # the render is shared with cropping and OCR in the pipeline, so it's
+    # built outside the timed call
+    doc, idx = _paper("express", pages)
+    raster = editorial.RasterPage(doc[idx], dpi)
+    return lambda: editorial.find_raster_article_rects(raster)
+
+
+def case_extract_hindu_article_pdfs(pages, dpi, scratch):
+    doc, idx = _paper("hindu", pages)
+    return lambda: editorial.extract_hindu_article_pdfs(doc, idx)
+
+
+def case_encode_article_images(pages, dpi, scratch):
+    import imageopt
+    doc, idx = _paper("hindu", pages)
+    zoom = dpi / 72
+    page = doc[idx]
+    images = [
+        imageopt.pixmap_to_image(page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=clip))
+        for clip in editorial.find_hindu_article_rects(doc, idx)
+    ]
+    return lambda: imageopt.encode_many(images)
+
+
+def case_extract_single_page_pdf(pages, dpi, scratch):
+    out = os.path.join(scratch, "single.pdf")
+
+    def run():
+        for kind in ("hindu", "express"):
+            doc, idx = _paper(kind, pages)
+            editorial.extract_single_page_pdf(doc, idx, out)
+    return run
+
+
+def case_extract_single_page_pdf_optimized(pages, dpi, scratch):
+    out = os.path.join(scratch, "single-opt.pdf")
+
+    def run():
+        for kind in ("hindu", "express"):
+            doc, idx = _paper(kind, pages)
+            editorial.extract_single_page_pdf(doc, idx, out, optimize=True, image_dpi=dpi)
+    return run
+
+
+def case_publish_post(pages, dpi, scratch):
+    # one post per date, `pages` consecutive dates -- publish_post's cost
+    # is the read/merge/rewrite of an existing post, so re-publishing onto
+    # posts that already have the other paper's section is the real case
+    start = common.now_ist()
+    days = [start - timedelta(days=i) for i in range(pages)]
+    pdf = os.path.join("artifacts", "bench", "TH-EDITORIAL.pdf")
+    arts = [os.path.join("artifacts", "bench", f"TH-ART{i}.png") for i in (1, 2)]
+    editions = {"International": "https://example.invalid/i.pdf", "Delhi": "https://example.invalid/d.pdf"}
+
+    def run():
+        for day in days:
+            site_publish.publish_post("The Hindu", "TH", day, pdf, arts, editions)
+            site_publish.publish_post("Indian Express", "IE", day, pdf)
+    return run
+
+
+# name -> (factory, varies with dpi, needs tesseract)
+CASES = {
+    "locate_text": (case_locate_text, False, False),
+    "locate_ocr": (case_locate_ocr, True, True),
+    "extract_hindu_articles": (case_extract_hindu_articles, True, False),
+    "extract_hindu_article_pdfs": (case_extract_hindu_article_pdfs, False, False),
+    "segment_raster_articles": (case_segment_raster_articles, True, False),
+    "encode_article_images": (case_encode_article_images, True, False),
+    "extract_single_page_pdf": (case_extract_single_page_pdf, False, False),
+    "extract_single_page_pdf_optimized": (case_extract_single_page_pdf_optimized, True, False),
+    "publish_post": (case_publish_post, False, False),
+}
+
+
+@contextlib.contextmanager
+def _scratch_outputs(scratch):
+    """Point everything publish_post writes at `scratch` -- never the
+    committed site or indexes, which the workflows' `git add -A` would
+    publish."""
+    saved = site_publish.POSTS_DIR, site_publish.ARCHIVE_DIR, retention.INDEX_DB, search_index.SEARCH_DB
+    site_publish.POSTS_DIR = os.path.join(scratch, "_posts")
+    site_publish.ARCHIVE_DIR = os.path.join(scratch, "archive")
+    retention.INDEX_DB = os.path.join(scratch, "artifacts.db")
+    search_index.SEARCH_DB = os.path.join(scratch, "search.db")
+    try:
+        yield
+    finally:
+        site_publish.POSTS_DIR, site_publish.ARCHIVE_DIR, retention.INDEX_DB, search_index.SEARCH_DB = saved
+
+
+def _time(fn, repeat):
+    fn()  # warm-up
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "runs": repeat,
+    }
+
+
+def run_benchmarks(names, page_counts, dpis, repeat, raster_pdfs=()):
+    have_tesseract = _tesseract_available()
+    results = {}
+    scratch = tempfile.mkdtemp(prefix="epaper-bench-")
+    try:
+        with _scratch_outputs(scratch):
+            for name in names:
+                factory, uses_dpi, needs_tesseract = CASES[name]
+                for pages in page_counts:
+                    for dpi in (dpis if uses_dpi else [None]):
+                        key = f"{name}[pages={pages}" + (f",dpi={dpi}]" if dpi else "]")
+                        if needs_tesseract and not have_tesseract:
+                            results[key] = {"skipped": "tesseract not installed"}
+                            print(f"{key:<50} skipped (no tesseract)")
+                            continue
+                        results[key] = _time(factory(pages, dpi, scratch), repeat)
+                        print(f"{key:<50} median {results[key]['median'] * 1000:9.1f} ms")
+            # real flattened pages (an IE-EDITORIAL-*.pdf from artifacts/, say):
+            # the synthetic ones have none of a real page's photos, pull quotes
+            # and narrow intra-article gutters
+            if "segment_raster_articles" in names:
+                for path in raster_pdfs:
+                    doc = fitz.open(path)
+                    for dpi in dpis:
+                        key = f"segment_raster_articles[{os.path.basename(path)},dpi={dpi}]"
+                        raster = editorial.RasterPage(doc[0], dpi)
+                        results[key] = _time(lambda: editorial.find_raster_article_rects(raster), repeat)
+                        print(f"{key:<50} median {results[key]['median'] * 1000:9.1f} ms")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    return results
+
+
+def compare(results, baseline, default_threshold):
+    """List of (case, median, baseline_median, limit_ratio) regressions."""
+    thresholds = baseline.get("thresholds", {})
+    regressions = []
+    for key, res in results.items():
+        base = baseline.get("results", {}).get(key)
+        if not base or "median" not in base or "median" not in res:
+            continue
+        limit = thresholds.get(key, default_threshold)
+        if res["median"] > base["median"] * limit:
+            regressions.append((key, res["median"], base["median"], limit))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline extraction benchmarks")
+    parser.add_argument("--only", nargs="+", choices=sorted(CASES), default=list(CASES))
+    parser.add_argument("--pages", nargs="+", type=int, default=[8, 24])
+    parser.add_argument("--dpis", nargs="+", type=int, default=[100, 200])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--raster-pdf", nargs="+", default=[],
+                        help="also segment the first page of these real flattened PDFs")
+    parser.add_argument("--output", help="results JSON path (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", help="compare against this baseline JSON, exit 1 on regression")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed median ratio vs. baseline (default %(default)s)")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help=f"also write results to {DEFAULT_BASELINE}")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.only, args.pages, args.dpis, args.repeat, args.raster_pdf)
+    report = {
+        "meta": {
+            "timestamp": common.now_ist().isoformat(),
+            "python": platform.python_version(),
+            "pymupdf": fitz.VersionBind,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nresults written to {output}")
+
+    if args.save_baseline:
+        existing = {}
+        if os.path.exists(DEFAULT_BASELINE):
+            with open(DEFAULT_BASELINE) as f:
+                existing = json.load(f)
+        # keep any hand-tuned per-case thresholds across re-recordings
+        report["thresholds"] = existing.get("thresholds", {})
+        with open(DEFAULT_BASELINE, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"baseline written to {DEFAULT_BASELINE}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for key, median, base, limit in regressions:
+            print(f"REGRESSION {key}: {median * 1000:.1f} ms vs baseline "
+                  f"{base * 1000:.1f} ms (limit x{limit:.2f})")
+        if regressions:
+            sys.exit(1)
+        print("no regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Startup budget for the commands that shouldn't do any real work.
+
+`epaper.py stats`, and a primary/fallback/run that finds today already in
+the history, should cost little more than starting the interpreter. It
+only takes one top-level `import requests` (or fitz, or PIL) slipping back
+into a module on that path to add 100-500 ms to every one of them, so
+this checks both what loads and how long it takes:
+
+    python -m benchmarks.startup                 # exit 1 if over budget
+    python -m benchmarks.startup --budget-ms 40 --runs 10
+
+Each scenario runs `python -X importtime epaper.py ...` in a scratch
+directory holding a download_history.json that makes it a no-op, then
+fails if any of HEAVY_MODULES was imported, or if the median wall time
+exceeds a bare `python -c pass` by more than the budget. Like run.py's
+baselines, the timing half is only meaningful on a quiet machine; the
+import half holds anywhere.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import argparse
+import statistics
+import subprocess
+
+import common
+
+EPAPER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "epaper.py")
+DEFAULT_BUDGET_MS = 60
+
+# anything in here on a no-op path is a regression
+HEAVY_MODULES = ("fitz", "pymupdf", "PIL", "pytesseract", "bs4", "requests", "urllib3", "boto3", "numpy")
+
+
+def _history(*papers):
+    today = common.now_ist()
+    entry = {"status": "posted", "timestamp": today.isoformat()}
+    return {today.strftime("%m-%Y"): {today.strftime("%Y-%m-%d"): {p: entry for p in papers}}}
+
+
+# name -> (epaper.py arguments, history that makes it a no-op)
+SCENARIOS = {
+    "stats": (["stats"], {}),
+    "primary-noop": (["primary"], _history("The Hindu")),
+    "fallback-noop": (["fallback"], _history("The Hindu", "Indian Express")),
+    "run-noop": (["run"], _history(*(paper["name"] for paper in common.PAPERS.values()))),
+}
+
+
+def _run(cmd, cwd):
+    t0 = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True)
+    elapsed = time.perf_counter() - t0
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(cmd)} exited {proc.returncode}:\n{proc.stderr[-2000:]}")
+    return elapsed, proc.stderr
+
+
+def _imported(importtime_stderr):
+    """Top-level package names from -X importtime output."""
+    names = set()
+    for line in importtime_stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            name = line.rsplit("|", 1)[1].strip()
+            names.add(name.split(".")[0])
+    return names
+
+
+def check(runs, budget_ms):
+    """List of failure messages; empty when every scenario is within budget."""
+    baseline = statistics.median(_run([sys.executable, "-c", "pass"], None)[0] for _ in range(runs))
+    failures = []
+    for name, (args, history) in SCENARIOS.items():
+        scratch = tempfile.mkdtemp(prefix="epaper-startup-")
+        try:
+            with open(os.path.join(scratch, common.HISTORY_FILE), "w") as f:
+                json.dump(history, f)
+            _, stderr = _run([sys.executable, "-X", "importtime", EPAPER] + args, scratch)
+            heavy = sorted(_imported(stderr).intersection(HEAVY_MODULES))
+            wall = statistics.median(_run([sys.executable, EPAPER] + args, scratch)[0] for _ in range(runs))
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+        over_ms = (wall - baseline) * 1000
+        print(f"{name:<15} {wall * 1000:7.1f} ms  (+{over_ms:.1f} ms over bare python)"
+              + (f"  imports {', '.join(heavy)}" if heavy else ""))
+        if heavy:
+            failures.append(f"{name}: imports {', '.join(heavy)}")
+        if over_ms > budget_ms:
+            failures.append(f"{name}: {over_ms:.1f} ms over bare python, budget {budget_ms} ms")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup/import budget for no-op commands")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="allowed median wall time over `python -c pass` (default %(default)s)")
+    args = parser.parse_args()
+
+    failures = check(args.runs, args.budget_ms)
+    for failure in failures:
+        print(f"OVER BUDGET {failure}")
+    if failures:
+        sys.exit(1)
+    print("startup within budget")
+
+
+if __name__ == "__main__":
+    main()
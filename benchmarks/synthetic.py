@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Synthetic whole-newspaper PDFs for offline benchmarking.
+
+artifacts/ only ever holds the single-page extracts, never a whole paper,
+and the real sources hand out one-time or date-scoped links -- so there's
+nothing in the repo to benchmark locate/crop against. These generators
+build stand-ins that exercise the same code paths the real PDFs do:
+
+  - hindu_paper(): text-layer pages, like The Hindu's. One page carries a
+    standalone "Editorial" masthead line, a full-width masthead rule, a
+    full-height vertical rule marking off the sidebar, and horizontal
+    rules in the content column bounding two articles plus a letters
+    block -- exactly the geometry editorial.extract_hindu_articles reads.
+  - express_paper(): raster-only pages, like Indian Express's. Every page
+    is a single JPEG with no text layer and no vector drawings; the
+    editorial page's masthead reads "The Editorial Page" as part of the
+    image, and the front page carries the long teaser line
+    editorial.locate_editorial_page_ocr has to reject.
+
+Content is deterministic (seeded) so two runs on the same machine render
+identical documents and benchmark numbers stay comparable.
+"""
+
+import random
+import argparse
+
+import fitz  # PyMuPDF
+
+PAGE_WIDTH, PAGE_HEIGHT = 1000, 1500
+MARGIN = 30
+SIDEBAR_WIDTH = 220
+
+SECTIONS = ["Front Page", "National", "States", "World", "Business", "Sport", "Opinion", "Life"]
+_WORDS = (
+    "the government court policy minister state report said would council "
+    "election reform budget growth public health water climate farmers data "
+    "university river trade market inflation security rights committee bill"
+).split()
+
+
+def _filler(rng, words):
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _columns(page, rng, rect, columns, fontsize=8):
+    """Fill `rect` with `columns` text columns separated by whitespace gutters.
+
+    insert_textbox writes nothing at all if the text overflows its box, so
+    the word count is sized to ~85% of each column's estimated capacity.
+    """
+    gutter = 12
+    col_w = (rect.width - gutter * (columns - 1)) / columns
+    lines = int(rect.height / (fontsize * 1.2))
+    words_per_line = max(1, int(col_w / (fontsize * 3.2)))
+    words = int(lines * words_per_line * 0.85)
+    for c in range(columns):
+        x0 = rect.x0 + c * (col_w + gutter)
+        box = fitz.Rect(x0, rect.y0, x0 + col_w, rect.y1)
+        page.insert_textbox(box, _filler(rng, words), fontsize=fontsize)
+
+
+def _section_page(page, rng, title):
+    page.insert_text((MARGIN, 50), title, fontsize=28)
+    page.draw_line((MARGIN, 62), (PAGE_WIDTH - MARGIN, 62), width=1.5)
+    y = 80
+    while y < PAGE_HEIGHT - 200:
+        h = rng.randint(250, 420)
+        page.insert_text((MARGIN, y + 24), _filler(rng, 7), fontsize=20)
+        _columns(page, rng, fitz.Rect(MARGIN, y + 36, PAGE_WIDTH - MARGIN, y + h), 5)
+        y += h + 20
+
+
+def _hindu_editorial_page(page, rng):
+    page.insert_text((MARGIN, 40), "Editorial", fontsize=30)
+    page.insert_text((MARGIN, 58), "THE HINDU", fontsize=10)
+    # full-width masthead rule -- starts left of the content column, so
+    # _find_content_dividers must ignore it
+    page.draw_line((MARGIN, 70), (PAGE_WIDTH - MARGIN, 70), width=1.5)
+
+    sidebar_x = MARGIN + SIDEBAR_WIDTH
+    top = 90
+    page.draw_line((sidebar_x, top), (sidebar_x, PAGE_HEIGHT - MARGIN), width=0.8)
+    _columns(page, rng, fitz.Rect(MARGIN, top, sidebar_x - 10, PAGE_HEIGHT - MARGIN), 1, fontsize=7)
+
+    content_x0 = sidebar_x + 10
+    content = fitz.Rect(content_x0, top, PAGE_WIDTH - MARGIN, PAGE_HEIGHT - MARGIN)
+    # two articles, then the letters block the extractor drops
+    bounds = [top, top + 560, top + 1100, content.y1]
+    for i, (y0, y1) in enumerate(zip(bounds[:-1], bounds[1:])):
+        if i:
+            page.draw_line((content_x0, y0), (content.x1, y0), width=0.8)
+        headline = "Letters to the Editor" if i == 2 else _filler(rng, 6)
+        page.insert_text((content_x0, y0 + 30), headline, fontsize=22 if i < 2 else 14)
+        _columns(page, rng, fitz.Rect(content_x0, y0 + 45, content.x1, y1 - 10), 3)
+
+
+def hindu_paper(pages=24, editorial_index=None, seed=1):
+    """Text-layer paper; editorial page defaults to two-thirds of the way in."""
+    rng = random.Random(seed)
+    if editorial_index is None:
+        editorial_index = (pages * 2) // 3
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        if i == editorial_index:
+            _hindu_editorial_page(page, rng)
+        else:
+            _section_page(page, rng, SECTIONS[i % len(SECTIONS)])
+    return doc
+
+
+def _express_source_page(rng, index, editorial_index):
+    """Vector page that gets flattened into an IE-style raster page."""
+    src = fitz.open()
+    page = src.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+    if index == editorial_index:
+        page.insert_text((MARGIN, 55), "The Editorial Page", fontsize=34)
+        page.draw_line((MARGIN, 72), (PAGE_WIDTH - MARGIN, 72), width=2)
+        # article blocks separated by whitespace only -- no printed rules
+        # survive the raster, same as the real page
+        blocks = [
+            fitz.Rect(MARGIN, 100, 640, 720),
+            fitz.Rect(MARGIN, 760, 640, 1440),
+            fitz.Rect(680, 100, PAGE_WIDTH - MARGIN, 1440),
+        ]
+        for b in blocks:
+            page.insert_text((b.x0, b.y0 + 26), _filler(rng, 6 if b.width > 400 else 3), fontsize=22)
+            _columns(page, rng, fitz.Rect(b.x0, b.y0 + 40, b.x1, b.y1), 3 if b.width > 400 else 2)
+    else:
+        if index == 0:
+            page.insert_text((MARGIN, 55), "THE INDIAN EXPRESS", fontsize=40)
+            page.insert_text(
+                (MARGIN, 90),
+                "The Editorial Page: SC has nurtured environmental law, now it must enforce it",
+                fontsize=12,
+            )
+        else:
+            page.insert_text((MARGIN, 55), SECTIONS[index % len(SECTIONS)], fontsize=28)
+        _columns(page, rng, fitz.Rect(MARGIN, 110, PAGE_WIDTH - MARGIN, PAGE_HEIGHT - MARGIN), 5)
+    return src
+
+
+def express_paper(pages=24, editorial_index=None, seed=2, scan_dpi=150, jpeg_quality=70):
+    """Raster-only paper: each page is one JPEG, no text layer, no drawings."""
+    rng = random.Random(seed)
+    if editorial_index is None:
+        editorial_index = (pages * 2) // 3
+    doc = fitz.open()
+    for i in range(pages):
+        src = _express_source_page(rng, i, editorial_index)
+        pix = src[0].get_pixmap(dpi=scan_dpi)
+        jpeg = pix.tobytes("jpg", jpg_quality=jpeg_quality)
+        src.close()
+        page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        page.insert_image(page.rect, stream=jpeg)
+    return doc
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic newspaper PDF")
+    parser.add_argument("kind", choices=["hindu", "express"])
+    parser.add_argument("out", help="output PDF path")
+    parser.add_argument("--pages", type=int, default=24)
+    parser.add_argument("--editorial-index", type=int, default=None)
+    args = parser.parse_args()
+
+    build = hindu_paper if args.kind == "hindu" else express_paper
+    doc = build(pages=args.pages, editorial_index=args.editorial_index)
+    doc.save(args.out, garbage=4, deflate=True)
+    doc.close()
+    print(f"wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,16 +2,11 @@
 """Shared helpers for the primary and fallback extraction scripts."""
 
 import os
-import re
 import json
-import glob
-import shutil
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 from zoneinfo import ZoneInfo
 
-import requests
-
 logger = logging.getLogger(__name__)
 
 HISTORY_FILE = "download_history.json"
@@ -19,6 +14,41 @@ ARTIFACTS_DIR = "artifacts"
 DISCORD_WEBHOOK_URL = os.getenv("DISCORD_WEBHOOK_URL", "")
 STALE_ARTIFACT_DAYS = 7
 
+# Days each kind of artifact is kept (retention.py) -- "editorial",
+# "article" (crop images), "vector" (crop PDFs), "thumbnail", "post" (the
+# site's page for a date) and "search" (search.db rows). Anything not
+# listed gets STALE_ARTIFACT_DAYS. RETENTION_TIERS="post=30,article=14"
+# overrides per kind.
+RETENTION_KINDS = ("editorial", "article", "vector", "thumbnail", "post", "search")
+RETENTION_TIERS = {"thumbnail": 365, "vector": 365, "post": 365, "search": 365}
+for _tier in filter(None, os.getenv("RETENTION_TIERS", "").split(",")):
+    _kind, _days = _tier.split("=", 1)
+    RETENTION_TIERS[_kind.strip()] = int(_days)
+
+# How article crops are written (editorial.write_hindu_articles): "png"
+# (200-DPI images, the original behaviour), "pdf" (cropped vector PDFs plus
+# a small PNG preview at ARTICLE_PREVIEW_DPI, 0 = no preview), or "both".
+ARTICLE_FORMAT = os.getenv("ARTICLE_FORMAT", "png").lower()
+ARTICLE_PREVIEW_DPI = int(os.getenv("ARTICLE_PREVIEW_DPI", "60"))
+
+# Web-optimize the single-page editorial PDF (editorial.extract_single_page_pdf):
+# downsample images above PDF_IMAGE_DPI, subset fonts, linearize via qpdf.
+PDF_OPTIMIZE = os.getenv("PDF_OPTIMIZE", "0").lower() in ("1", "true", "yes")
+PDF_IMAGE_DPI = int(os.getenv("PDF_IMAGE_DPI", "150"))
+
+# Low-memory extraction (editorial.py): trim MuPDF's resource store between
+# pages down to LOW_MEMORY_STORE_MB, render large crops in LOW_MEMORY_BAND_PX
+# strips, and encode article crops one at a time -- for 1-2 GB runners, or
+# several papers at once (backfill.py --low-memory).
+LOW_MEMORY = os.getenv("EPAPER_LOW_MEMORY", "0").lower() in ("1", "true", "yes")
+LOW_MEMORY_STORE_MB = int(os.getenv("LOW_MEMORY_STORE_MB", "32"))
+LOW_MEMORY_BAND_PX = int(os.getenv("LOW_MEMORY_BAND_PX", "256"))
+
+# Article text for full-text search (editorial.extract_article_texts ->
+# search_index.py): off the text layer, or a whole-page OCR pass for "ocr"
+# papers. SEARCH_TEXT=0 skips it, and the OCR pass with it.
+SEARCH_TEXT = os.getenv("SEARCH_TEXT", "1").lower() in ("1", "true", "yes")
+
 IST = ZoneInfo("Asia/Kolkata")
 
 
@@ -38,20 +68,40 @@ GITHUB_REPOSITORY = os.getenv("GITHUB_REPOSITORY", "mantavyam/epaper-automation"
 
 
 def raw_url(repo_relative_path):
-    """Build a raw.githubusercontent.com URL for a file committed to main.
+    """Build the public URL for an artifact.
 
     Used to link the Jekyll site to artifacts without duplicating them into
-    the site source -- when the 7-day cleanup deletes the file, this link
-    404s, which is what the site's expiry handling detects.
+    the site source -- when retention cleanup deletes the file, this link
+    404s, which is what the site's expiry handling detects. Stored
+    artifacts are linked by content hash, wherever the configured
+    artifact_store backend keeps them; anything else is a
+    raw.githubusercontent.com URL for the file as committed to main.
     """
+    import artifact_store
+    url = artifact_store.url_for(repo_relative_path)
+    if url:
+        return url
+    repo_relative_path = repo_relative_path.replace(os.sep, "/")
     return f"https://raw.githubusercontent.com/{GITHUB_REPOSITORY}/main/{repo_relative_path}"
 
-# Paper name -> short code used in artifact filenames, e.g. TH-EDITORIAL-14-08-26.pdf
-PAPER_CODES = {
-    "The Hindu": "TH",
-    "Indian Express": "IE",
+# Every paper the pipeline knows, by the short code used in artifact
+# filenames (TH-EDITORIAL-14-08-26.pdf). Order is the order sections appear
+# in a day's post and the order scheduler.py starts papers in -- first is
+# highest priority.
+#   locate:   how editorial.py finds the page -- "text" (clean text layer),
+#             "ocr" (flattened raster pages) or "outline" (PDF bookmarks)
+#   articles: how its articles are cropped -- "rules" (vector rule lines,
+#             editorial.find_hindu_article_rects), "gutters" (whitespace on a
+#             raster page, editorial.find_raster_article_rects) or None
+# Where each paper can be fetched from is sources.py's business.
+PAPERS = {
+    "TH": {"name": "The Hindu", "locate": "text", "articles": "rules"},
+    "IE": {"name": "Indian Express", "locate": "ocr", "articles": "gutters"},
 }
 
+# Paper name -> code
+PAPER_CODES = {paper["name"]: code for code, paper in PAPERS.items()}
+
 
 def dated_filename(paper_name, doc_type, today, ext, part=None):
     """Build a filename like TH-EDITORIAL-14-08-26.pdf or TH-ART1-14-08-26.png.
@@ -93,61 +143,35 @@ def record_history(history, date_key, month_key, paper_name, entry):
     save_history(history)
 
 
+def stream_to_file(response, path, chunk_size=1 << 20):
+    """Write a `stream=True` response's body to `path` a chunk at a time.
+
+    A whole paper is 20-60 MB; reading `response.content` holds all of it
+    in memory for as long as the response object lives, on top of
+    whatever MuPDF then does with the file.
+    """
+    with response, open(path, "wb") as f:
+        for chunk in response.iter_content(chunk_size):
+            f.write(chunk)
+    return path
+
+
 def artifact_dir_for(date_str):
     path = os.path.join(ARTIFACTS_DIR, date_str)
     os.makedirs(path, exist_ok=True)
     return path
 
 
-def cleanup_stale_artifacts(days=STALE_ARTIFACT_DAYS):
-    if not os.path.isdir(ARTIFACTS_DIR):
-        return
-    cutoff = now_ist().date() - timedelta(days=days)
-    for name in os.listdir(ARTIFACTS_DIR):
-        path = os.path.join(ARTIFACTS_DIR, name)
-        if not os.path.isdir(path):
-            continue
-        try:
-            folder_date = datetime.strptime(name, "%Y-%m-%d").date()
-        except ValueError:
-            continue
-        if folder_date < cutoff:
-            shutil.rmtree(path)
-            logger.info("Removed stale artifact folder: %s", path)
+def retention_days(kind):
+    """How long artifacts of `kind` are kept -- see RETENTION_TIERS."""
+    return RETENTION_TIERS.get(kind, STALE_ARTIFACT_DAYS)
 
 
 POSTS_DIR = os.path.join("app", "_posts")
-# Only ever matches our own generated posts (site_publish._post_path),
-# e.g. 2026-08-15-editorials.md -- deliberately not "any dated .md file",
-# so this never touches hand-authored site content that happens to have a
-# date-prefixed filename (Jekyll's own convention for every post).
-_POST_DATE_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})-editorials\.md$")
 
-
-def cleanup_stale_posts(days=STALE_ARTIFACT_DAYS):
-    """Remove site posts whose linked artifacts have aged out.
-
-    Posts are kept on the same 7-day window as artifacts/ -- there's no
-    long-term archive, just a rolling week of history, so a post's links
-    are never left dangling for long enough to need the site's expiry
-    handling in the steady state (that stays as a safety net for the
-    transient gap within a single cleanup cycle).
-    """
-    if not os.path.isdir(POSTS_DIR):
-        return
-    cutoff = now_ist().date() - timedelta(days=days)
-    for path in glob.glob(os.path.join(POSTS_DIR, "*.md")):
-        name = os.path.basename(path)
-        m = _POST_DATE_RE.match(name)
-        if not m:
-            continue
-        try:
-            post_date = datetime.strptime(m.group(1), "%Y-%m-%d").date()
-        except ValueError:
-            continue
-        if post_date < cutoff:
-            os.remove(path)
-            logger.info("Removed stale site post: %s", path)
+# Served with the site at /assets/artifacts.json -- see expiry-check.html
+# and retention.write_manifest()
+ARTIFACT_MANIFEST = os.path.join("app", "assets", "artifacts.json")
 
 
 def post_discord(content, embed_title, embed_color, file_paths, date_str):
@@ -159,6 +183,10 @@ def post_discord(content, embed_title, embed_color, file_paths, date_str):
         logger.warning("Discord webhook URL not configured")
         return False
 
+    # imported here, not at the top: everything else in this module runs
+    # on paths that never touch the network (epaper.py stats, no-op runs)
+    import requests
+
     embed = {
         "title": embed_title,
         "color": embed_color,
@@ -9,28 +9,104 @@ text layer is:
   - "ocr" mode (Indian Express): the PDF page is a flattened raster image
     with a broken/glyph-indexed text layer, so text search is unreliable.
     OCR the top strip of each page and look for "The Editorial Page".
+  - "outline" mode: the PDF carries bookmarks (many publishers' e-paper
+    exports do), one per page or section. Read the page number straight
+    off the "Editorial" entry without rendering or scanning anything;
+    falls back to text mode when the PDF has no outline at all.
 
-Both return None when no page matches -- that means the paper didn't
+All return None when no page matches -- that means the paper didn't
 publish an editorial today (Sunday, holiday), and callers should skip
 posting for that paper rather than guessing.
+
+Article crops come from the page's vector rules where it has them (The
+Hindu, find_hindu_article_rects), or from the whitespace between articles
+on a flattened page (Indian Express, find_raster_article_rects).
 """
 
 import io
+import os
 import re
+import shutil
 import logging
+import subprocess
 
 import fitz  # PyMuPDF
 
+import common
+
 logger = logging.getLogger(__name__)
 
 HINDU_HEADER = "editorial"
 IE_HEADER_RE = re.compile(r"editorial\s*page", re.IGNORECASE)
+OUTLINE_RE = re.compile(r"^\s*(the\s+)?editorial(\s*page)?s?\s*$", re.IGNORECASE)
+THUMBNAIL_WIDTH = 480
+# narrowest whitespace between two articles on a raster page, stacked /
+# side by side -- see find_raster_article_rects
+RASTER_ROW_GUTTER_PT = 16
+RASTER_COLUMN_GUTTER_PT = 28
+
+
+def trim_store():
+    """In low-memory mode, shrink MuPDF's global resource store if it's over its cap.
+
+    The store caches decoded images, fonts and parsed objects across
+    pages and documents, and nothing ever trims it -- walking a 40-page
+    paper of full-page JPEGs leaves every decoded page image cached.
+    Nothing a later page needs is lost by dropping it, only re-decoding
+    if the same page is rendered again. PyMuPDF can't lower the store's
+    maximum after startup, so the cap (common.LOW_MEMORY_STORE_MB) is
+    enforced here instead, between pages; builds that don't report the
+    store's size get it emptied every time.
+    """
+    if not common.LOW_MEMORY:
+        return
+    size = fitz.TOOLS.store_size()
+    if size is None or size > common.LOW_MEMORY_STORE_MB * 1024 * 1024:
+        fitz.TOOLS.store_shrink(100)
+
+
+def render_clip(page, clip, zoom, banded=None):
+    """Render `clip` of `page` at `zoom` as an RGB PIL image.
+
+    Normally one pixmap, copied into the image and dropped. Banded
+    (default: in low-memory mode) it's rendered in horizontal strips of
+    common.LOW_MEMORY_BAND_PX rows pasted into the image, so the peak is
+    the image plus one strip rather than the image plus a whole second
+    copy as a pixmap. Each strip is placed by its own device-space origin,
+    so rounding in the strip rects can't leave seams, and vector pages
+    come out pixel-identical to a single render. Embedded raster images
+    don't quite: MuPDF resamples an image for the area it's asked to
+    draw, so a scanned page differs slightly (not visibly) strip to strip.
+    """
+    from PIL import Image
+
+    matrix = fitz.Matrix(zoom, zoom)
+    if banded is None:
+        banded = common.LOW_MEMORY
+    if not banded:
+        pix = page.get_pixmap(matrix=matrix, clip=clip, alpha=False)
+        img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+        del pix
+        return img
+
+    full = (fitz.Rect(clip) * matrix).irect
+    img = Image.new("RGB", (full.width, full.height), "white")
+    band = common.LOW_MEMORY_BAND_PX
+    for y in range(full.y0, full.y1, band):
+        # a row of overlap either side, in case a strip's rect rounds inward
+        rows = fitz.Rect(full.x0, max(full.y0, y - 1), full.x1, min(full.y1, y + band + 1))
+        pix = page.get_pixmap(matrix=matrix, clip=rows * ~matrix, alpha=False)
+        strip = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+        img.paste(strip, (pix.x - full.x0, pix.y - full.y0))
+        del pix, strip
+    return img
 
 
 def locate_editorial_page_text(doc, header=HINDU_HEADER, top_lines=8):
     """Scan each page's top text lines for an exact masthead match."""
     for i, page in enumerate(doc):
         text = page.get_text()
+        trim_store()
         lines = [l.strip() for l in text.split("\n") if l.strip()]
         for line in lines[:top_lines]:
             if line.lower() == header:
@@ -50,15 +126,16 @@ def locate_editorial_page_ocr(doc, pattern=IE_HEADER_RE, top_frac=0.20, dpi=200,
     so a max-length gate cleanly tells them apart.
     """
     import pytesseract
-    from PIL import Image
 
     for i, page in enumerate(doc):
         rect = page.rect
         clip = fitz.Rect(rect.x0, rect.y0, rect.x1, rect.y0 + rect.height * top_frac)
-        zoom = dpi / 72
-        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=clip)
-        img = Image.open(io.BytesIO(pix.tobytes("png")))
+        # never banded: the strip is small next to the decoded page image
+        # (what trim_store drops), and OCR should see the plain render
+        img = render_clip(page, clip, dpi / 72, banded=False)
         text = pytesseract.image_to_string(img)
+        del img
+        trim_store()
         for line in text.split("\n"):
             line = line.strip()
             if pattern.search(line) and len(line) <= max_line_len:
@@ -66,15 +143,150 @@ def locate_editorial_page_ocr(doc, pattern=IE_HEADER_RE, top_frac=0.20, dpi=200,
     return None
 
 
-def extract_single_page_pdf(doc, page_index, out_path):
-    """Save one page of `doc` as its own compact PDF."""
+def locate_editorial_page_outline(doc, pattern=OUTLINE_RE):
+    """Find the editorial page from the PDF outline (bookmarks).
+
+    An outline without a matching entry means no editorial today, same as
+    the other modes; only a PDF with no outline at all falls back to
+    scanning the text layer.
+    """
+    toc = doc.get_toc(simple=True)
+    if not toc:
+        return locate_editorial_page_text(doc)
+    for _level, title, page_no in toc:
+        # page numbers are 1-based; -1 marks an entry with no target
+        if pattern.search(title) and 1 <= page_no <= doc.page_count:
+            return page_no - 1
+    return None
+
+
+LOCATORS = {
+    "text": locate_editorial_page_text,
+    "ocr": locate_editorial_page_ocr,
+    "outline": locate_editorial_page_outline,
+}
+
+
+def extract_single_page_pdf(doc, page_index, out_path, optimize=None, image_dpi=None):
+    """Save one page of `doc` as its own compact PDF.
+
+    optimize (default common.PDF_OPTIMIZE) additionally web-optimizes the
+    result -- see _optimize_for_web.
+    """
+    if optimize is None:
+        optimize = common.PDF_OPTIMIZE
     single = fitz.open()
     single.insert_pdf(doc, from_page=page_index, to_page=page_index)
-    single.save(out_path, garbage=4, deflate=True)
+    if optimize:
+        _optimize_for_web(single, out_path, image_dpi or common.PDF_IMAGE_DPI)
+    else:
+        single.save(out_path, garbage=4, deflate=True, no_new_id=True)
     single.close()
     return out_path
 
 
+def render_page_thumbnail(doc, page_index, width=THUMBNAIL_WIDTH, quality=70):
+    """Small WebP of a whole page -- the site's default preview.
+
+    Rendered straight to the target width (not rendered large and scaled
+    down), so it's one cheap low-resolution render. Returns WebP bytes, or
+    None if rendering fails: like article crops, the thumbnail is an
+    extra on top of the single-page PDF and never aborts a run.
+    """
+    try:
+        from PIL import Image
+
+        page = doc[page_index]
+        zoom = width / page.rect.width
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+        img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+        buf = io.BytesIO()
+        img.save(buf, "WEBP", quality=quality, method=4)
+        return buf.getvalue()
+    except Exception as e:
+        logger.warning("Thumbnail render failed (%s) -- site falls back to the inline viewer", e)
+        return None
+
+
+def write_page_thumbnail(doc, page_index, paper_name, today, artifact_dir):
+    """render_page_thumbnail into artifact_dir as {CODE}-THUMB-DD-MM-YY.webp; path or None."""
+    data = render_page_thumbnail(doc, page_index)
+    if data is None:
+        return None
+    path = os.path.join(artifact_dir, common.dated_filename(paper_name, "THUMB", today, "webp"))
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def _saved_size(doc):
+    return len(doc.tobytes(garbage=4, deflate=True, no_new_id=True))
+
+
+def _optimize_for_web(single, out_path, image_dpi):
+    """Downsample images, subset fonts, then linearize -- reporting each.
+
+    This file is what the site's inline PDF.js viewer fetches from
+    raw.githubusercontent on first paint, so every byte is on the critical
+    path:
+      - images: Indian Express's page is one full-resolution JPEG. Anything
+        above image_dpi (at its placed size) is resampled down toward it --
+        MuPDF subsamples by whole factors, so in practice an image shrinks
+        once it's at least twice the target.
+      - fonts: The Hindu's pages embed whole fonts; only the glyphs the
+        page uses are kept.
+      - linearization ("fast web view"): first-page objects first plus a
+        hint table, so PDF.js can render from range requests before the
+        whole file arrives. MuPDF dropped linearized output in 1.24, so
+        this goes through qpdf when it's on PATH and is skipped (logged)
+        otherwise -- the other two steps don't depend on it.
+
+    Returns {step: (bytes_before, bytes_after)}; also logged.
+    """
+    report = {}
+
+    before = _saved_size(single)
+    # threshold a little above target so pages already at ~target aren't
+    # recompressed for nothing
+    single.rewrite_images(dpi_threshold=int(image_dpi * 1.1), dpi_target=image_dpi, quality=80)
+    images_done = single.tobytes(garbage=4, deflate=True, no_new_id=True)
+    report["images"] = (before, len(images_done))
+
+    single.subset_fonts()
+    subset = single.tobytes(garbage=4, deflate=True, no_new_id=True)
+    report["fonts"] = (len(images_done), len(subset))
+
+    # subsetting a font that's already subset (or glyph-indexed, like
+    # IE's) can come out a few bytes larger -- keep whichever is smaller
+    with open(out_path, "wb") as f:
+        f.write(min(images_done, subset, key=len))
+    saved = os.path.getsize(out_path)
+
+    qpdf = shutil.which("qpdf")
+    if qpdf:
+        tmp_path = out_path + ".lin"
+        result = subprocess.run(
+            # --deterministic-id: same input, same bytes -- the artifact
+            # store dedupes by content hash
+            [qpdf, "--linearize", "--object-streams=generate", "--deterministic-id", out_path, tmp_path],
+            capture_output=True, text=True,
+        )
+        # qpdf exits 3 for "succeeded with warnings"
+        if result.returncode in (0, 3):
+            os.replace(tmp_path, out_path)
+            report["linearize"] = (saved, os.path.getsize(out_path))
+        else:
+            logger.warning("qpdf --linearize failed (%s), keeping unlinearized PDF", result.stderr.strip())
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    else:
+        logger.warning("qpdf not on PATH -- skipping linearization")
+
+    for step, (b, a) in report.items():
+        logger.info("PDF optimize %s: %d -> %d bytes (%+.1f%%)", step, b, a, (a - b) * 100 / max(b, 1))
+    return report
+
+
 def _find_sidebar_boundary(page, drawings):
     """Full-height vertical rule marking off the short-pieces sidebar column.
 
@@ -111,8 +323,8 @@ def _find_content_dividers(page, drawings, content_x0, min_width_frac=0.5):
     return lines
 
 
-def extract_hindu_articles(doc, page_index, dpi=200):
-    """Crop the two main editorial articles as high-res PNG bytes.
+def find_hindu_article_rects(doc, page_index):
+    """Rule-bounded regions of the two main editorial articles.
 
     Uses vector rule geometry (the PDF's own drawn lines), not pixel
     heuristics: a full-height vertical rule marks off the sidebar column
@@ -121,12 +333,10 @@ def extract_hindu_articles(doc, page_index, dpi=200):
     articles on this page, followed by a Letters-to-the-Editor block that
     is dropped unconditionally.
 
-    Returns a list of PNG bytes -- always empty, never raises, if the page
-    doesn't carry usable vector rule geometry (a raster/flattened page like
-    Indian Express's, or any PDF that just doesn't match this rule layout).
-    Article images are a nice-to-have on top of the single-page PDF, which
-    is the deliverable that must always go through regardless -- so any
-    failure here degrades silently rather than aborting the caller's run.
+    Returns a list of fitz.Rect in page coordinates -- always empty, never
+    raises, if the page doesn't carry usable vector rule geometry (a
+    raster/flattened page like Indian Express's, or any PDF that just
+    doesn't match this rule layout).
     """
     try:
         page = doc[page_index]
@@ -153,14 +363,450 @@ def extract_hindu_articles(doc, page_index, dpi=200):
         top_y = min((r.y0 for r in tall), default=page.rect.y0 + page.rect.height * 0.05)
 
         bounds = [top_y] + [d.y0 for d in dividers[:2]]
+        return [
+            fitz.Rect(content_x0, y0, page.rect.width, y1)
+            for y0, y1 in zip(bounds[:-1], bounds[1:])
+        ]
+    except Exception as e:
+        logger.warning("Article location failed unexpectedly (%s) -- skipping, single-page PDF unaffected", e)
+        return []
+
+
+def extract_hindu_articles(doc, page_index, dpi=200):
+    """Crop the two main editorial articles as high-res PNG bytes.
+
+    Regions come from find_hindu_article_rects (see there for the rule
+    geometry). Returns a list of PNG bytes -- always empty, never raises,
+    if the page doesn't support cropping. Article images are a
+    nice-to-have on top of the single-page PDF, which is the deliverable
+    that must always go through regardless -- so any failure here
+    degrades silently rather than aborting the caller's run.
+    """
+    try:
+        page = doc[page_index]
         zoom = dpi / 72
         images = []
-        for y0, y1 in zip(bounds[:-1], bounds[1:]):
-            clip = fitz.Rect(content_x0, y0, page.rect.width, y1)
+        for clip in find_hindu_article_rects(doc, page_index):
             pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=clip)
             images.append(pix.tobytes("png"))
-
         return images
     except Exception as e:
         logger.warning("Article extraction failed unexpectedly (%s) -- skipping, single-page PDF unaffected", e)
         return []
+
+
+def _crop_page_pdf(doc, page_index, clip):
+    """One page of `doc` cut down to `clip`, as compact vector PDF bytes.
+
+    Not just a cropbox over the whole page: everything outside the clip is
+    redacted away first (text, line art, image pixels), so the fonts and
+    images only the rest of the page used become unreferenced, and
+    garbage collection plus font subsetting actually drop them. A plain
+    cropbox (or show_pdf_page with a clip) would carry the entire page's
+    content and resources along, invisible -- about the size of the whole
+    single-page PDF per article.
+    """
+    out = fitz.open()
+    out.insert_pdf(doc, from_page=page_index, to_page=page_index)
+    page = out[0]
+    r = page.rect
+    outside = [
+        fitz.Rect(r.x0, r.y0, r.x1, clip.y0),
+        fitz.Rect(r.x0, clip.y1, r.x1, r.y1),
+        fitz.Rect(r.x0, clip.y0, clip.x0, clip.y1),
+        fitz.Rect(clip.x1, clip.y0, r.x1, clip.y1),
+    ]
+    for area in outside:
+        if not area.is_empty:
+            page.add_redact_annot(area)
+    page.apply_redactions(
+        images=fitz.PDF_REDACT_IMAGE_PIXELS,
+        graphics=fitz.PDF_REDACT_LINE_ART_REMOVE_IF_COVERED,
+    )
+    page.set_cropbox(clip)
+    out.subset_fonts()
+    data = out.tobytes(garbage=4, deflate=True, clean=True, no_new_id=True)
+    out.close()
+    return data
+
+
+def extract_hindu_article_pdfs(doc, page_index):
+    """Crop the two main editorial articles as small vector PDF bytes.
+
+    Same regions and same never-raises contract as extract_hindu_articles,
+    but the text stays text: crisp at any zoom, and typically a tenth the
+    size of the 200-DPI PNG of the same article.
+    """
+    try:
+        return [
+            _crop_page_pdf(doc, page_index, clip)
+            for clip in find_hindu_article_rects(doc, page_index)
+        ]
+    except Exception as e:
+        logger.warning("Vector article extraction failed unexpectedly (%s) -- skipping", e)
+        return []
+
+
+class RasterPage:
+    """One render of a raster page, shared by everything that needs its pixels.
+
+    A flattened page (Indian Express) is located by OCR of its top strip,
+    but segmenting it into articles, cropping them and OCR-ing their text
+    all work on the whole page at the same resolution -- so it's rendered
+    once, here, and each of those reads from this.
+    """
+
+    def __init__(self, page, dpi=200):
+        self.page_rect = page.rect
+        self.dpi = dpi
+        self.zoom = dpi / 72
+        self.image = render_clip(page, page.rect, self.zoom)
+        trim_store()
+        self._rects = None
+
+    @property
+    def article_rects(self):
+        """find_raster_article_rects over this render, computed once."""
+        if self._rects is None:
+            self._rects = find_raster_article_rects(self)
+        return self._rects
+
+    def crop(self, rect):
+        """`rect` (page coordinates) cut out of the render, as a PIL image."""
+        box = (fitz.Rect(rect) * fitz.Matrix(self.zoom, self.zoom)).irect
+        return self.image.crop((box.x0, box.y0, box.x1, box.y1))
+
+
+def _gutters(profile, min_gap, noise, max_rule):
+    """(start, end) runs of near-blank entries in `profile`, at least
+    `min_gap` long and strictly inside it.
+
+    A thin band of ink between two blank runs (a printed rule sitting in
+    the gutter, at most `max_rule` long) is folded into one gutter rather
+    than splitting it in two.
+    """
+    import numpy as np
+
+    blank = np.concatenate(([False], profile <= noise, [False]))
+    edges = np.flatnonzero(blank[1:] != blank[:-1])
+    runs = [[int(s), int(e)] for s, e in zip(edges[::2], edges[1::2])]
+    merged = []
+    for run in runs:
+        if merged and run[0] - merged[-1][1] <= max_rule:
+            merged[-1][1] = run[1]
+        else:
+            merged.append(run)
+    return [(s, e) for s, e in merged if e - s >= min_gap and s > 0 and e < len(profile)]
+
+
+def _xy_cut(ink, box, gaps, min_side, leaves):
+    """Recursive XY-cut of the boolean `ink` grid.
+
+    Splits `box` (y0, y1, x0, x1) at its widest whitespace gutter, either
+    axis, and recurses into both sides until nothing splits; the leaves
+    are appended in reading order. Per axis (rows, columns), `gaps` is
+    (narrowest gutter, longest rule folded into one) and `min_side` how
+    much the region must keep either side of a cut.
+    """
+    y0, y1, x0, x1 = box
+    region = ink[y0:y1, x0:x1]
+    rows, cols = region.sum(axis=1), region.sum(axis=0)
+    # trim to the ink, ignoring specks: a row or column is blank when
+    # under 1% of it is inked
+    row_noise, col_noise = max(1, (x1 - x0) // 100), max(1, (y1 - y0) // 100)
+    inked_rows, inked_cols = (rows > row_noise).nonzero()[0], (cols > col_noise).nonzero()[0]
+    if not inked_rows.size or not inked_cols.size:
+        return
+    y0, y1 = y0 + int(inked_rows[0]), y0 + int(inked_rows[-1]) + 1
+    x0, x1 = x0 + int(inked_cols[0]), x0 + int(inked_cols[-1]) + 1
+    rows, cols = rows[inked_rows[0]:inked_rows[-1] + 1], cols[inked_cols[0]:inked_cols[-1] + 1]
+
+    best = None
+    for axis, profile, noise in ((0, rows, row_noise), (1, cols, col_noise)):
+        min_gap, max_rule = gaps[axis]
+        for s, e in _gutters(profile, min_gap, noise, max_rule):
+            if s < min_side[axis] or len(profile) - e < min_side[axis]:
+                continue
+            if best is None or e - s > best[2] - best[1]:
+                best = (axis, s, e)
+    if best is None:
+        leaves.append((y0, y1, x0, x1))
+        return
+    axis, s, e = best
+    if axis == 0:
+        _xy_cut(ink, (y0, y0 + s, x0, x1), gaps, min_side, leaves)
+        _xy_cut(ink, (y0 + e, y1, x0, x1), gaps, min_side, leaves)
+    else:
+        _xy_cut(ink, (y0, y1, x0, x0 + s), gaps, min_side, leaves)
+        _xy_cut(ink, (y0, y1, x0 + e, x1), gaps, min_side, leaves)
+
+
+def find_raster_article_rects(raster, row_gutter_pt=RASTER_ROW_GUTTER_PT, column_gutter_pt=RASTER_COLUMN_GUTTER_PT,
+                              min_column_pt=120, coarse_dpi=50, ink_level=140, max_rule_pt=3,
+                              min_area=0.04, masthead_frac=0.10, pad_pt=4):
+    """Article regions of a flattened page, found by the whitespace between them.
+
+    The page has no vector rules and its printed ones don't survive the
+    raster reliably, but articles are still set apart by whitespace. So:
+    threshold the render to ink/no-ink, shrink it to `coarse_dpi` (a cell
+    is inked if any pixel in it is), and XY-cut that on row/column
+    projection profiles. The two directions get different gutters:
+    stacked articles sit closer than an article's headline does to its
+    body, but side-by-side ones are set wider apart than an article's own
+    columns, so columns need `column_gutter_pt` and a cut can't leave a
+    strip narrower than `min_column_pt` (a photo cut-out or pull quote
+    between columns). Each leaf is then refined at full resolution -- its
+    exact ink bounds inside the coarse box, plus `pad_pt` -- and kept if
+    it covers at least `min_area` of the page and isn't the masthead band
+    (ending in the top `masthead_frac`).
+
+    `raster` is a RasterPage. Returns fitz.Rects in page coordinates, in
+    reading order -- empty, never raising, when nothing qualifies.
+    """
+    import numpy as np
+
+    try:
+        gray = np.asarray(raster.image.convert("L"))
+        ink = gray < ink_level
+        factor = max(1, round(raster.dpi / coarse_dpi))
+        h, w = ink.shape[0] // factor * factor, ink.shape[1] // factor * factor
+        # rows first: that reduction runs over whole contiguous rows, and
+        # leaves the column one a quarter of the work (one pass over both
+        # axes at once is several times slower)
+        coarse = ink[:h, :w].reshape(h // factor, factor, w).any(axis=1)
+        coarse = coarse.reshape(h // factor, w // factor, factor).any(axis=2)
+
+        def cells(pt):
+            return max(1, round(pt * raster.zoom / factor))
+
+        leaves = []
+        _xy_cut(
+            coarse, (0, coarse.shape[0], 0, coarse.shape[1]),
+            gaps=((cells(row_gutter_pt), cells(max_rule_pt)), (cells(column_gutter_pt), cells(max_rule_pt))),
+            min_side=(1, cells(min_column_pt)), leaves=leaves,
+        )
+
+        page_h, page_w = ink.shape
+        pad = round(pad_pt * raster.zoom)
+        boxes = []
+        for y0, y1, x0, x1 in leaves:
+            # refine: the leaf's coarse box, one cell wider all round, at
+            # full resolution
+            fy0, fy1 = max(0, (y0 - 1) * factor), min(page_h, (y1 + 1) * factor)
+            fx0, fx1 = max(0, (x0 - 1) * factor), min(page_w, (x1 + 1) * factor)
+            region = ink[fy0:fy1, fx0:fx1]
+            ys, xs = region.any(axis=1).nonzero()[0], region.any(axis=0).nonzero()[0]
+            if ys.size:
+                boxes.append(fitz.Rect(
+                    max(0, fx0 + xs[0] - pad), max(0, fy0 + ys[0] - pad),
+                    min(page_w, fx0 + xs[-1] + 1 + pad), min(page_h, fy0 + ys[-1] + 1 + pad),
+                ))
+
+        def small(box):
+            return box.width * box.height < min_area * page_w * page_h
+
+        # a multi-column article's headline is set further above its body
+        # than stacked articles are apart, so it comes out as a leaf of its
+        # own, just before the body in reading order: fold a leaf too small
+        # to keep into the next one when it sits right above it and spans
+        # at least half its width
+        headline_gap = column_gutter_pt * raster.zoom
+        rects = []
+        for i, box in enumerate(boxes):
+            if small(box):
+                continue
+            if i and small(boxes[i - 1]):
+                above = boxes[i - 1]
+                if (0 <= box.y0 - above.y1 <= headline_gap and above.x0 >= box.x0 - pad
+                        and above.x1 <= box.x1 + pad and above.width >= box.width / 2):
+                    box = box | above
+            if box.y1 <= masthead_frac * page_h:
+                continue
+            rects.append(box * fitz.Matrix(1 / raster.zoom, 1 / raster.zoom))
+        return rects
+    except Exception as e:
+        logger.warning("Raster article segmentation failed unexpectedly (%s) -- skipping", e)
+        return []
+
+
+def write_raster_articles(raster, paper_name, today, artifact_dir):
+    """Write a raster page's article crops into `artifact_dir`.
+
+    Regions from find_raster_article_rects, cut out of the shared render
+    rather than re-rendered. Images only, whatever ARTICLE_FORMAT says: a
+    "vector" crop of a flattened page would just be the same pixels in a
+    PDF. Returns {"png": [...], "webp": [...], "pdf": []}, same
+    never-raises contract as write_hindu_articles.
+    """
+    import imageopt
+
+    blobs = {"png": [], "webp": [], "pdf": []}
+    try:
+        crops = [raster.crop(rect) for rect in raster.article_rects]
+        if imageopt.IMAGE_OPTIMIZE and crops:
+            variants = imageopt.encode_many(
+                crops, labels=[f"{paper_name} article {i}" for i in range(1, len(crops) + 1)]
+            )
+            blobs["png"] = [v["png"] for v in variants]
+            blobs["webp"] = [v["webp"] for v in variants]
+        else:
+            for img in crops:
+                buf = io.BytesIO()
+                img.save(buf, "PNG")
+                blobs["png"].append(buf.getvalue())
+        del crops
+    except Exception as e:
+        logger.warning("Raster article crops failed unexpectedly (%s) -- skipping, single-page PDF unaffected", e)
+        blobs = {"png": [], "webp": [], "pdf": []}
+    return _write_article_blobs(blobs, paper_name, today, artifact_dir)
+
+
+def _clip_text(page, clip):
+    """(headline, body text) of `clip` off the text layer.
+
+    The headline is the run of lines set in the largest font in the clip
+    -- on the editorial page that's always the article's own head.
+    """
+    lines = []
+    for block in page.get_text("dict", clip=clip)["blocks"]:
+        for line in block.get("lines", []):
+            text = "".join(span["text"] for span in line["spans"]).strip()
+            if text:
+                lines.append((max(span["size"] for span in line["spans"]), text))
+    if not lines:
+        return "", ""
+    top = max(size for size, _ in lines)
+    headline = " ".join(text for size, text in lines if size >= top - 0.5)
+    return headline, page.get_text("text", clip=clip, sort=True).strip()
+
+
+def extract_article_texts(doc, page_index, mode="text", articles=None, raster=None, dpi=200):
+    """Each article's text on the editorial page, for search_index.py.
+
+    `articles` is the paper's crop method (common.PAPERS): with "rules" or
+    "gutters", one entry per article, clipped to the same rects the crops
+    use. Otherwise, or if no articles are found, the whole page is one
+    entry (article 0). Text comes off the text layer, or in "ocr" mode --
+    where the text layer is glyph-indexed garbage -- is OCR'd from
+    `raster` (a RasterPage of the page, rendered here if not given), the
+    first OCR'd line of an article standing in as its headline.
+
+    Returns [{"article": n, "title": str, "text": str}] -- empty, never
+    raising, if there's no text to be had. Like the article crops, text
+    is a bonus on top of the single-page PDF.
+    """
+    try:
+        page = doc[page_index]
+        if raster is None and (mode == "ocr" or articles == "gutters"):
+            raster = RasterPage(page, dpi)
+
+        rects = []
+        if articles == "rules":
+            rects = find_hindu_article_rects(doc, page_index)
+        elif articles == "gutters":
+            rects = raster.article_rects
+        clips = list(enumerate(rects, 1)) if rects else [(0, page.rect)]
+
+        found = []
+        for n, clip in clips:
+            if mode == "ocr":
+                import pytesseract
+
+                text = pytesseract.image_to_string(raster.crop(clip)).strip()
+                title = text.split("\n", 1)[0] if n else ""
+            else:
+                title, text = _clip_text(page, clip)
+            if text:
+                found.append({"article": n, "title": title, "text": text})
+        return found
+    except Exception as e:
+        logger.warning("Article text extraction failed unexpectedly (%s) -- skipping", e)
+        return []
+
+
+def write_hindu_articles(doc, page_index, paper_name, today, artifact_dir,
+                         article_format=None, preview_dpi=None, dpi=200):
+    """Write this page's article crops into `artifact_dir` per ARTICLE_FORMAT.
+
+    article_format (default common.ARTICLE_FORMAT):
+      "png"  -- 200-DPI image per article (ART1.png, ART2.png)
+      "pdf"  -- vector PDF per article (ART1.pdf, ...), plus a low-DPI image
+                preview of each (preview_dpi, default
+                common.ARTICLE_PREVIEW_DPI; 0 skips previews)
+      "both" -- full images and vector PDFs
+
+    Images go through imageopt's size-budgeted encoder (palette PNG plus a
+    WebP variant of each) unless IMAGE_OPTIMIZE is off, in which case
+    they're the raw PNG render as before and there's no WebP.
+
+    Returns {"png": [...], "webp": [...], "pdf": [...]} of written paths,
+    each list possibly empty -- same never-raises contract as
+    extract_hindu_articles.
+    """
+    # local import: imageopt pulls in PIL, which nothing else on the
+    # text-locate path needs
+    import imageopt
+
+    article_format = article_format or common.ARTICLE_FORMAT
+    if preview_dpi is None:
+        preview_dpi = common.ARTICLE_PREVIEW_DPI
+    render_dpi = dpi if article_format in ("png", "both") else preview_dpi
+
+    blobs = {"png": [], "webp": [], "pdf": []}
+    try:
+        rects = find_hindu_article_rects(doc, page_index)
+        page = doc[page_index]
+        if render_dpi and rects and common.LOW_MEMORY:
+            # one crop at a time, each dropped as soon as it's encoded --
+            # slower than encoding them all together, but only ever one
+            # 200-DPI render in memory
+            zoom = render_dpi / 72
+            for i, clip in enumerate(rects, start=1):
+                if imageopt.IMAGE_OPTIMIZE:
+                    img = render_clip(page, clip, zoom)
+                    variants = imageopt.encode_variants(img, label=f"{paper_name} article {i}")
+                    blobs["png"].append(variants["png"])
+                    blobs["webp"].append(variants["webp"])
+                    del img, variants
+                else:
+                    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=clip)
+                    blobs["png"].append(pix.tobytes("png"))
+                    del pix
+                trim_store()
+        elif render_dpi and rects:
+            zoom = render_dpi / 72
+            # rendering stays on this thread -- MuPDF isn't thread-safe;
+            # only the encoding fans out
+            pixes = [page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=clip) for clip in rects]
+            if imageopt.IMAGE_OPTIMIZE:
+                variants = imageopt.encode_many(
+                    [imageopt.pixmap_to_image(pix) for pix in pixes],
+                    labels=[f"{paper_name} article {i}" for i in range(1, len(pixes) + 1)],
+                )
+                blobs["png"] = [v["png"] for v in variants]
+                blobs["webp"] = [v["webp"] for v in variants]
+            else:
+                blobs["png"] = [pix.tobytes("png") for pix in pixes]
+            del pixes
+        if article_format in ("pdf", "both"):
+            blobs["pdf"] = [_crop_page_pdf(doc, page_index, clip) for clip in rects]
+    except Exception as e:
+        logger.warning("Article crops failed unexpectedly (%s) -- skipping, single-page PDF unaffected", e)
+        blobs = {"png": [], "webp": [], "pdf": []}
+
+    return _write_article_blobs(blobs, paper_name, today, artifact_dir)
+
+
+def _write_article_blobs(blobs, paper_name, today, artifact_dir):
+    """{"png": [bytes], ...} -> ART1, ART2, ... files; the same shape of paths."""
+    paths = {}
+    for ext, items in blobs.items():
+        paths[ext] = []
+        for i, data in enumerate(items, start=1):
+            p = os.path.join(
+                artifact_dir, common.dated_filename(paper_name, "ART", today, ext, part=i)
+            )
+            with open(p, "wb") as f:
+                f.write(data)
+            paths[ext].append(p)
+    return paths
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Single entry point for every run:
+
+    python epaper.py primary [--profile]       # scraper.py: preppyq.in
+    python epaper.py fallback [--profile]      # fallback_scraper.py: indiags.com
+    python epaper.py run [--papers TH IE]      # scheduler.py: every paper, every source, concurrently
+    python epaper.py backfill --from 2026-10-12 --to 2026-10-18 [...]
+    python epaper.py search query "..."        # search_index.py: full-text search
+    python epaper.py worker [--workers 2]      # worker.py: warm extraction service
+    python epaper.py retention cleanup         # retention.py: expire artifacts by tier
+    python epaper.py stats [--days 7]          # recent history + artifact store
+
+Each subcommand imports only what it runs. This module itself loads
+nothing beyond common.py, and the scrapers defer requests, bs4, fitz,
+PIL and pytesseract until they know there's work to do -- so `stats`, and
+a primary/fallback run that finds today already processed, finish in
+tens of milliseconds instead of paying ~0.5s of imports.
+benchmarks/startup.py holds that line.
+
+The scripts still run directly (python scraper.py, ...) too.
+"""
+
+import os
+import sys
+import argparse
+
+import common
+
+
+def cmd_primary(args):
+    import scraper
+    scraper.main()
+
+
+def cmd_fallback(args):
+    import fallback_scraper
+    fallback_scraper.main()
+
+
+def cmd_run(args):
+    import scheduler
+    scheduler.main(args.extra)
+
+
+def cmd_backfill(args):
+    import backfill
+    backfill.main(args.extra)
+
+
+def cmd_search(args):
+    import search_index
+    search_index.main(args.extra)
+
+
+def cmd_worker(args):
+    import worker
+    worker.main(args.extra)
+
+
+def cmd_retention(args):
+    import retention
+    retention.main(args.extra)
+
+
+def _artifact_totals():
+    """(live date folders, objects, object bytes) from the refs.json files."""
+    import artifact_store
+
+    dates, objects = 0, {}
+    if os.path.isdir(common.ARTIFACTS_DIR):
+        for name in sorted(os.listdir(common.ARTIFACTS_DIR)):
+            folder = os.path.join(common.ARTIFACTS_DIR, name)
+            refs = artifact_store.load_refs(folder) if os.path.isdir(folder) else {}
+            if refs:
+                dates += 1
+            for ref in refs.values():
+                objects[ref["sha256"]] = ref.get("bytes", 0)
+    return dates, len(objects), sum(objects.values())
+
+
+def cmd_stats(args):
+    history = common.load_history()
+    days = sorted(
+        ((date_key, papers) for month in history.values() for date_key, papers in month.items()),
+        reverse=True,
+    )[:args.days]
+
+    print(f"History, last {len(days)} day(s):")
+    for date_key, papers in days:
+        for paper, entry in sorted(papers.items()):
+            source = entry.get("source") or entry.get("extracted_from") or ""
+            page = entry.get("editorial_page_index")
+            detail = ", ".join(filter(None, [source, f"page {page + 1}" if page is not None else ""]))
+            print(f"  {date_key}  {paper:<15} {entry.get('status', '?'):<22} {detail}")
+
+    dates, objects, size = _artifact_totals()
+    print(f"\nArtifacts: {dates} date folder(s), {objects} object(s), {size / (1024 * 1024):.1f} MB "
+          f"(backend: {os.getenv('ARTIFACT_BACKEND', 'git') or 'git'})")
+    print("Retention: " + ", ".join(
+        f"{kind} {common.retention_days(kind)}d"
+        for kind in common.RETENTION_KINDS
+    ))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="E-paper editorial extraction")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    for name, func, help_text in (
+        ("primary", cmd_primary, "today's Hindu from preppyq.in (scraper.py)"),
+        ("fallback", cmd_fallback, "today's papers from indiags.com (fallback_scraper.py)"),
+    ):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("--profile", action="store_true", help="capture a profile into profiles/ (profiling.py)")
+        p.set_defaults(func=func)
+
+    # everything after "run"/"backfill"/"search"/"worker"/"retention" is that module's own command line
+    p = sub.add_parser("run", help="all papers concurrently, with source failover (scheduler.py; see its --help)",
+                       add_help=False)
+    p.set_defaults(func=cmd_run, passthrough=True)
+
+    p = sub.add_parser("backfill", help="reprocess past days or local PDFs (backfill.py; see its --help)",
+                       add_help=False)
+    p.set_defaults(func=cmd_backfill, passthrough=True)
+
+    p = sub.add_parser("search", help="full-text search over editorials (search_index.py; see its --help)",
+                       add_help=False)
+    p.set_defaults(func=cmd_search, passthrough=True)
+
+    p = sub.add_parser("worker", help="warm extraction service with a local job API (worker.py; see its --help)",
+                       add_help=False)
+    p.set_defaults(func=cmd_worker, passthrough=True)
+
+    p = sub.add_parser("retention", help="expire artifacts and posts by tier (retention.py; see its --help)",
+                       add_help=False)
+    p.set_defaults(func=cmd_retention, passthrough=True)
+
+    p = sub.add_parser("stats", help="recent history and artifact store totals")
+    p.add_argument("--days", type=int, default=7, help="days of history to show (default %(default)s)")
+    p.set_defaults(func=cmd_stats)
+
+    args, extra = parser.parse_known_args(argv)
+    args.extra = extra
+    if extra and not getattr(args, "passthrough", False):
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,10 +9,10 @@ extracts just the Editorial page and posts it to Discord.
 
 The Hindu's indiags PDF carries the same vector rule geometry as the
 primary source, so its two main articles are cropped the same way. Indian
-Express is single-page-PDF-only: its indiags PDF is a flattened raster
-page with no vector drawings and no reliably-detectable printed rule
-lines at any pixel threshold tested, so rule-based article cropping isn't
-viable there.
+Express's indiags PDF is a flattened raster page with no vector drawings
+and no reliably-detectable printed rule lines at any pixel threshold
+tested, so its articles are cut along the whitespace between them
+instead (editorial.find_raster_article_rects).
 
 Every step is a plain HTTP GET + HTML parse -- no browser automation.
 The "quiz"/15s-timer/popups on this site are pure client-side UI theater:
@@ -26,24 +26,20 @@ import re
 import logging
 import urllib.parse
 
-
-import requests
-import fitz  # PyMuPDF
-from bs4 import BeautifulSoup
-
 import common
-import editorial
-import site_publish
+import profiling
+
+# requests/bs4 and the extraction modules (fitz, PIL, pytesseract) are
+# imported where they're used -- see scraper.py
 
 BASE_URL = "https://www.indiags.com/epaper-pdf-download"
 HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
 
-# paper title on site -> (display name, editorial locate mode)
+# paper title on site -> code in common.PAPERS
 PAPERS = {
-    "The Hindu": ("The Hindu", "text"),
-    "Indian Express": ("Indian Express", "ocr"),
+    "The Hindu": "TH",
+    "Indian Express": "IE",
 }
-PAPER_CODES = {"The Hindu": "TH", "Indian Express": "IE"}
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
@@ -51,6 +47,8 @@ logger = logging.getLogger(__name__)
 
 def resolve_token_url(session, book_id):
     """Walk the 4-hop chain for one book id, return the one-time PDF url."""
+    from bs4 import BeautifulSoup
+
     r1 = session.get(f"{BASE_URL.rsplit('/', 1)[0]}/epaper/books/{book_id}", timeout=30)
     r1.raise_for_status()
     soup1 = BeautifulSoup(r1.text, "html.parser")
@@ -81,6 +79,8 @@ def resolve_token_url(session, book_id):
 
 def find_book_ids(session):
     """Map paper title -> book id from the homepage cards."""
+    from bs4 import BeautifulSoup
+
     r = session.get(BASE_URL, timeout=30)
     r.raise_for_status()
     soup = BeautifulSoup(r.text, "html.parser")
@@ -98,7 +98,9 @@ def find_book_ids(session):
     return ids
 
 
-def process_paper(session, site_title, display_name, mode, book_id, history, today):
+def process_paper(session, code, book_id, history, today):
+    paper = common.PAPERS[code]
+    display_name = paper["name"]
     date_key = today.strftime("%Y-%m-%d")
     month_key = today.strftime("%m-%Y")
 
@@ -106,56 +108,48 @@ def process_paper(session, site_title, display_name, mode, book_id, history, tod
         logger.info("%s already processed today", display_name)
         return True
 
+    import imageopt
+    import pipeline
+    import site_publish
+    import worker
+
     token_url = resolve_token_url(session, book_id)
     logger.info("Downloading %s via %s", display_name, token_url)
-    r = session.get(token_url, timeout=60)
+    r = session.get(token_url, timeout=60, stream=True)
     r.raise_for_status()
     if "pdf" not in r.headers.get("Content-Type", ""):
+        r.close()
         raise RuntimeError(f"Token url did not return a PDF for {display_name}")
 
     artifact_dir = common.artifact_dir_for(date_key)
     raw_pdf_path = os.path.join(
         artifact_dir, common.dated_filename(display_name, "FULL", today, "pdf")
     )
-    with open(raw_pdf_path, "wb") as f:
-        f.write(r.content)
+    common.stream_to_file(r, raw_pdf_path)
 
-    doc = fitz.open(raw_pdf_path)
-    if mode == "text":
-        page_idx = editorial.locate_editorial_page_text(doc)
-    else:
-        page_idx = editorial.locate_editorial_page_ocr(doc)
+    # by the warm worker (worker.py) if one's running
+    result = worker.extract(code, raw_pdf_path, today)
+    os.remove(raw_pdf_path)
 
-    if page_idx is None:
+    if result is None:
         logger.info("%s: no editorial page found today, skipping", display_name)
-        os.remove(raw_pdf_path)
         common.record_history(
             history, date_key, month_key, display_name,
             {"status": "skipped_not_published", "timestamp": common.now_ist().isoformat()},
         )
-        doc.close()
         return True
 
-    single_pdf_path = os.path.join(
-        artifact_dir, common.dated_filename(display_name, "EDITORIAL", today, "pdf")
-    )
-    editorial.extract_single_page_pdf(doc, page_idx, single_pdf_path)
-
-    article_paths = []
-    if PAPER_CODES[display_name] == "TH":
-        for i, png_bytes in enumerate(editorial.extract_hindu_articles(doc, page_idx), start=1):
-            p = os.path.join(
-                artifact_dir, common.dated_filename(display_name, "ART", today, "png", part=i)
-            )
-            with open(p, "wb") as f:
-                f.write(png_bytes)
-            article_paths.append(p)
-
-    doc.close()
-    os.remove(raw_pdf_path)
+    page_idx = result["page_index"]
+    single_pdf_path = result["editorial_pdf"]
+    thumbnail_path = result["thumbnail"]
+    articles = result["articles"]
+    pipeline.store(result)
 
     date_str = today.strftime("%d %B %Y")
-    files = [(os.path.basename(p), p) for p in article_paths]
+    # smallest encoding of each article image (inline previews), plus any
+    # vector crops
+    attachments = imageopt.smallest_variants(articles["png"], articles["webp"]) + articles["pdf"]
+    files = [(os.path.basename(p), p) for p in attachments]
     files.append((os.path.basename(single_pdf_path), single_pdf_path))
     posted = common.post_discord(
         content=f"**{display_name} Editorial** -- {date_str} (via fallback source)",
@@ -166,9 +160,12 @@ def process_paper(session, site_title, display_name, mode, book_id, history, tod
     )
 
     site_publish.publish_post(
-        display_name, PAPER_CODES[display_name], today,
+        display_name, code, today,
         editorial_pdf_path=single_pdf_path,
-        article_image_paths=article_paths or None,
+        thumbnail_path=thumbnail_path,
+        article_image_paths=articles["png"] or None,
+        article_pdf_paths=articles["pdf"] or None,
+        article_webp_paths=articles["webp"] or None,
     )
 
     common.record_history(
@@ -185,9 +182,24 @@ def process_paper(session, site_title, display_name, mode, book_id, history, tod
 
 
 def main():
+    with profiling.maybe_profile("fallback"):
+        run()
+
+
+def run():
     logger.info("=== Fallback Editorial Extraction Started ===")
     today = common.now_ist()
     history = common.load_history()
+    date_key, month_key = today.strftime("%Y-%m-%d"), today.strftime("%m-%Y")
+    if all(common.already_processed(history, date_key, month_key, common.PAPERS[code]["name"])
+           for code in PAPERS.values()):
+        logger.info("=== Fallback: every paper already processed today, nothing to do ===")
+        return
+
+    import requests
+    import retention
+    import search_index
+
     session = requests.Session()
     session.headers.update(HEADERS)
 
@@ -197,21 +209,21 @@ def main():
         sys.exit(1)
 
     overall_ok = True
-    for site_title, (display_name, mode) in PAPERS.items():
+    for site_title, code in PAPERS.items():
         book_id = book_ids.get(site_title)
         if not book_id:
             logger.error("%s not found on indiags homepage today", site_title)
             overall_ok = False
             continue
         try:
-            ok = process_paper(session, site_title, display_name, mode, book_id, history, today)
+            ok = process_paper(session, code, book_id, history, today)
             overall_ok = overall_ok and ok
         except Exception as e:
-            logger.error("Error processing %s: %s", display_name, e)
+            logger.error("Error processing %s: %s", site_title, e)
             overall_ok = False
 
-    common.cleanup_stale_artifacts()
-    common.cleanup_stale_posts()
+    retention.cleanup()
+    search_index.export()
     logger.info("=== Fallback Editorial Extraction %s ===", "Completed" if overall_ok else "Completed with errors")
     if not overall_ok:
         sys.exit(1)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+The per-paper extraction both scrapers (and backfill.py) run on a
+downloaded full paper: locate the editorial page, cut it out as a
+single-page PDF, render its thumbnail and crop the articles, then store
+everything by content hash.
+
+Fetching, Discord, history and cleanup stay with the callers: they're
+what differs between the daily runs and a backfill. What's here only
+reads the full paper and writes into the date's artifact folder, so it's
+safe to run in a worker process, and its result is plain paths (picklable).
+How each paper is located and cropped comes from common.PAPERS.
+"""
+
+import os
+import time
+import logging
+
+import fitz  # PyMuPDF
+
+import common
+import editorial
+import artifact_store
+import search_index
+
+logger = logging.getLogger(__name__)
+
+
+
+def extract_paper(full_pdf_path, paper_name, today, mode="text", articles=None):
+    """Extract one day's editorial deliverables from a full paper PDF.
+
+    Returns None when the paper has no editorial page (Sundays,
+    holidays), otherwise {"paper", "date", "page_index", "page_count",
+    "editorial_pdf", "thumbnail", "articles": {"png": [...], "webp": [...],
+    "pdf": [...]}, "texts": [...], "timings": {...}}, texts being
+    editorial.extract_article_texts' for the search index and timings the
+    seconds each stage took (locate, page_pdf, thumbnail, articles, text).
+    Writes into today's artifact folder; the full PDF itself is left for
+    the caller to remove (or keep).
+    """
+    artifact_dir = common.artifact_dir_for(today.strftime("%Y-%m-%d"))
+    timings = {}
+    last = time.perf_counter()
+
+    def lap(stage):
+        nonlocal last
+        now = time.perf_counter()
+        timings[stage] = round(now - last, 3)
+        last = now
+
+    doc = fitz.open(full_pdf_path)
+    try:
+        page_idx = editorial.LOCATORS[mode](doc)
+        lap("locate")
+        if page_idx is None:
+            return None
+
+        single_pdf_path = os.path.join(
+            artifact_dir, common.dated_filename(paper_name, "EDITORIAL", today, "pdf")
+        )
+        editorial.extract_single_page_pdf(doc, page_idx, single_pdf_path)
+        lap("page_pdf")
+        thumbnail_path = editorial.write_page_thumbnail(doc, page_idx, paper_name, today, artifact_dir)
+        lap("thumbnail")
+
+        # Article images are a bonus on top of the single-page PDF above,
+        # which is already saved and is the deliverable that must always
+        # go through. If the page doesn't carry the rules or gutters its
+        # paper is cropped by (the article extractors never raise -- see
+        # extract_hindu_articles), there are simply no article crops.
+        crops = {"png": [], "webp": [], "pdf": []}
+        raster = None
+        if articles == "rules":
+            crops = editorial.write_hindu_articles(doc, page_idx, paper_name, today, artifact_dir)
+        elif articles == "gutters":
+            # one render for segmenting, cropping and the OCR'd text below
+            raster = editorial.RasterPage(doc[page_idx])
+            crops = editorial.write_raster_articles(raster, paper_name, today, artifact_dir)
+        lap("articles")
+
+        texts = []
+        if common.SEARCH_TEXT:
+            texts = editorial.extract_article_texts(doc, page_idx, mode=mode, articles=articles, raster=raster)
+        lap("text")
+
+        return {
+            "paper": paper_name,
+            "date": today.strftime("%Y-%m-%d"),
+            "page_index": page_idx,
+            "page_count": doc.page_count,
+            "editorial_pdf": single_pdf_path,
+            "thumbnail": thumbnail_path,
+            "articles": crops,
+            "texts": texts,
+            "timings": timings,
+        }
+    finally:
+        doc.close()
+        editorial.trim_store()
+
+
+def extract_in_worker(code, today, path, mode=None):
+    """Process-pool side of one paper (backfill.py, scheduler.py).
+
+    `mode` overrides the paper's locate mode from common.PAPERS. Returns
+    (result, pages scanned, seconds).
+    """
+    paper = common.PAPERS[code]
+    t0 = time.perf_counter()
+    try:
+        result = extract_paper(path, paper["name"], today, mode=mode or paper["locate"], articles=paper["articles"])
+    except Exception as e:
+        # re-raised as a plain RuntimeError: exceptions cross back to the
+        # parent pickled, and one that can't be rebuilt there (pytesseract's
+        # TesseractNotFoundError) breaks the whole pool, not just this job
+        raise RuntimeError(f"{type(e).__name__}: {e}") from None
+    # a paper with no editorial page was still scanned end to end
+    with fitz.open(path) as doc:
+        pages = doc.page_count
+    return result, pages, time.perf_counter() - t0
+
+
+def store(result):
+    """Commit a result's files once each, by content hash -- see
+    artifact_store.py -- and its article text to the search index."""
+    crops = result["articles"]
+    refs = artifact_store.put_all(
+        [result["editorial_pdf"], result["thumbnail"]] + crops["png"] + crops["webp"] + crops["pdf"]
+    )
+    if result["texts"]:
+        search_index.add(result["date"], common.PAPER_CODES[result["paper"]], result["texts"])
+    return refs
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Opt-in profiling capture for a whole extraction run.
+
+Off by default -- enabled per run with `--profile` on either scraper's
+command line, or EPAPER_PROFILE=1 in the environment (which is how the
+workflows turn it on, via their `profile` dispatch input). Nothing here
+changes what a run does, only what it leaves behind for diagnosis.
+
+Two profilers run side by side, because each answers a different question:
+  - cProfile (deterministic): exact call counts and per-function totals.
+    Written as a .pstats file (snakeviz / gprof2dot / pstats) plus a plain
+    text summary that calls out the fitz, tesseract and HTTP totals on
+    their own -- those are the three places a slow run almost always
+    spends its time.
+  - a stack sampler: a background thread snapshots the main thread's
+    Python stack every few milliseconds and writes folded
+    "frame;frame;frame milliseconds" lines -- the collapsed-stack format
+    that flamegraph.pl, inferno and speedscope all read directly. Time spent
+    inside C extensions (MuPDF rendering, the tesseract subprocess wait)
+    shows up attributed to the Python frame that called into them.
+
+Peak RSS is logged at the end of every run, profiled or not (and written
+into the summary when profiled) -- it's what says whether a run fits its
+runner; see common.LOW_MEMORY for when it doesn't.
+
+Output lands in profiles/YYYY-MM-DD/, a sibling of artifacts/ rather than
+inside it: profiles are diagnostics, not deliverables, so they're
+gitignored instead of committed with the day's artifacts, and the
+workflows upload them alongside the logs when a run fails.
+"""
+
+import io
+import os
+import sys
+import time
+import pstats
+import cProfile
+import logging
+import threading
+import contextlib
+from collections import Counter
+
+import common
+
+logger = logging.getLogger(__name__)
+
+PROFILES_DIR = "profiles"
+PROFILE_ENV = "EPAPER_PROFILE"
+SAMPLE_INTERVAL = float(os.getenv("EPAPER_PROFILE_INTERVAL", "0.005"))
+
+# module-name prefixes broken out on their own in the summary -- PDF
+# parsing/rendering, OCR, and the HTTP hops respectively
+HOTSPOT_GROUPS = {
+    "fitz": ("fitz", "pymupdf"),
+    "tesseract": ("pytesseract", "PIL"),
+    "http": ("requests", "urllib3", "http.client", "socket", "ssl"),
+}
+
+
+def requested(argv=None):
+    """True if this run asked for profiling, by flag or environment."""
+    argv = sys.argv[1:] if argv is None else argv
+    return "--profile" in argv or os.getenv(PROFILE_ENV, "").lower() in ("1", "true", "yes")
+
+
+class _StackSampler(threading.Thread):
+    """Samples one thread's Python stack at a fixed interval."""
+
+    def __init__(self, target_thread_id, interval):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.target_thread_id = target_thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        last = time.perf_counter()
+        while not self._stop_event.wait(self.interval):
+            now = time.perf_counter()
+            # weight by elapsed time, not 1 per sample -- MuPDF holds the
+            # GIL through a whole render, so this thread can't wake on
+            # schedule during one, and a plain sample count would make
+            # exactly the slowest C calls look the cheapest
+            elapsed_ms = max(1, round((now - last) * 1000))
+            last = now
+            frame = sys._current_frames().get(self.target_thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                module = frame.f_globals.get("__name__", "?")
+                names.append(f"{module}:{code.co_name}")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(names))] += elapsed_ms
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def _module_of(filename):
+    """Best-effort dotted-ish module name from a pstats filename."""
+    if filename.startswith("<") or filename == "~":
+        return filename
+    parts = os.path.normpath(filename).split(os.sep)
+    if "site-packages" in parts:
+        parts = parts[parts.index("site-packages") + 1:]
+    else:
+        parts = parts[-2:]
+    return ".".join(parts).removesuffix(".py")
+
+
+def _hotspot_totals(stats):
+    """Per-group and per-function cumulative time for HOTSPOT_GROUPS.
+
+    Group totals sum only each group's entry points (functions in the
+    group called from outside it) so nested calls within the same
+    library aren't counted twice.
+    """
+    groups = {name: {"total": 0.0, "functions": []} for name in HOTSPOT_GROUPS}
+
+    def group_for(filename, funcname):
+        module = _module_of(filename)
+        # C builtins carry no filename -- classify by the method name's
+        # owner instead (e.g. "<method 'get_pixmap' of 'Page' objects>")
+        probe = f"{module} {funcname}"
+        for name, prefixes in HOTSPOT_GROUPS.items():
+            if any(p in probe for p in prefixes):
+                return name
+        return None
+
+    for func, (cc, nc, tt, ct, callers) in stats.stats.items():
+        filename, _, funcname = func
+        group = group_for(filename, funcname)
+        if group is None:
+            continue
+        groups[group]["functions"].append((ct, nc, f"{_module_of(filename)}:{funcname}"))
+        external = any(group_for(c[0], c[2]) != group for c in callers) or not callers
+        if external:
+            groups[group]["total"] += ct
+
+    for info in groups.values():
+        info["functions"].sort(reverse=True)
+    return groups
+
+
+def _write_summary(path, stats, wall_seconds, top=40):
+    buf = io.StringIO()
+    buf.write(f"wall time: {wall_seconds:.3f}s\n")
+    peak = peak_rss_mb()
+    if peak is not None:
+        buf.write(f"peak RSS: {peak:.0f} MB\n")
+    buf.write("\n")
+    for name, info in _hotspot_totals(stats).items():
+        buf.write(f"== {name}: {info['total']:.3f}s cumulative (entry points)\n")
+        for ct, nc, label in info["functions"][:15]:
+            buf.write(f"  {ct:9.3f}s  {nc:7d} calls  {label}\n")
+        buf.write("\n")
+    buf.write(f"== top {top} by cumulative time\n")
+    stats.stream = buf
+    stats.sort_stats("cumulative").print_stats(top)
+    with open(path, "w") as f:
+        f.write(buf.getvalue())
+
+
+def peak_rss_mb(children=False):
+    """Peak resident set size so far, in MB -- of this process, or with
+    children=True of its largest finished child (backfill's workers).
+
+    None where the resource module doesn't exist (Windows).
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    peak = resource.getrusage(who).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def log_peak_rss(run_name, children=False):
+    peak = peak_rss_mb()
+    worker = peak_rss_mb(children=True) if children else None
+    if worker:
+        logger.info("Peak RSS (%s): %.0f MB, largest worker %.0f MB", run_name, peak, worker)
+    elif peak is not None:
+        logger.info("Peak RSS (%s): %.0f MB", run_name, peak)
+
+
+@contextlib.contextmanager
+def maybe_profile(run_name, enabled=None):
+    """Profile the enclosed block if profiling was requested for this run.
+
+    Output is written even if the block raises (including sys.exit), since
+    a failed run is exactly the one worth looking at. Peak RSS is logged
+    at the end either way -- it costs nothing to read, and it's the number
+    that says whether a run fits its runner.
+    """
+    if enabled is None:
+        enabled = requested()
+    if not enabled:
+        try:
+            yield None
+        finally:
+            log_peak_rss(run_name)
+        return
+
+    out_dir = os.path.join(PROFILES_DIR, common.now_ist().strftime("%Y-%m-%d"))
+    os.makedirs(out_dir, exist_ok=True)
+    stem = os.path.join(out_dir, f"{run_name}-{common.now_ist().strftime('%H%M%S')}")
+
+    sampler = _StackSampler(threading.get_ident(), SAMPLE_INTERVAL)
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    sampler.start()
+    profiler.enable()
+    try:
+        yield stem
+    finally:
+        profiler.disable()
+        sampler.stop()
+        wall = time.perf_counter() - start
+
+        profiler.dump_stats(f"{stem}.pstats")
+        with open(f"{stem}.collapsed", "w") as f:
+            for stack, count in sorted(sampler.stacks.items()):
+                f.write(f"{stack} {count}\n")
+        _write_summary(f"{stem}-summary.txt", pstats.Stats(profiler), wall)
+        logger.info(
+            "Profile written: %s.{pstats,collapsed} + %s-summary.txt (%.2fs wall)",
+            stem, stem, wall,
+        )
+        log_peak_rss(run_name)
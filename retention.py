@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Tiered retention, driven by an index of every published artifact.
+
+Each run used to rescan artifacts/ and app/_posts/, date-parse every
+folder and post, and drop anything older than one 7-day cutoff. Instead,
+everything the pipeline publishes is recorded as it's written, in an
+SQLite index (artifacts.db, committed next to search.db):
+
+    path                                      kind       date        bytes  sha256  key
+    artifacts/2026-10-19/TH-EDITORIAL-...pdf  editorial  2026-10-19  ...     ...     artifacts/objects/ab/ab12...ef.pdf
+    app/_posts/2026-10-19-editorials.md       post       2026-10-19  ...
+
+artifact_store.put_all() records each stored file, site_publish.publish_post()
+each post. How long a kind is kept is its tier (common.RETENTION_TIERS):
+editorial PDFs and article images for a week, thumbnails, vector crops,
+posts and the search index for a year. Expiry is worked out from the tier
+at query time rather than stored, so changing a tier applies to
+everything already recorded.
+
+cleanup() is then one indexed query per kind for what has run out:
+
+  - working copies and their refs.json entries go, and each object once
+    no remaining artifact shares it -- a PDF two dates produced lives
+    until the later of them expires;
+  - expired posts go, and with them their days in the archive shards
+    (site_publish.drop_archive_days) -- only the affected months are
+    rewritten;
+  - search.db rows past the "search" tier (search_index.prune);
+  - and the site's artifact manifest is rewritten from the index.
+
+So a run costs what expired, not how much history is kept, and storage
+stays bounded by the tiers while the browsable history -- posts,
+thumbnails, search -- grows to its own, longer window.
+
+The index is seeded on first use from what's on disk (refs.json, files
+from before the store, posts), and `rebuild` redoes that after hand edits:
+
+    python retention.py cleanup [--today 2026-10-19]
+    python retention.py manifest
+    python retention.py rebuild
+"""
+
+import os
+import re
+import sys
+import json
+import shutil
+import sqlite3
+import logging
+import argparse
+import contextlib
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import common
+
+logger = logging.getLogger(__name__)
+
+INDEX_DB = os.getenv("ARTIFACT_INDEX", "artifacts.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    path TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    date TEXT NOT NULL,
+    bytes INTEGER,
+    sha256 TEXT,
+    key TEXT
+);
+CREATE INDEX IF NOT EXISTS artifacts_kind_date ON artifacts (kind, date);
+CREATE INDEX IF NOT EXISTS artifacts_date ON artifacts (date);
+CREATE INDEX IF NOT EXISTS artifacts_key ON artifacts (key);
+"""
+
+# only changes a row when something about it did, so re-recording the same
+# output leaves the committed file byte-identical
+_UPSERT = """
+INSERT INTO artifacts (path, kind, date, bytes, sha256, key) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (path) DO UPDATE SET
+    kind = excluded.kind, date = excluded.date, bytes = excluded.bytes,
+    sha256 = excluded.sha256, key = excluded.key
+WHERE artifacts.kind IS NOT excluded.kind OR artifacts.date IS NOT excluded.date
+    OR artifacts.bytes IS NOT excluded.bytes OR artifacts.sha256 IS NOT excluded.sha256
+    OR artifacts.key IS NOT excluded.key
+"""
+
+# TH-EDITORIAL-14-08-26.pdf, TH-ART1-14-08-26.png, IE-THUMB-14-08-26.webp
+_ARTIFACT_NAME_RE = re.compile(r"^[A-Z]+-([A-Z]+)\d*-\d{2}-\d{2}-\d{2}\.(\w+)$")
+
+# Only ever matches our own generated posts (site_publish._post_path),
+# e.g. 2026-08-15-editorials.md -- deliberately not "any dated .md file",
+# so this never touches hand-authored site content that happens to have a
+# date-prefixed filename (Jekyll's own convention for every post).
+_POST_DATE_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})-editorials\.md$")
+
+
+def kind_of(filename):
+    """Retention kind of an artifact, from its name."""
+    m = _ARTIFACT_NAME_RE.match(filename)
+    if not m:
+        return "other"
+    label, ext = m.groups()
+    if label == "ART":
+        return "vector" if ext == "pdf" else "article"
+    return {"EDITORIAL": "editorial", "THUMB": "thumbnail", "FULL": "full"}.get(label, "other")
+
+
+def _date_of(name):
+    """`name` if it's a YYYY-MM-DD date folder, else None."""
+    try:
+        datetime.strptime(name, "%Y-%m-%d")
+    except ValueError:
+        return None
+    return name
+
+
+def _rel(path):
+    return os.path.relpath(path).replace(os.sep, "/")
+
+
+@contextlib.contextmanager
+def _connect(db=None):
+    """A connection with the schema in place, committed on clean exit; an
+    index that doesn't exist yet is seeded from disk first."""
+    db = db or INDEX_DB
+    seed = not os.path.exists(db)
+    conn = sqlite3.connect(db)
+    try:
+        conn.executescript(SCHEMA)
+        with conn:
+            if seed:
+                _scan(conn)
+            yield conn
+    finally:
+        conn.close()
+
+
+def _scan(conn):
+    """Index everything already on disk: refs.json, files from before the
+    store existed, and posts."""
+    import artifact_store
+
+    rows = []
+    if os.path.isdir(common.ARTIFACTS_DIR):
+        for name in sorted(os.listdir(common.ARTIFACTS_DIR)):
+            folder = os.path.join(common.ARTIFACTS_DIR, name)
+            if not _date_of(name) or not os.path.isdir(folder):
+                continue
+            refs = artifact_store.load_refs(folder)
+            for filename, ref in refs.items():
+                key = artifact_store.resolve(os.path.join(folder, filename))
+                size = ref.get("bytes")
+                if size is None and os.path.isfile(key):
+                    size = os.path.getsize(key)
+                rows.append((_rel(os.path.join(folder, filename)), kind_of(filename), name, size, ref["sha256"], key))
+            # files from before the store existed, committed under their names
+            for filename in sorted(os.listdir(folder)):
+                path = os.path.join(folder, filename)
+                if filename == artifact_store.REFS_FILE or filename in refs or not os.path.isfile(path):
+                    continue
+                rows.append((_rel(path), kind_of(filename), name, os.path.getsize(path),
+                             artifact_store.sha256_file(path), None))
+    if os.path.isdir(common.POSTS_DIR):
+        for filename in sorted(os.listdir(common.POSTS_DIR)):
+            m = _POST_DATE_RE.match(filename)
+            path = os.path.join(common.POSTS_DIR, filename)
+            if m and _date_of(m.group(1)):
+                rows.append((_rel(path), "post", m.group(1), os.path.getsize(path), None, None))
+    conn.executemany(_UPSERT, rows)
+    logger.info("Artifact index seeded: %s (%d entries)", INDEX_DB, len(rows))
+
+
+def rebuild(db=None):
+    """Drop the index and re-seed it from disk."""
+    with _connect(db) as conn:
+        conn.execute("DELETE FROM artifacts")
+        _scan(conn)
+
+
+def record(stored, db=None):
+    """Index what artifact_store.put_all() just stored: {path: (key, ref)}.
+    Files outside a date folder aren't artifacts and are skipped."""
+    rows = []
+    for path, (key, ref) in stored.items():
+        date = _date_of(os.path.basename(os.path.dirname(os.path.abspath(path))))
+        if date:
+            rows.append((_rel(path), kind_of(os.path.basename(path)), date, ref.get("bytes"), ref["sha256"], key))
+    if rows:
+        with _connect(db) as conn:
+            conn.executemany(_UPSERT, rows)
+
+
+def record_post(path, date, db=None):
+    """Index a site post for `date` (YYYY-MM-DD)."""
+    with _connect(db) as conn:
+        conn.execute(_UPSERT, (_rel(path), "post", date, os.path.getsize(path), None, None))
+
+
+def _cutoff(kind, today):
+    return (today - timedelta(days=common.retention_days(kind))).isoformat()
+
+
+def cleanup(today=None, db=None):
+    """Remove everything whose tier has run out, then rewrite the manifest.
+    Returns how many index entries expired."""
+    import artifact_store
+
+    today = today or common.now_ist().date()
+    with _connect(db) as conn:
+        kinds = [kind for (kind,) in conn.execute("SELECT DISTINCT kind FROM artifacts")]
+        expired = []
+        for kind in kinds:
+            expired += conn.execute(
+                "SELECT path, kind, date, key FROM artifacts WHERE kind = ? AND date < ?",
+                (kind, _cutoff(kind, today)),
+            ).fetchall()
+        conn.executemany("DELETE FROM artifacts WHERE path = ?", [(path,) for path, *_ in expired])
+
+        files, posts, keys = defaultdict(list), [], set()
+        for path, kind, date, key in expired:
+            if kind == "post":
+                posts.append((path, date))
+                continue
+            files[os.path.dirname(path)].append(os.path.basename(path))
+            if key:
+                keys.add(key)
+
+        for date_dir, names in sorted(files.items()):
+            artifact_store.forget(date_dir, names)
+            # nothing indexed left for the date: whatever remains is
+            # unpublished scratch (downloaded full papers), so it goes too
+            date = os.path.basename(date_dir)
+            if os.path.isdir(date_dir) and conn.execute(
+                "SELECT 1 FROM artifacts WHERE date = ? AND kind != 'post' LIMIT 1", (date,)
+            ).fetchone() is None:
+                shutil.rmtree(date_dir)
+            logger.info("Removed %d expired artifact(s) from %s", len(names), date_dir)
+
+        store = artifact_store.backend()
+        removed = 0
+        for key in sorted(keys):
+            if conn.execute("SELECT 1 FROM artifacts WHERE key = ? LIMIT 1", (key,)).fetchone():
+                continue
+            if store.exists(key):
+                store.delete(key)
+                removed += 1
+        if removed:
+            logger.info("Removed %d expired artifact object(s) from %s", removed, store.name)
+
+    for path, _ in posts:
+        if os.path.exists(path):
+            os.remove(path)
+            logger.info("Removed expired site post: %s", path)
+    if posts:
+        import site_publish
+        site_publish.drop_archive_days([date for _, date in posts])
+
+    import search_index
+    search_index.prune(_cutoff("search", today))
+
+    write_manifest(db)
+    return len(expired)
+
+
+def write_manifest(db=None):
+    """Write the list of live artifacts into the site, for its expiry check.
+
+    Run after cleanup, so it lists exactly what's still published: each
+    object key (or, for files from before the store, repo-relative path)
+    with its SHA-256, size, and the date cleanup will remove it, from its
+    tier. An object several artifacts share lives until the last of them
+    expires. The site fetches this one file instead of sending a HEAD
+    request per download link.
+
+    The content is deterministic (no generation timestamp) and the file is
+    only rewritten when it changes, so a run that produced nothing new
+    doesn't leave a diff for the workflow to commit.
+    """
+    artifacts = {}
+    with _connect(db) as conn:
+        rows = conn.execute(
+            "SELECT path, kind, date, bytes, sha256, key FROM artifacts WHERE kind != 'post' AND bytes IS NOT NULL"
+        ).fetchall()
+    for path, kind, date, size, sha, key in rows:
+        expires = (datetime.strptime(date, "%Y-%m-%d").date()
+                   + timedelta(days=common.retention_days(kind) + 1)).isoformat()
+        name = key or path
+        artifacts[name] = {
+            "sha256": sha,
+            "bytes": size,
+            "expires": max(expires, artifacts.get(name, {}).get("expires", "")),
+        }
+
+    body = json.dumps(
+        {
+            "retention_days": common.STALE_ARTIFACT_DAYS,
+            "tiers": {kind: common.retention_days(kind) for kind in common.RETENTION_KINDS},
+            "artifacts": artifacts,
+        },
+        sort_keys=True, separators=(",", ":"),
+    )
+    if os.path.exists(common.ARTIFACT_MANIFEST):
+        with open(common.ARTIFACT_MANIFEST) as f:
+            if f.read() == body:
+                return common.ARTIFACT_MANIFEST
+    os.makedirs(os.path.dirname(common.ARTIFACT_MANIFEST), exist_ok=True)
+    with open(common.ARTIFACT_MANIFEST, "w") as f:
+        f.write(body)
+    logger.info("Artifact manifest written: %s (%d files)", common.ARTIFACT_MANIFEST, len(artifacts))
+    return common.ARTIFACT_MANIFEST
+
+
+def totals(db=None):
+    """{kind: (entries, bytes)} over the index."""
+    with _connect(db) as conn:
+        return {kind: (n, size or 0) for kind, n, size in conn.execute(
+            "SELECT kind, COUNT(*), SUM(bytes) FROM artifacts GROUP BY kind ORDER BY kind")}
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Tiered artifact retention")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("cleanup", help="remove everything past its tier, then rewrite the manifest")
+    p.add_argument("--today", help="YYYY-MM-DD to expire against (default: today, IST)")
+    sub.add_parser("manifest", help="rewrite app/assets/artifacts.json from the index")
+    sub.add_parser("rebuild", help="re-seed the index from artifacts/ and app/_posts/")
+    args = parser.parse_args(argv)
+
+    if args.command == "cleanup":
+        today = datetime.strptime(args.today, "%Y-%m-%d").date() if args.today else None
+        n = cleanup(today)
+        print(f"{n} expired index entries removed")
+    elif args.command == "manifest":
+        write_manifest()
+    else:
+        rebuild()
+        for kind, (n, size) in totals().items():
+            print(f"  {kind:<10} {n:>5}  {size / (1024 * 1024):.1f} MB")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Run every configured paper at once, from whichever source has it.
+
+scraper.py and fallback_scraper.py each walk their papers one after the
+other, so a day's run takes the sum of every download and every locate.
+This runs one thread per paper (common.PAPERS, or --papers):
+
+  - discover/fetch go through sources.py, trying each source that carries
+    the paper in priority order until one delivers a PDF, with at most
+    --host-limit connections to any one host across all papers;
+  - locate/crop/encode (pipeline.extract_in_worker) runs in one shared
+    process pool, --workers wide. When more papers are ready than there
+    are workers, the highest-priority paper (earliest in common.PAPERS or
+    --papers) goes first;
+  - storing, Discord, the site post and history are serialized behind a
+    lock -- they read-modify-write shared files.
+
+Downloads overlap each other and other papers' extraction, so a run takes
+about as long as its slowest host plus one extraction, rather than the sum
+over papers. Papers already in today's history are skipped before
+anything heavy is imported, as in the scrapers.
+
+    python epaper.py run                              # every paper
+    python epaper.py run --papers IE TH --host-limit 1
+"""
+
+import os
+import sys
+import heapq
+import logging
+import argparse
+import threading
+
+import common
+import profiling
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+class PriorityGate:
+    """A counting semaphore that wakes waiters lowest rank first."""
+
+    def __init__(self, slots):
+        self._free = slots
+        self._waiting = []
+        self._cond = threading.Condition()
+
+    def acquire(self, rank):
+        with self._cond:
+            heapq.heappush(self._waiting, rank)
+            self._cond.wait_for(lambda: self._free and self._waiting[0] == rank)
+            heapq.heappop(self._waiting)
+            self._free -= 1
+            # the next waiter may be runnable too
+            self._cond.notify_all()
+
+    def release(self):
+        with self._cond:
+            self._free += 1
+            self._cond.notify_all()
+
+
+class Scheduler:
+    def __init__(self, codes, today, host_limit, workers):
+        import sources
+
+        self.codes = codes
+        self.today = today
+        self.limiter = sources.HostLimiter(host_limit)
+        self.sources = sources.build(self.limiter)
+        self.workers = workers
+        self.gate = PriorityGate(workers)
+        self.publish_lock = threading.Lock()
+        self.history = common.load_history()
+        self.pool = None
+
+    def run(self):
+        """{code: True (delivered or nothing to deliver) / False (every source failed)}."""
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        with self.pool, ThreadPoolExecutor(max_workers=len(self.codes), thread_name_prefix="paper") as threads:
+            futures = {code: threads.submit(self.run_paper, rank, code) for rank, code in enumerate(self.codes)}
+            return {code: future.result() for code, future in futures.items()}
+
+    def run_paper(self, rank, code):
+        import sources
+
+        paper_name = common.PAPERS[code]["name"]
+        candidates = sources.sources_for(code, self.sources)
+        if not candidates:
+            logger.error("%s: no source carries it", paper_name)
+            return False
+
+        for source in candidates:
+            try:
+                entry = source.discover(self.today).get(code)
+                if entry is None:
+                    logger.warning("%s: not on %s today", paper_name, source.name)
+                    continue
+                path = os.path.join(
+                    common.artifact_dir_for(self.today.strftime("%Y-%m-%d")),
+                    common.dated_filename(paper_name, "FULL", self.today, "pdf"),
+                )
+                logger.info("%s: downloading from %s", paper_name, source.name)
+                try:
+                    source.fetch(code, entry, path)
+                    result, pages, elapsed = self.extract(rank, code, path, source.locate_mode(code))
+                finally:
+                    if os.path.exists(path):
+                        os.remove(path)
+            except Exception as e:
+                logger.error("%s: %s failed: %s", paper_name, source.name, e)
+                continue
+
+            if result is None:
+                logger.info("%s: no editorial page in %d pages (%.1fs), skipping", paper_name, pages, elapsed)
+            else:
+                logger.info("%s: page %d of %d (%.1fs) via %s",
+                            paper_name, result["page_index"] + 1, pages, elapsed, source.name)
+            try:
+                self.deliver(code, source, entry, result)
+            except Exception as e:
+                # the extraction is fine; another source wouldn't help
+                logger.error("%s: delivery failed: %s", paper_name, e)
+                return False
+            return True
+        return False
+
+    def extract(self, rank, code, path, mode):
+        import pipeline
+
+        self.gate.acquire(rank)
+        try:
+            return self.pool.submit(pipeline.extract_in_worker, code, self.today, path, mode).result()
+        finally:
+            self.gate.release()
+
+    def deliver(self, code, source, entry, result):
+        import imageopt
+        import pipeline
+        import site_publish
+
+        paper_name = common.PAPERS[code]["name"]
+        date_key = self.today.strftime("%Y-%m-%d")
+        month_key = self.today.strftime("%m-%Y")
+
+        if result is None:
+            with self.publish_lock:
+                common.record_history(
+                    self.history, date_key, month_key, paper_name,
+                    {"status": "skipped_not_published", "timestamp": common.now_ist().isoformat()},
+                )
+            return
+
+        articles = result["articles"]
+        single_pdf_path = result["editorial_pdf"]
+        with self.publish_lock:
+            pipeline.store(result)
+
+        date_str = self.today.strftime("%d %B %Y")
+        # smallest encoding of each article image (inline previews), plus any
+        # vector crops
+        attachments = imageopt.smallest_variants(articles["png"], articles["webp"]) + articles["pdf"]
+        files = [(os.path.basename(p), p) for p in attachments]
+        files.append((os.path.basename(single_pdf_path), single_pdf_path))
+        content = f"**{paper_name} Editorial** -- {date_str} (via {source.name})"
+        if entry["extracted_from"]:
+            content += f"\n(extracted from {entry['extracted_from']} edition)"
+        if entry["edition_urls"]:
+            content += "\n\nFull e-paper PDFs:\n" + "\n".join(
+                f"{edition}: {url}" for edition, url in entry["edition_urls"].items()
+            )
+        posted = common.post_discord(
+            content=content,
+            embed_title=f"{paper_name} Editorial - {date_str}",
+            embed_color=source.embed_color,
+            file_paths=files,
+            date_str=date_str,
+        )
+
+        with self.publish_lock:
+            site_publish.publish_post(
+                paper_name, code, self.today,
+                editorial_pdf_path=single_pdf_path,
+                thumbnail_path=result["thumbnail"],
+                article_image_paths=articles["png"] or None,
+                article_pdf_paths=articles["pdf"] or None,
+                article_webp_paths=articles["webp"] or None,
+                edition_urls=entry["edition_urls"],
+            )
+            history_entry = {
+                "status": "posted" if posted else "post_failed",
+                "source": source.name,
+                "editorial_page_index": result["page_index"],
+                "artifact_dir": os.path.dirname(single_pdf_path),
+                "timestamp": common.now_ist().isoformat(),
+            }
+            if entry["edition_urls"]:
+                history_entry["edition_urls"] = entry["edition_urls"]
+                history_entry["extracted_from"] = entry["extracted_from"]
+            common.record_history(self.history, date_key, month_key, paper_name, history_entry)
+
+
+def run(codes, host_limit, workers):
+    today = common.now_ist()
+    history = common.load_history()
+    date_key, month_key = today.strftime("%Y-%m-%d"), today.strftime("%m-%Y")
+    pending = [code for code in codes
+               if not common.already_processed(history, date_key, month_key, common.PAPERS[code]["name"])]
+    if not pending:
+        logger.info("=== Scheduler: every paper already processed today, nothing to do ===")
+        return True
+
+    import retention
+    import search_index
+
+    logger.info("=== Scheduler: %s (host limit %d, %d workers) ===", ", ".join(pending), host_limit, workers)
+    outcome = Scheduler(pending, today, host_limit, workers).run()
+
+    retention.cleanup()
+    search_index.export()
+
+    failed = [code for code, ok in outcome.items() if not ok]
+    if failed:
+        logger.error("=== Scheduler: no source delivered %s ===", ", ".join(failed))
+    return not failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run every configured paper concurrently")
+    parser.add_argument("--papers", nargs="+", choices=list(common.PAPERS), default=list(common.PAPERS),
+                        help="paper codes, highest priority first (default: all, in common.PAPERS order)")
+    parser.add_argument("--host-limit", type=int, default=int(os.getenv("EPAPER_HOST_LIMIT", "2")),
+                        help="concurrent connections per host (default %(default)s, EPAPER_HOST_LIMIT)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="extraction processes (default: CPU count)")
+    parser.add_argument("--profile", action="store_true", help="capture a profile into profiles/ (profiling.py)")
+    args = parser.parse_args(argv)
+
+    with profiling.maybe_profile("scheduler", enabled=args.profile or None):
+        ok = run(args.papers, args.host_limit, args.workers)
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -17,34 +17,42 @@ import os
 import sys
 import logging
 
-
-import requests
-import fitz  # PyMuPDF
-from bs4 import BeautifulSoup
-
 import common
-import editorial
-import site_publish
+import profiling
+
+# requests/bs4 and the extraction modules (fitz, PIL) are imported where
+# they're used, so a run that finds today already processed (most
+# retries) finishes without ever loading them
 
 BASE_URL = "https://preppyq.in/the-hindu-newspaper/"
 HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
-PAPER_NAME = "The Hindu"
 PAPER_CODE = "TH"
+PAPER_NAME = common.PAPERS[PAPER_CODE]["name"]
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 
-def find_today_editions(today):
+def fetch_index():
+    """preppyq's Hindu page HTML: one table row per date and edition."""
+    import requests
+
+    r = requests.get(BASE_URL, headers=HEADERS, timeout=30)
+    r.raise_for_status()
+    return r.text
+
+
+def find_today_editions(today, html=None):
     """Parse preppyq's table for today's Hindu edition links.
 
     Returns a dict like {"International": url, "Delhi": url} -- whichever
     editions are present for today's date. Missing editions are simply
-    absent from the dict.
+    absent from the dict. `html` reuses an already-fetched fetch_index()
+    (backfill.py looks up many dates in one page).
     """
-    r = requests.get(BASE_URL, headers=HEADERS, timeout=30)
-    r.raise_for_status()
-    soup = BeautifulSoup(r.text, "html.parser")
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html if html is not None else fetch_index(), "html.parser")
 
     tables = soup.find_all("table")
     if not tables:
@@ -79,6 +87,14 @@ def process():
         logger.info("%s already processed today", PAPER_NAME)
         return True
 
+    import requests
+    import imageopt
+    import pipeline
+    import retention
+    import search_index
+    import site_publish
+    import worker
+
     editions = find_today_editions(today)
     if not editions:
         logger.error("Today's link not found on preppyq -- source may be stale")
@@ -91,52 +107,38 @@ def process():
     pdf_url = editions[extract_edition]
 
     logger.info("Downloading %s edition: %s", extract_edition, pdf_url)
-    r = requests.get(pdf_url, headers=HEADERS, timeout=60)
+    r = requests.get(pdf_url, headers=HEADERS, timeout=60, stream=True)
     r.raise_for_status()
 
     artifact_dir = common.artifact_dir_for(date_key)
     raw_pdf_path = os.path.join(
         artifact_dir, common.dated_filename(PAPER_NAME, "FULL", today, "pdf")
     )
-    with open(raw_pdf_path, "wb") as f:
-        f.write(r.content)
+    common.stream_to_file(r, raw_pdf_path)
 
-    doc = fitz.open(raw_pdf_path)
-    page_idx = editorial.locate_editorial_page_text(doc)
+    # by the warm worker (worker.py) if one's running
+    result = worker.extract(PAPER_CODE, raw_pdf_path, today)
+    os.remove(raw_pdf_path)
 
-    if page_idx is None:
+    if result is None:
         logger.info("No Editorial page found today -- likely Sunday/holiday, skipping")
-        os.remove(raw_pdf_path)
         common.record_history(
             history, date_key, month_key, PAPER_NAME,
             {"status": "skipped_not_published", "timestamp": common.now_ist().isoformat()},
         )
         return True
 
-    single_pdf_path = os.path.join(
-        artifact_dir, common.dated_filename(PAPER_NAME, "EDITORIAL", today, "pdf")
-    )
-    editorial.extract_single_page_pdf(doc, page_idx, single_pdf_path)
-
-    # Article images are a bonus on top of the single-page PDF above, which
-    # is already saved and is the deliverable that must always go through.
-    # If this PDF doesn't carry the rule geometry article cropping needs
-    # (extract_hindu_articles never raises -- see its docstring), we just
-    # skip images entirely rather than force a substitute.
-    article_paths = []
-    for i, png_bytes in enumerate(editorial.extract_hindu_articles(doc, page_idx), start=1):
-        p = os.path.join(
-            artifact_dir, common.dated_filename(PAPER_NAME, "ART", today, "png", part=i)
-        )
-        with open(p, "wb") as f:
-            f.write(png_bytes)
-        article_paths.append(p)
-
-    doc.close()
-    os.remove(raw_pdf_path)
+    page_idx = result["page_index"]
+    single_pdf_path = result["editorial_pdf"]
+    thumbnail_path = result["thumbnail"]
+    articles = result["articles"]
+    pipeline.store(result)
 
     date_str = today.strftime("%d %B %Y")
-    files = [(os.path.basename(p), p) for p in article_paths]
+    # smallest encoding of each article image (inline previews), plus any
+    # vector crops
+    attachments = imageopt.smallest_variants(articles["png"], articles["webp"]) + articles["pdf"]
+    files = [(os.path.basename(p), p) for p in attachments]
     files.append((os.path.basename(single_pdf_path), single_pdf_path))
 
     edition_lines = "\n".join(
@@ -159,7 +161,10 @@ def process():
     site_publish.publish_post(
         PAPER_NAME, PAPER_CODE, today,
         editorial_pdf_path=single_pdf_path,
-        article_image_paths=article_paths,
+        thumbnail_path=thumbnail_path,
+        article_image_paths=articles["png"],
+        article_pdf_paths=articles["pdf"],
+        article_webp_paths=articles["webp"],
         edition_urls=editions,
     )
 
@@ -175,14 +180,15 @@ def process():
         },
     )
 
-    common.cleanup_stale_artifacts()
-    common.cleanup_stale_posts()
+    retention.cleanup()
+    search_index.export()
     return posted
 
 
 def main():
     logger.info("=== Primary Editorial Extraction Started ===")
-    ok = process()
+    with profiling.maybe_profile("primary"):
+        ok = process()
     logger.info("=== Primary Editorial Extraction %s ===", "Completed" if ok else "Failed")
     if not ok:
         sys.exit(1)
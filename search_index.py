@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Full-text search over every editorial the pipeline has extracted.
+
+Each run's article text (editorial.extract_article_texts: the text layer
+clipped to the article crops for The Hindu, a whole-page OCR pass for
+Indian Express) is upserted into an SQLite FTS5 index, search.db, one row
+per date/paper/article. It's incremental -- a re-run that extracts the
+same text writes nothing, so the committed file only changes when there's
+something new -- and it's kept on its own retention tier, a year by
+default (retention.py, via prune()): the text is a few KB a day, and
+months of it is the point.
+
+    python search_index.py query "monetary policy" [--paper TH] [--since 2026-09-01]
+    python search_index.py index artifacts/*/TH-EDITORIAL-*.pdf   # seed from PDFs
+    python search_index.py export                                 # rewrite app/assets/search/
+
+`query` takes FTS5 syntax ("exact phrase", OR, NOT, prefix*) and falls
+back to plain words when the query doesn't parse.
+
+`export` writes the static index the site's /search/ page reads
+(app/_includes/search.html), in app/assets/search/:
+
+  - manifest.json: doc count, field order, shard/bucket sizing, stopwords
+  - t-<prefix>.json: term -> sorted doc ids, delta-encoded, sharded by
+    the term's first SHARD_PREFIX characters, so a query fetches one
+    shard per word
+  - d-<n>.json: doc metadata (date, paper, article, headline, snippet,
+    page URL while the post is live) in buckets of DOC_BUCKET ids, so
+    showing results fetches only the buckets the top hits fall in. Ids
+    are derived from the date, so the page's highest ids are its newest
+    hits, and pruning or backfilling a day leaves every other day's ids --
+    and so its buckets -- as they were
+
+Everything is regenerated from search.db but only written when its bytes
+change, like the archive shards.
+"""
+
+import os
+import re
+import sys
+import glob
+import json
+import time
+import sqlite3
+import logging
+import argparse
+import contextlib
+from collections import defaultdict
+from datetime import date
+
+import common
+
+logger = logging.getLogger(__name__)
+
+SEARCH_DB = os.getenv("SEARCH_DB", "search.db")
+EXPORT_DIR = os.path.join("app", "assets", "search")
+POSTS_DIR = os.path.join("app", "_posts")
+SHARD_PREFIX = 1
+DOC_BUCKET = 512
+# Doc ids are IDS_PER_DAY per day since ID_EPOCH, so they rise with the
+# date and stay put whatever else is added or pruned
+ID_EPOCH = date(2000, 1, 1).toordinal()
+IDS_PER_DAY = 64
+SNIPPET_CHARS = 240
+
+# must match the tokenizer in app/_includes/search.html
+_TOKEN_RE = re.compile(r"[^\W_]{2,}")
+STOPWORDS = frozenset("""
+    about after all also an and any are as at be been but by can could do for from had has have he
+    her his if in into is it its may more most no not of on one or other our over should so some such
+    than that the their them then there these they this those to up was we were what when which who
+    will with would
+""".split())
+
+_EDITORIAL_PDF_RE = re.compile(r"^([A-Z]+)-(EDITORIAL|FULL)-(\d{2}-\d{2}-\d{2})\.pdf$")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    paper TEXT NOT NULL,
+    article INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    text TEXT NOT NULL,
+    UNIQUE (date, paper, article)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+    title, text, content='articles', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
+    INSERT INTO articles_fts(rowid, title, text) VALUES (new.id, new.title, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN
+    INSERT INTO articles_fts(articles_fts, rowid, title, text) VALUES ('delete', old.id, old.title, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_au AFTER UPDATE ON articles BEGIN
+    INSERT INTO articles_fts(articles_fts, rowid, title, text) VALUES ('delete', old.id, old.title, old.text);
+    INSERT INTO articles_fts(rowid, title, text) VALUES (new.id, new.title, new.text);
+END;
+"""
+
+
+@contextlib.contextmanager
+def _connect(db=None):
+    """A connection with the schema in place, committed on clean exit."""
+    conn = sqlite3.connect(db or SEARCH_DB)
+    try:
+        conn.executescript(SCHEMA)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def tokens(text):
+    """Index terms of `text`, as the site's search page splits a query."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def add(date, paper, texts, db=None):
+    """Upsert one paper-day's articles ([{"article", "title", "text"}]).
+
+    Rows whose text is unchanged aren't touched; articles this extraction
+    no longer produced are dropped. Returns how many rows changed.
+    """
+    changed = 0
+    with _connect(db) as conn:
+        for t in texts:
+            row = conn.execute(
+                "SELECT id, title, text FROM articles WHERE date = ? AND paper = ? AND article = ?",
+                (date, paper, t["article"]),
+            ).fetchone()
+            if row is None:
+                conn.execute(
+                    "INSERT INTO articles (date, paper, article, title, text) VALUES (?, ?, ?, ?, ?)",
+                    (date, paper, t["article"], t["title"], t["text"]),
+                )
+                changed += 1
+            elif row[1:] != (t["title"], t["text"]):
+                conn.execute("UPDATE articles SET title = ?, text = ? WHERE id = ?", (t["title"], t["text"], row[0]))
+                changed += 1
+        keep = [t["article"] for t in texts]
+        changed += conn.execute(
+            f"DELETE FROM articles WHERE date = ? AND paper = ? AND article NOT IN ({','.join('?' * len(keep))})",
+            [date, paper] + keep,
+        ).rowcount
+    if changed:
+        logger.info("Search index: %d article(s) updated for %s %s", changed, paper, date)
+    return changed
+
+
+def prune(before, db=None):
+    """Drop every article dated before `before` (YYYY-MM-DD); returns how many."""
+    db = db or SEARCH_DB
+    if not os.path.exists(db):
+        return 0
+    with _connect(db) as conn:
+        removed = conn.execute("DELETE FROM articles WHERE date < ?", (before,)).rowcount
+    if removed:
+        logger.info("Search index: %d article(s) before %s removed", removed, before)
+    return removed
+
+
+def search(query, limit=20, paper=None, since=None, until=None, db=None):
+    """Best matches for an FTS5 `query`, best first.
+
+    Returns [{"date", "paper", "article", "title", "snippet"}]; headline
+    matches weigh five times body matches.
+    """
+    where, params = ["articles_fts MATCH ?"], [query]
+    for clause, value in (("a.paper = ?", paper), ("a.date >= ?", since), ("a.date <= ?", until)):
+        if value:
+            where.append(clause)
+            params.append(value)
+    sql = (
+        "SELECT a.date, a.paper, a.article, a.title, snippet(articles_fts, 1, '[', ']', ' ... ', 16) "
+        "FROM articles_fts JOIN articles a ON a.id = articles_fts.rowid "
+        f"WHERE {' AND '.join(where)} ORDER BY bm25(articles_fts, 5.0, 1.0) LIMIT ?"
+    )
+    with _connect(db) as conn:
+        try:
+            rows = conn.execute(sql, params + [limit]).fetchall()
+        except sqlite3.OperationalError:
+            # not valid FTS5 syntax (a stray quote or colon): search the words
+            params[0] = " ".join(f'"{t}"' for t in _TOKEN_RE.findall(query.lower())) or '""'
+            rows = conn.execute(sql, params + [limit]).fetchall()
+    return [dict(zip(("date", "paper", "article", "title", "snippet"), row)) for row in rows]
+
+
+def _snippet(title, text):
+    """The start of the body, headline dropped (results show it already)."""
+    text = " ".join(text.split())
+    title = " ".join(title.split())
+    if title and text.startswith(title):
+        text = text[len(title):].lstrip()
+    if len(text) <= SNIPPET_CHARS:
+        return text
+    return text[:SNIPPET_CHARS].rsplit(" ", 1)[0] + " ..."
+
+
+def _post_url(date):
+    """The date's page on the site, while its post is still there."""
+    if not os.path.exists(os.path.join(POSTS_DIR, f"{date}-editorials.md")):
+        return None
+    y, m, d = date.split("-")
+    # must match _config.yml's permalink: /epaper/:day-:month-:year/
+    return f"/epaper/{d}-{m}-{y}/"
+
+
+def _shard_key(term):
+    key = term[:SHARD_PREFIX]
+    return key if re.fullmatch(r"[a-z0-9]+", key) else "_"
+
+
+def _write_if_changed(path, data):
+    text = json.dumps(data, separators=(",", ":"), sort_keys=True, ensure_ascii=False) + "\n"
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            if f.read() == text:
+                return False
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return True
+
+
+def export(out_dir=EXPORT_DIR, db=None):
+    """Rewrite the site's static search index from search.db; returns files changed."""
+    if not os.path.exists(db or SEARCH_DB):
+        return 0
+    with _connect(db) as conn:
+        rows = conn.execute("SELECT date, paper, article, title, text FROM articles ORDER BY date, paper, article").fetchall()
+
+    postings = defaultdict(list)
+    buckets = defaultdict(list)
+    # not search.db's rowids (insertion order, and a backfill inserts old
+    # days last): the page keeps the highest ids as the newest hits
+    rank = defaultdict(int)
+    for day, paper, article, title, text in rows:
+        if rank[day] == IDS_PER_DAY:
+            logger.warning("Search export: more than %d docs on %s, skipping %s article %s",
+                           IDS_PER_DAY, day, paper, article)
+            continue
+        doc_id = (date.fromisoformat(day).toordinal() - ID_EPOCH) * IDS_PER_DAY + rank[day]
+        rank[day] += 1
+        for term in set(tokens(title + " " + text)):
+            postings[term].append(doc_id)
+        buckets[doc_id // DOC_BUCKET].append([doc_id, day, paper, article, title, _snippet(title, text), _post_url(day)])
+
+    shards = defaultdict(dict)
+    for term, ids in postings.items():
+        # ids arrive ascending; store the gaps, which are mostly 1-2 digits
+        shards[_shard_key(term)][term] = [ids[0]] + [b - a for a, b in zip(ids, ids[1:])]
+
+    files = {f"t-{key}.json": shard for key, shard in shards.items()}
+    files.update({f"d-{n}.json": docs for n, docs in buckets.items()})
+    files["manifest.json"] = {
+        "docs": sum(rank.values()),
+        "fields": ["id", "date", "paper", "article", "title", "snippet", "url"],
+        "bucket": DOC_BUCKET,
+        "prefix": SHARD_PREFIX,
+        "shards": sorted(shards),
+        "papers": {code: paper["name"] for code, paper in common.PAPERS.items()},
+        "stopwords": sorted(STOPWORDS),
+    }
+
+    os.makedirs(out_dir, exist_ok=True)
+    changed = sum(_write_if_changed(os.path.join(out_dir, name), data) for name, data in files.items())
+    for path in glob.glob(os.path.join(out_dir, "*.json")):
+        if os.path.basename(path) not in files:
+            os.remove(path)
+            changed += 1
+    logger.info("Search index exported: %s (%d docs, %d terms, %d file(s) changed)",
+                out_dir, len(rows), len(postings), changed)
+    return changed
+
+
+def index_pdf(path, db=None):
+    """Index one {CODE}-EDITORIAL-DD-MM-YY.pdf or {CODE}-FULL-DD-MM-YY.pdf."""
+    import fitz  # PyMuPDF
+    import editorial
+
+    m = _EDITORIAL_PDF_RE.match(os.path.basename(path))
+    if not m or m.group(1) not in common.PAPERS:
+        raise ValueError(f"{path}: not a {{CODE}}-EDITORIAL/FULL-DD-MM-YY.pdf name")
+    code, kind, day = m.groups()
+    paper = common.PAPERS[code]
+    date = time.strftime("%Y-%m-%d", time.strptime(day, "%d-%m-%y"))
+    with fitz.open(path) as doc:
+        page_idx = 0 if kind == "EDITORIAL" else editorial.LOCATORS[paper["locate"]](doc)
+        if page_idx is None:
+            return 0
+        texts = editorial.extract_article_texts(doc, page_idx, mode=paper["locate"], articles=paper["articles"])
+    return add(date, code, texts, db=db) if texts else 0
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Full-text search over extracted editorials")
+    parser.add_argument("--db", default=SEARCH_DB, help="SQLite index (default %(default)s, SEARCH_DB)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("query", help="search the index")
+    p.add_argument("terms", nargs="+", help="FTS5 query; plain words are ANDed")
+    p.add_argument("--paper", choices=list(common.PAPERS))
+    p.add_argument("--since", help="first date, YYYY-MM-DD")
+    p.add_argument("--until", help="last date, YYYY-MM-DD")
+    p.add_argument("--limit", type=int, default=20)
+
+    p = sub.add_parser("index", help="add editorial or full-paper PDFs to the index")
+    p.add_argument("pdfs", nargs="+", help="{CODE}-EDITORIAL-DD-MM-YY.pdf / {CODE}-FULL-DD-MM-YY.pdf files")
+    p.add_argument("--export", action="store_true", help="export the site index afterwards")
+
+    sub.add_parser("export", help=f"rewrite the site's static index ({EXPORT_DIR})")
+    args = parser.parse_args(argv)
+
+    if args.command == "query":
+        t0 = time.perf_counter()
+        hits = search(" ".join(args.terms), args.limit, args.paper, args.since, args.until, db=args.db)
+        elapsed = (time.perf_counter() - t0) * 1000
+        for hit in hits:
+            label = f"#{hit['article']}" if hit["article"] else "page"
+            print(f"{hit['date']}  {hit['paper']} {label:<5} {hit['title'] or '(untitled)'}")
+            print(f"    {' '.join(hit['snippet'].split())}")
+        print(f"{len(hits)} result(s) in {elapsed:.1f} ms")
+    elif args.command == "index":
+        failed = 0
+        for path in args.pdfs:
+            try:
+                index_pdf(path, db=args.db)
+            except Exception as e:
+                logger.error("%s: %s", path, e)
+                failed += 1
+        if args.export:
+            export(db=args.db)
+        if failed:
+            sys.exit(1)
+    else:
+        export(db=args.db)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Incremental HTML output for the app/ site, without a Jekyll rebuild.
+
+Adding one dated post used to mean a full `jekyll build` in pages.yml --
+Ruby, bundler, every page and the whole Sass pipeline -- to change, in
+practice, a handful: the new date's page, the previous date's page (its
+"Next" link), the home listing, the feed and the /epaper/ archive data.
+This renders exactly those into an already-built site directory:
+
+  - post pages: the subset of Markdown + Liquid that site_publish writes
+    (headings, pipe tables, raw HTML, the download-button include and the
+    two Liquid filters it uses) is rendered here directly, inside the
+    category-post layout's markup.
+  - head/header/footer chrome is never re-implemented: it's lifted from
+    the last full Jekyll build, between the <!-- page-content --> markers
+    that _layouts/default.html puts around {{ content }}. The home
+    listing is patched between its <!-- post-list --> markers. A theme
+    or layout change therefore still goes through a full build
+    (pages.yml keys its site cache on everything but _posts/), and the
+    next incremental run picks the new chrome up from it.
+  - feed.xml is regenerated whole -- it's one small file. The artifact
+    manifest, the /epaper/ archive shards and the /search/ index are
+    copied over as-is.
+
+Every page is rendered in memory and only written if its bytes changed,
+so "touch only what the new date affects" falls out of comparing rather
+than from tracking dependencies. Pages for posts cleanup has removed are
+deleted.
+
+    python site_html.py [SITE_DIR]      # default app/_site
+
+Without a previous full build in SITE_DIR (no marked shell to reuse) this
+exits 2 and leaves SITE_DIR alone; pages.yml falls back to Jekyll then.
+"""
+
+import os
+import re
+import sys
+import glob
+import html
+import shutil
+import logging
+from datetime import datetime
+from urllib.parse import quote_plus
+
+import common
+
+logger = logging.getLogger(__name__)
+
+SITE_DIR = os.getenv("SITE_HTML_DIR", os.path.join("app", "_site"))
+CONFIG_PATH = os.path.join("app", "_config.yml")
+POSTS_DIR = os.path.join("app", "_posts")
+ARCHIVE_DIR = os.path.join("app", "assets", "archive")
+SEARCH_DIR = os.path.join("app", "assets", "search")
+# data files copied into the site as-is; anything in the site's copy of
+# these directories that's gone from app/ is deleted
+DATA_DIRS = (ARCHIVE_DIR, SEARCH_DIR)
+CATEGORY = "epaper"
+
+_CONTENT_RE = re.compile(r"(<!-- page-content -->).*?(<!-- /page-content -->)", re.DOTALL)
+_LIST_RE = re.compile(r"(<!-- post-list -->).*?(<!-- /post-list -->)", re.DOTALL)
+_POST_DIR_RE = re.compile(r"^\d{2}-\d{2}-\d{4}$")
+
+_INCLUDE_RE = re.compile(r"{%\s*include\s+download-button\.html\s+(.*?)%}")
+_INCLUDE_ARG_RE = re.compile(r'(\w+)=(?:"([^"]*)"|(\S+))')
+_PREPEND_RE = re.compile(r"""{{\s*['"]([^'"]*)['"]\s*\|\s*prepend:\s*site\.baseurl\s*}}""")
+_URL_ENCODE_RE = re.compile(r"""{{\s*['"]([^'"]*)['"]\s*\|\s*url_encode\s*}}""")
+
+
+def _site_config(path=CONFIG_PATH):
+    """Top-level scalar settings from _config.yml (all this module needs)."""
+    config = {}
+    with open(path) as f:
+        for line in f:
+            m = re.match(r'^(\w+):\s*(?:"([^"]*)"|([^#\n]*?))\s*(?:#.*)?$', line)
+            if m:
+                config[m.group(1)] = m.group(2) if m.group(2) is not None else m.group(3)
+    return config
+
+
+# --- Liquid/Markdown subset -------------------------------------------------
+
+def _download_button(args, baseurl):
+    opts = {k: q or bare for k, q, bare in _INCLUDE_ARG_RE.findall(args)}
+    check = " data-check-expiry" if opts.get("check_expiry") == "true" else ""
+    return (
+        f'<a href="{opts.get("href", "")}" class="download-btn"{check} target="_blank" rel="noopener">'
+        f'<img src="{baseurl}/assets/download.svg" alt="" class="download-icon" width="18" height="18">'
+        f'<span>{opts.get("label") or "Download"}</span></a>'
+    )
+
+
+def _liquid(text, baseurl):
+    text = _INCLUDE_RE.sub(lambda m: _download_button(m.group(1), baseurl), text)
+    text = _PREPEND_RE.sub(lambda m: baseurl + m.group(1), text)
+    return _URL_ENCODE_RE.sub(lambda m: quote_plus(m.group(1)), text)
+
+
+def _inline(text):
+    text = re.sub(r"\[([^\]]+)\]\(([^)]+)\)", r'<a href="\2">\1</a>', text)
+    text = re.sub(r"\*\*(.+?)\*\*", r"<strong>\1</strong>", text)
+    return re.sub(r"\*(.+?)\*", r"<em>\1</em>", text)
+
+
+def _slug(text, seen):
+    # kramdown's auto_ids: lowercase, drop punctuation, spaces to hyphens,
+    # "-1", "-2"... on repeats
+    base = re.sub(r"[^a-z0-9 -]", "", text.lower()).strip().replace(" ", "-") or "section"
+    n = seen.get(base, 0)
+    seen[base] = n + 1
+    return base if n == 0 else f"{base}-{n}"
+
+
+def _table(rows):
+    cells = [[c.strip() for c in row.strip().strip("|").split("|")] for row in rows]
+    head, body = cells[0], cells[2:]
+    out = ["<table>", "  <thead>", "    <tr>"]
+    out += [f"      <th>{_inline(c)}</th>" for c in head]
+    out += ["    </tr>", "  </thead>", "  <tbody>"]
+    for row in body:
+        out.append("    <tr>")
+        out += [f"      <td>{_inline(c)}</td>" for c in row]
+        out.append("    </tr>")
+    out += ["  </tbody>", "</table>"]
+    return out
+
+
+def markdown_to_html(body):
+    """Render the Markdown site_publish writes. Not a general converter."""
+    out, seen = [], {}
+    lines = body.split("\n")
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
+        if not stripped:
+            i += 1
+            continue
+        heading = re.match(r"^(#{1,6})\s+(.*)$", stripped)
+        if heading:
+            level, text = len(heading.group(1)), heading.group(2)
+            out.append(f'<h{level} id="{_slug(text, seen)}">{_inline(text)}</h{level}>')
+        elif stripped.startswith("|"):
+            rows = []
+            while i < len(lines) and lines[i].strip().startswith("|"):
+                rows.append(lines[i])
+                i += 1
+            out += _table(rows)
+            continue
+        elif stripped == "---":
+            out.append("<hr />")
+        elif stripped.startswith("<"):
+            # raw HTML block; kramdown drops the markdown="1" marker
+            out.append(stripped.replace(' markdown="1"', ""))
+        else:
+            para = []
+            while i < len(lines) and lines[i].strip() and not lines[i].lstrip().startswith(("<", "#", "|")):
+                para.append(lines[i].strip())
+                i += 1
+            out.append(f"<p>{_inline(' '.join(para))}</p>")
+            continue
+        i += 1
+    return "\n".join(out) + "\n"
+
+
+def _strip_html(text):
+    # Liquid's strip_html: script/style/comments wholesale, then any tag
+    text = re.sub(r"<script.*?</script>|<!--.*?-->|<style.*?</style>", "", text, flags=re.DOTALL)
+    return re.sub(r"<.*?>", "", text, flags=re.DOTALL)
+
+
+def _truncatewords(text, n):
+    words = text.split()
+    return " ".join(words[:n]) + "..." if len(words) > n else " ".join(words)
+
+
+# --- posts ------------------------------------------------------------------
+
+class _Post:
+    def __init__(self, path, baseurl):
+        with open(path) as f:
+            raw = f.read()
+        _, front, body = raw.split("---\n", 2)
+        meta = dict(
+            (k.strip(), v.strip().strip('"'))
+            for k, v in (l.split(":", 1) for l in front.splitlines() if ":" in l)
+        )
+        self.title = meta["title"]
+        self.date = datetime.strptime(meta["date"], "%Y-%m-%d %H:%M:%S %z")
+        # permalink: /epaper/:day-:month-:year/
+        self.url = f"/{CATEGORY}/{self.date.strftime('%d-%m-%Y')}/"
+        self.content = markdown_to_html(_liquid(body, baseurl))
+        self.text = _strip_html(self.content)
+
+
+def _load_posts(baseurl):
+    posts = []
+    for path in glob.glob(os.path.join(POSTS_DIR, "*-editorials.md")):
+        try:
+            posts.append(_Post(path, baseurl))
+        except (ValueError, KeyError) as e:
+            logger.warning("Skipping unparseable post %s: %s", path, e)
+    # site.categories order: newest first
+    posts.sort(key=lambda p: p.date, reverse=True)
+    return posts
+
+
+def _post_block(post, baseurl):
+    href = baseurl + post.url
+    return (
+        '<!-- Renders post date, title, and snippet of text. -->\n'
+        '<div class="py-2 mb-2 prose">\n'
+        f'  <a class="no-underline h5 bold text-accent" title="{href}" href="{href}">'
+        f'{post.date.strftime("%b %-d, %Y")}</a>\n'
+        '  <h2 class="h1 lh-condensed col-9 mt-0">\n'
+        f'    <a class="link-primary" title="{href}" href="{href}">{post.title}</a>\n'
+        '  </h2>\n'
+        f'  <p>{_truncatewords(post.text, 30)}</p>\n'
+        '</div>\n'
+    )
+
+
+def _neighbour(label, post, full_base_url, extra_class):
+    return (
+        f'<div class="col-4 sm-width-full left{extra_class} mt-3">\n'
+        f'  <a class="no-underline border-top-thin py-1 block" href="{full_base_url}{post.url}">\n'
+        f'    <span class="h5 bold text-accent">{label}</span>\n'
+        f'    <p class="bold h3 link-primary mb-1">{post.title}</p>\n'
+        f'    <p>{_truncatewords(post.text, 20)}</p>\n'
+        '  </a>\n'
+        '</div>\n'
+    )
+
+
+def _post_page(post, older, newer, config):
+    """Inner markup of _layouts/category-post.html for one post."""
+    full_base_url = config.get("url", "") + config.get("baseurl", "")
+    nav = ""
+    if older:
+        nav += _neighbour("Previous", older, full_base_url, " mr-lg-4")
+    if newer:
+        nav += _neighbour("Next", newer, full_base_url, "")
+    return (
+        '<article class="container px-2 mx-auto mb4" itemscope itemtype="http://schema.org/BlogPosting">\n'
+        f'  <h1 class="h0 col-9 sm-width-full py-4 mt-3 inline-block" itemprop="name headline">{post.title}</h1>\n'
+        '  <div class="col-4 sm-width-full mt-1 border-top-thin ">\n'
+        f'    <p class="mb-3 py-2 bold h4"><time datetime="{post.date.isoformat()}" itemprop="datePublished">'
+        f'{post.date.strftime("%b %-d, %Y")}</time></p>\n'
+        '  </div>\n'
+        '  <div class="prose" itemprop="articleBody">\n'
+        f'{post.content}'
+        '  </div>\n'
+        '</article>\n'
+        '<div class="container mx-auto px-2 py-2 clearfix">\n'
+        f'{nav}'
+        '</div>\n'
+    )
+
+
+def _in_shell(shell, content, title, description, canonical):
+    page = _CONTENT_RE.sub(lambda m: f"{m.group(1)}\n{content}{m.group(2)}", shell, count=1)
+    page = re.sub(r"<title>.*?</title>", lambda m: f"<title>{html.escape(title)}</title>", page, count=1)
+    page = re.sub(
+        r'(<meta name="description" content=")[^"]*(")',
+        lambda m: m.group(1) + html.escape(description) + m.group(2), page, count=1,
+    )
+    return re.sub(
+        r'(<link rel="canonical" href=")[^"]*(")',
+        lambda m: m.group(1) + canonical + m.group(2), page, count=1,
+    )
+
+
+def _feed(posts, config):
+    site_url = config.get("url", "") + config.get("baseurl", "")
+    updated = posts[0].date.isoformat() if posts else common.now_ist().isoformat()
+    entries = "".join(
+        "  <entry>\n"
+        f"    <title>{html.escape(p.title)}</title>\n"
+        f'    <link href="{site_url}{p.url}"/>\n'
+        f"    <id>{site_url}{p.url}</id>\n"
+        f"    <updated>{p.date.isoformat()}</updated>\n"
+        f"    <summary>{html.escape(_truncatewords(p.text, 30))}</summary>\n"
+        "  </entry>\n"
+        for p in posts
+    )
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<feed xmlns="http://www.w3.org/2005/Atom">\n'
+        f"  <title>{html.escape(config.get('title', ''))}</title>\n"
+        f'  <link href="{site_url}/"/>\n'
+        f'  <link rel="self" href="{site_url}/feed.xml"/>\n'
+        f"  <id>{site_url}/</id>\n"
+        f"  <updated>{updated}</updated>\n"
+        f"{entries}"
+        "</feed>\n"
+    )
+
+
+def _write_if_changed(path, text):
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            if f.read() == text:
+                return False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return True
+
+
+def render(site_dir=SITE_DIR):
+    """Bring a built site up to date with app/_posts/; list of paths written.
+
+    Raises FileNotFoundError if site_dir has no marked shell to reuse
+    (never fully built, or built before the markers existed).
+    """
+    listing_path = os.path.join(site_dir, CATEGORY, "index.html")
+    home_path = os.path.join(site_dir, "index.html")
+    with open(listing_path, encoding="utf-8") as f:
+        listing = f.read()
+    with open(home_path, encoding="utf-8") as f:
+        home = f.read()
+    if not (_CONTENT_RE.search(listing) and _LIST_RE.search(home)):
+        raise FileNotFoundError(f"{site_dir} was not built with the page-content/post-list markers")
+
+    config = _site_config()
+    baseurl = config.get("baseurl", "")
+    site_url = config.get("url", "") + baseurl
+    posts = _load_posts(baseurl)
+    blocks = "".join(_post_block(p, baseurl) for p in posts)
+
+    pages = {
+        home_path: _LIST_RE.sub(lambda m: f"{m.group(1)}\n{blocks}{m.group(2)}", home, count=1),
+        os.path.join(site_dir, "feed.xml"): _feed(posts, config),
+    }
+    # /epaper/ itself lists nothing server-side any more (it pages through
+    # the archive shards), but a build from before that still has markers
+    if _LIST_RE.search(listing):
+        pages[listing_path] = _LIST_RE.sub(lambda m: f"{m.group(1)}\n{blocks}{m.group(2)}", listing, count=1)
+    # the data files posts are listed/checked from, copied as-is
+    data = [common.ARTIFACT_MANIFEST] + [p for d in DATA_DIRS for p in glob.glob(os.path.join(d, "*.json"))]
+    for src in data:
+        with open(src, encoding="utf-8") as f:
+            pages[os.path.join(site_dir, os.path.relpath(src, "app"))] = f.read()
+    for i, post in enumerate(posts):
+        newer = posts[i - 1] if i > 0 else None
+        older = posts[i + 1] if i + 1 < len(posts) else None
+        path = os.path.join(site_dir, post.url.strip("/"), "index.html")
+        pages[path] = _in_shell(
+            listing, _post_page(post, older, newer, config), post.title,
+            _truncatewords(post.text, 30)[:160], site_url + post.url,
+        )
+
+    written = [path for path, text in pages.items() if _write_if_changed(path, text)]
+
+    for data_dir in DATA_DIRS:
+        site_data = os.path.join(site_dir, os.path.relpath(data_dir, "app"))
+        for path in glob.glob(os.path.join(site_data, "*.json")):
+            if not os.path.exists(os.path.join(data_dir, os.path.basename(path))):
+                os.remove(path)
+                written.append(path)
+
+    live = {p.url.strip("/").split("/")[-1] for p in posts}
+    for name in os.listdir(os.path.join(site_dir, CATEGORY)):
+        path = os.path.join(site_dir, CATEGORY, name)
+        if _POST_DIR_RE.match(name) and name not in live and os.path.isdir(path):
+            shutil.rmtree(path)
+            written.append(path)
+            logger.info("Removed page for pruned post: %s", path)
+
+    for path in written:
+        logger.info("Site page updated: %s", path)
+    return written
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    site_dir = sys.argv[1] if len(sys.argv) > 1 else SITE_DIR
+    try:
+        written = render(site_dir)
+    except FileNotFoundError as e:
+        logger.error("No reusable full build: %s", e)
+        sys.exit(2)
+    logger.info("%d page(s) changed in %s", len(written), site_dir)
+
+
+if __name__ == "__main__":
+    main()
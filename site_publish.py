@@ -10,21 +10,29 @@ touching the others. Order on the page is fixed (PAPER_ORDER), independent
 of which script ran first.
 
 Posts link to artifacts via raw.githubusercontent.com rather than copying
-files into the site source -- see common.raw_url(). Both the artifacts and
-the post itself are pruned on the same 7-day window (common.STALE_ARTIFACT_DAYS,
-common.cleanup_stale_posts()) -- this is a rolling week of history, not a
-long-term archive. The site's client-side expiry handling
-(app/_includes/expiry-check.html) is a safety net for the brief window
-within a single cleanup cycle where a post can outlive its artifact.
+files into the site source -- see common.raw_url(). Each post is recorded
+in retention.py's index and kept on the "post" tier, a year by default,
+while the full-size PDFs and images it links go after a week: an older
+post keeps its thumbnails and vector crops, and the site's client-side
+expiry handling (app/_includes/expiry-check.html) swaps each link that has
+run out for an "expired" note.
 """
 
 import os
 import re
+import json
+import glob
+import logging
 
 import common
 
+logger = logging.getLogger(__name__)
+
 POSTS_DIR = os.path.join("app", "_posts")
-PAPER_ORDER = ["TH", "IE"]
+PAPER_ORDER = list(common.PAPERS)
+# Month-sharded JSON index of every post, read by /epaper/ -- see
+# _update_archive()
+ARCHIVE_DIR = os.path.join("app", "assets", "archive")
 
 DISCLAIMER_FOOTER = (
     "\n\n---\n\n"
@@ -65,7 +73,9 @@ def _front_matter(today):
 
 
 def _build_section(paper_name, paper_code, editorial_pdf_path,
-                    article_image_paths=None, edition_urls=None):
+                    article_image_paths=None, edition_urls=None,
+                    article_pdf_paths=None, article_webp_paths=None,
+                    thumbnail_path=None):
     editorial_url = common.raw_url(editorial_pdf_path)
     lines = [f"# {paper_name}"]
 
@@ -92,46 +102,227 @@ def _build_section(paper_name, paper_code, editorial_pdf_path,
         f'label="Download PDF" check_expiry=true %}} |'
     )
     lines.append("")
-    lines.append(
-        # Self-hosted PDF.js viewer, not a direct iframe on the raw URL --
-        # raw.githubusercontent.com serves PDFs with headers that make
-        # browsers download rather than render them inline. PDF.js fetches
-        # the bytes itself (raw.githubusercontent.com allows CORS) and
-        # renders to canvas, sidestepping that entirely.
-        f'<iframe class="pdf-preview" '
-        f'src="{{{{ \'/assets/pdfjs/web/viewer.html\' | prepend: site.baseurl }}}}'
-        f'?file={{{{ "{editorial_url}" | url_encode }}}}" '
-        f'title="{paper_name} editorial page PDF"></iframe>'
+    # Self-hosted PDF.js viewer, not a direct iframe on the raw URL --
+    # raw.githubusercontent.com serves PDFs with headers that make
+    # browsers download rather than render them inline. PDF.js fetches
+    # the bytes itself (raw.githubusercontent.com allows CORS) and
+    # renders to canvas, sidestepping that entirely.
+    viewer_src = (
+        f'{{{{ \'/assets/pdfjs/web/viewer.html\' | prepend: site.baseurl }}}}'
+        f'?file={{{{ "{editorial_url}" | url_encode }}}}'
     )
+    if thumbnail_path:
+        # Thumbnail first, viewer on demand: the iframe (and with it
+        # pdf.mjs, pdf.worker.mjs and the PDF itself) is only created when
+        # the reader clicks the preview or scrolls it into view -- see
+        # app/_includes/pdf-lazy.html
+        lines.append(
+            f'<div class="pdf-lazy" data-src="{viewer_src}" '
+            f'data-title="{paper_name} editorial page PDF">'
+            f'<img class="pdf-thumb" src="{common.raw_url(thumbnail_path)}" '
+            f'alt="{paper_name} editorial page preview" loading="lazy" '
+            f'onerror="handleArtifactError(this)">'
+            f'<button type="button" class="pdf-load">Open in viewer</button></div>'
+        )
+    else:
+        lines.append(
+            f'<iframe class="pdf-preview" src="{viewer_src}" '
+            f'title="{paper_name} editorial page PDF"></iframe>'
+        )
 
-    if article_image_paths:
+    if article_image_paths or article_pdf_paths:
         lines.append("")
         lines.append("## Articles")
         lines.append("")
-        for i, img_path in enumerate(article_image_paths, start=1):
+        for i, img_path in enumerate(article_image_paths or [], start=1):
             img_url = common.raw_url(img_path)
-            lines.append(
+            img = (
                 f'<img class="artifact-image" src="{img_url}" '
                 f'alt="{paper_name} editorial article {i}" '
                 f'loading="lazy" onerror="handleArtifactError(this)">'
             )
+            # WebP first for browsers that take it, the palette PNG as the
+            # universal fallback (and what onerror expiry handling watches)
+            if article_webp_paths and i <= len(article_webp_paths):
+                webp_url = common.raw_url(article_webp_paths[i - 1])
+                img = f'<picture><source type="image/webp" srcset="{webp_url}">{img}</picture>'
+            # with vector crops, the image is only a small preview -- the
+            # click-through goes to the crisp PDF
+            if article_pdf_paths and i <= len(article_pdf_paths):
+                img = f'<a href="{common.raw_url(article_pdf_paths[i - 1])}">{img}</a>'
+            lines.append(img)
         lines.append("")
         lines.append("| Article | Download |")
         lines.append("|---|---|")
-        for i, img_path in enumerate(article_image_paths, start=1):
-            img_url = common.raw_url(img_path)
+        for i, path in enumerate(article_pdf_paths or article_image_paths, start=1):
+            url = common.raw_url(path)
             lines.append(
                 f'| Article {i} | '
-                f'{{% include download-button.html href="{img_url}" '
+                f'{{% include download-button.html href="{url}" '
                 f'label="Article {i}" check_expiry=true %}} |'
             )
 
     return "\n".join(lines)
 
 
+def _write_json_if_changed(path, data):
+    text = json.dumps(data, indent=1, sort_keys=True) + "\n"
+    if os.path.exists(path):
+        with open(path) as f:
+            if f.read() == text:
+                return False
+    with open(path, "w") as f:
+        f.write(text)
+    return True
+
+
+def _load_shard(month):
+    path = os.path.join(ARCHIVE_DIR, f"{month}.json")
+    if os.path.exists(path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            logger.warning("Invalid archive shard %s, rebuilding it", path)
+    return {"month": month, "days": []}
+
+
+def _write_archive_index():
+    """index.json: every shard's month and day count, newest first."""
+    months = []
+    for path in sorted(glob.glob(os.path.join(ARCHIVE_DIR, "????-??.json")), reverse=True):
+        with open(path) as f:
+            shard = json.load(f)
+        months.append({"month": shard["month"], "days": len(shard["days"])})
+    _write_json_if_changed(os.path.join(ARCHIVE_DIR, "index.json"), {"months": months})
+
+
+def _update_archive(paper_name, paper_code, today, editorial_pdf_path,
+                    article_paths=None, thumbnail_path=None):
+    """Merge this paper into today's entry in its month's archive shard.
+
+    The /epaper/ listing pages through these shards client-side
+    (app/_includes/archive.html) instead of Jekyll rendering every post
+    into one page, so the listing stays one small page however long
+    history is kept. Only today's shard and the small index.json are
+    rewritten per publish.
+    """
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    month = today.strftime("%Y-%m")
+    shard = _load_shard(month)
+    date = today.strftime("%Y-%m-%d")
+    day = next((d for d in shard["days"] if d["date"] == date), None)
+    if day is None:
+        day = {"date": date, "papers": {}}
+        shard["days"].append(day)
+    day["title"] = f"Editorials of {today.strftime('%d/%m/%Y')}"
+    # must match _config.yml's permalink: /epaper/:day-:month-:year/
+    day["url"] = f"/epaper/{today.strftime('%d-%m-%Y')}/"
+
+    paper = {
+        "name": paper_name,
+        "editorial": common.raw_url(editorial_pdf_path),
+        "articles": [common.raw_url(p) for p in article_paths or []],
+    }
+    if thumbnail_path:
+        paper["thumbnail"] = common.raw_url(thumbnail_path)
+    day["papers"][paper_code] = paper
+    shard["days"].sort(key=lambda d: d["date"], reverse=True)
+
+    _write_json_if_changed(os.path.join(ARCHIVE_DIR, f"{month}.json"), shard)
+    _write_archive_index()
+
+
+def drop_archive_days(dates):
+    """Drop `dates` (YYYY-MM-DD) from the archive.
+
+    Run by retention.cleanup() with the days whose post just expired, so
+    the listing never offers a date whose page is gone. Only those dates'
+    month shards are read and rewritten; shards left empty are deleted.
+    """
+    by_month = {}
+    for date in dates:
+        by_month.setdefault(date[:7], set()).add(date)
+    for month, gone in sorted(by_month.items()):
+        path = os.path.join(ARCHIVE_DIR, f"{month}.json")
+        if not os.path.exists(path):
+            continue
+        shard = _load_shard(month)
+        live = [d for d in shard["days"] if d["date"] not in gone]
+        if not live:
+            os.remove(path)
+            logger.info("Removed empty archive shard: %s", path)
+        elif len(live) != len(shard["days"]):
+            shard["days"] = live
+            _write_json_if_changed(path, shard)
+    if by_month and os.path.isdir(ARCHIVE_DIR):
+        _write_archive_index()
+
+
+_HREF_RE = re.compile(r'href="([^"]+)" label="([^"]+)"')
+_THUMB_RE = re.compile(r'class="pdf-thumb" src="([^"]+)"')
+
+
+def rebuild_archive():
+    """Regenerate every archive shard from the posts themselves.
+
+    For seeding the archive from posts written before it existed, or after
+    hand-editing posts: publish_post() keeps it current on its own. Shards
+    are rebuilt only from what the posts link to, so any URL not in a
+    post's Markdown (there is none today) would be lost.
+    """
+    shards = {}
+    for path in sorted(glob.glob(os.path.join(POSTS_DIR, "*-editorials.md"))):
+        date = os.path.basename(path)[:10]
+        with open(path) as f:
+            text = f.read()
+        papers = {}
+        for code, section in _SECTION_RE.findall(text):
+            links = _HREF_RE.findall(section)
+            editorial = next((u for u, label in links if label == "Download PDF"), None)
+            if editorial is None:
+                continue
+            thumb = _THUMB_RE.search(section)
+            paper = {
+                "name": section.split("\n", 1)[0].lstrip("# ").strip(),
+                "editorial": editorial,
+                "articles": [u for u, label in links if label.startswith("Article ")],
+            }
+            if thumb:
+                paper["thumbnail"] = thumb.group(1)
+            papers[code] = paper
+        y, mo, d = date.split("-")
+        shards.setdefault(f"{y}-{mo}", []).append({
+            "date": date,
+            "title": f"Editorials of {d}/{mo}/{y}",
+            "url": f"/epaper/{d}-{mo}-{y}/",
+            "papers": papers,
+        })
+
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    for path in glob.glob(os.path.join(ARCHIVE_DIR, "????-??.json")):
+        if os.path.basename(path)[:-5] not in shards:
+            os.remove(path)
+    for month, days in shards.items():
+        days.sort(key=lambda d: d["date"], reverse=True)
+        _write_json_if_changed(os.path.join(ARCHIVE_DIR, f"{month}.json"), {"month": month, "days": days})
+    _write_archive_index()
+
+
 def publish_post(paper_name, paper_code, today, editorial_pdf_path,
-                  article_image_paths=None, edition_urls=None):
-    """Write/update today's consolidated post with this paper's section."""
+                  article_image_paths=None, edition_urls=None,
+                  article_pdf_paths=None, article_webp_paths=None,
+                  thumbnail_path=None):
+    """Write/update today's consolidated post with this paper's section.
+
+    article_pdf_paths: vector article crops (ARTICLE_FORMAT "pdf"/"both");
+    when present, downloads link these and any article images become
+    previews that click through to them.
+    article_webp_paths: WebP variants of article_image_paths, same order
+    (imageopt); served via <picture> with the PNG as fallback.
+    thumbnail_path: small WebP of the editorial page; when given, it's the
+    default preview and the PDF.js viewer loads only on demand.
+    """
     os.makedirs(POSTS_DIR, exist_ok=True)
     post_path = _post_path(today)
 
@@ -144,6 +335,8 @@ def publish_post(paper_name, paper_code, today, editorial_pdf_path,
     sections[paper_code] = _build_section(
         paper_name, paper_code, editorial_pdf_path,
         article_image_paths=article_image_paths, edition_urls=edition_urls,
+        article_pdf_paths=article_pdf_paths, article_webp_paths=article_webp_paths,
+        thumbnail_path=thumbnail_path,
     )
 
     ordered_codes = [c for c in PAPER_ORDER if c in sections] + [
@@ -159,4 +352,21 @@ def publish_post(paper_name, paper_code, today, editorial_pdf_path,
     with open(post_path, "w") as f:
         f.write(_front_matter(today) + "\n\n" + body + DISCLAIMER_FOOTER + "\n")
 
+    _update_archive(
+        paper_name, paper_code, today, editorial_pdf_path,
+        article_paths=article_pdf_paths or article_image_paths,
+        thumbnail_path=thumbnail_path,
+    )
+    import retention
+    retention.record_post(post_path, today.strftime("%Y-%m-%d"))
+
+    # direct HTML mode: patch an already-built site in place rather than
+    # waiting on a full Jekyll rebuild (site_html.py)
+    if os.getenv("SITE_HTML_DIR"):
+        import site_html
+        try:
+            site_html.render(os.environ["SITE_HTML_DIR"])
+        except FileNotFoundError as e:
+            logger.warning("Direct HTML output skipped, no reusable build: %s", e)
+
     return post_path
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Where each paper can be fetched from, for scheduler.py.
+
+A source adapter knows one site: which papers (common.PAPERS codes) it
+carries, how to discover today's copies -- one index page per site, looked
+up once per run however many papers ask -- and how to stream one of them
+to disk. How a paper is then located and cropped is the paper's business
+(common.PAPERS), unless a site's copy differs -- Source.locate overrides
+the mode per paper.
+
+SOURCES is in priority order: a paper is tried from the first source that
+carries it, then the next, so preppyq stays primary for The Hindu and
+indiags its fallback, exactly as the two daily workflows already do.
+Adding a paper is a common.PAPERS entry plus its title/key in each
+adapter that carries it; adding a site is one more class here.
+
+Every request goes through HostLimiter, so however many papers run at
+once no host sees more than HOST_LIMIT connections from us.
+"""
+
+import os
+import threading
+import contextlib
+import urllib.parse
+
+import requests
+
+import common
+import scraper
+import fallback_scraper
+
+# concurrent connections per host, across every paper in the run
+HOST_LIMIT = int(os.getenv("EPAPER_HOST_LIMIT", "2"))
+
+
+class HostLimiter:
+    """One bounded semaphore per host name."""
+
+    def __init__(self, limit=HOST_LIMIT):
+        self.limit = max(1, limit)
+        self._lock = threading.Lock()
+        self._slots = {}
+
+    @contextlib.contextmanager
+    def slot(self, url):
+        host = urllib.parse.urlsplit(url).netloc
+        with self._lock:
+            sem = self._slots.setdefault(host, threading.BoundedSemaphore(self.limit))
+        with sem:
+            yield
+
+
+class Source:
+    """Base adapter. Subclasses set the class attributes and implement
+    _discover() and fetch()."""
+
+    name = ""
+    base_url = ""
+    papers = {}  # code -> this site's key for the paper
+    # code -> editorial locate mode, where this site's copy of a paper
+    # needs a different one from common.PAPERS (a flattened re-export, say)
+    locate = {}
+    embed_color = 0x3498DB
+
+    def __init__(self, limiter):
+        self.limiter = limiter
+        self.session = requests.Session()
+        self.session.headers.update(scraper.HEADERS)
+        # enough pooled connections for every slot the limiter can hand out
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=limiter.limit)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._lock = threading.Lock()
+        self._found = {}
+
+    def discover(self, today):
+        """{code: entry} for today's copies on this site, fetched once per date.
+
+        Each entry has "edition_urls" (public links worth delivering, or
+        None) and "extracted_from" (a label for the copy fetch() takes), plus
+        whatever fetch() needs.
+        """
+        date_key = today.strftime("%Y-%m-%d")
+        with self._lock:
+            if date_key not in self._found:
+                with self.limiter.slot(self.base_url):
+                    self._found[date_key] = self._discover(today)
+            return self._found[date_key]
+
+    def locate_mode(self, code):
+        return self.locate.get(code, common.PAPERS[code]["locate"])
+
+    def _download(self, url, path, require_pdf=False):
+        with self.limiter.slot(url):
+            r = self.session.get(url, timeout=60, stream=True)
+            r.raise_for_status()
+            if require_pdf and "pdf" not in r.headers.get("Content-Type", ""):
+                r.close()
+                raise RuntimeError(f"{url} did not return a PDF")
+            return common.stream_to_file(r, path)
+
+
+class PreppyqSource(Source):
+    """preppyq.in: static WordPress table of Hindu editions (scraper.py)."""
+
+    name = "preppyq"
+    base_url = scraper.BASE_URL
+    papers = {"TH": "The Hindu"}
+
+    def _discover(self, today):
+        r = self.session.get(self.base_url, timeout=30)
+        r.raise_for_status()
+        editions = scraper.find_today_editions(today, html=r.text)
+        if not editions:
+            return {}
+        # International has fewer ads; any edition present will do
+        edition = "International" if "International" in editions else next(iter(editions))
+        return {"TH": {"url": editions[edition], "edition_urls": editions, "extracted_from": edition}}
+
+    def fetch(self, code, entry, path):
+        return self._download(entry["url"], path)
+
+
+class IndiagsSource(Source):
+    """indiags.com: one-time links behind a 4-hop chain (fallback_scraper.py)."""
+
+    name = "indiags"
+    base_url = fallback_scraper.BASE_URL
+    papers = {code: title for title, code in fallback_scraper.PAPERS.items()}
+    embed_color = 0xE74C3C
+
+    def _discover(self, today):
+        # indiags only ever lists today's papers
+        book_ids = fallback_scraper.find_book_ids(self.session)
+        return {
+            code: {"book_id": book_ids[title], "edition_urls": None, "extracted_from": None}
+            for code, title in self.papers.items() if title in book_ids
+        }
+
+    def fetch(self, code, entry, path):
+        with self.limiter.slot(self.base_url):
+            token_url = fallback_scraper.resolve_token_url(self.session, entry["book_id"])
+        # an expired or reused token answers with an HTML page, not a 4xx
+        return self._download(token_url, path, require_pdf=True)
+
+
+# priority order -- see the module docstring
+SOURCES = (PreppyqSource, IndiagsSource)
+
+
+def build(limiter):
+    """One instance of every source, sharing `limiter`."""
+    return [cls(limiter) for cls in SOURCES]
+
+
+def sources_for(code, instances):
+    """The sources in `instances` that carry paper `code`, in priority order."""
+    return [source for source in instances if code in source.papers]
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+A long-lived extraction worker, kept warm, behind a local JSON API.
+
+Every scraper run, backfill or one-off re-extraction starts cold: Python
+itself, then fitz, PIL, numpy and pytesseract imported and MuPDF's fonts
+loaded, before the first page is even opened. This keeps a pool of
+processes with all of that already done and takes jobs over HTTP on
+localhost:
+
+    python epaper.py worker [--workers 2] [--queue 4] [--addr 127.0.0.1:8765]
+
+    POST /jobs       {"paper": "IE", "path": "/abs/IE-FULL-19-10-26.pdf"}
+                     or "url" instead of "path", plus optional "date"
+                     (YYYY-MM-DD, default today), "mode" (locate mode
+                     override) and "wait" (answer when done, not at once)
+    GET  /jobs/<id>  status, result and per-stage timings
+    GET  /health     pool size, jobs queued and running
+
+A job is pipeline.extract_in_worker: its result is what
+pipeline.extract_paper returns, and its timings are that result's stages
+plus the download (url jobs), time spent queued and the whole extraction.
+Storing, Discord and the site stay with whoever submitted the job, as with
+backfill.py. At most --workers jobs run at once and --queue more wait for a
+process; past that a submit is refused with 503 and Retry-After rather
+than left to pile up. A paper/date already queued or running isn't
+extracted a second time alongside it -- the submit gets that job back.
+
+scraper.py and fallback_scraper.py extract through extract() below, which
+hands the job to a worker answering at EPAPER_WORKER for this same
+checkout (result paths are relative to it) and polls it until it's done.
+Only when the worker can't take the job at all -- nothing listening, or
+still busy at the deadline -- does it extract in-process, as before: once
+a job is accepted, the worker owns that paper/date's files, and a slow or
+lost job fails the run rather than racing it. EPAPER_WORKER="" turns the
+worker off.
+
+tesseract itself can't be kept loaded -- pytesseract runs the binary once
+per image -- so each OCR call still pays its model load. What stays warm
+is everything on the Python side.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import importlib
+import itertools
+import threading
+import collections
+from datetime import datetime
+
+import common
+
+# host:port the worker listens on and the scrapers look for it at
+WORKER_ADDR = os.getenv("EPAPER_WORKER", "127.0.0.1:8765")
+SERVICE = "epaper-worker"
+# finished jobs kept for GET /jobs/<id>
+KEEP_JOBS = 256
+# seconds a refused submit is told to wait
+RETRY_AFTER = 5
+# seconds extract() waits on the worker -- for a slot, then for the job
+JOB_TIMEOUT = 600
+# seconds between extract()'s GET /jobs/<id> polls
+POLL_INTERVAL = 1
+
+# everything a job imports, loaded once per pool process up front
+WARM_MODULES = ("fitz", "PIL.Image", "numpy", "pytesseract", "imageopt", "pipeline")
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def _warm():
+    """Pool initializer: import what a job needs and render one page."""
+    for name in WARM_MODULES:
+        importlib.import_module(name)
+    fitz = sys.modules["fitz"]
+    # MuPDF loads its base fonts on first use
+    with fitz.open() as doc:
+        page = doc.new_page()
+        page.insert_text((72, 72), "Editorial")
+        page.get_pixmap()
+
+
+def _ping():
+    return os.getpid()
+
+
+class Busy(Exception):
+    """Every running and queued slot is taken."""
+
+
+class Worker:
+    def __init__(self, workers, queue):
+        from concurrent.futures import ProcessPoolExecutor
+
+        self.workers = workers
+        self.queue = queue
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_warm)
+        self.slots = threading.BoundedSemaphore(workers + queue)
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+        self.jobs = collections.OrderedDict()
+
+    def warm(self):
+        """Start every pool process now, not on the first jobs."""
+        t0 = time.perf_counter()
+        pids = {f.result() for f in [self.pool.submit(_ping) for _ in range(self.workers)]}
+        logger.info("%d worker process(es) warm in %.1fs", len(pids), time.perf_counter() - t0)
+
+    def submit(self, spec):
+        """Start a job from a POST /jobs body; raises ValueError or Busy."""
+        import editorial
+
+        code = spec.get("paper")
+        if code not in common.PAPERS:
+            raise ValueError(f"unknown paper {code!r} (known: {', '.join(common.PAPERS)})")
+        if bool(spec.get("path")) == bool(spec.get("url")):
+            raise ValueError("give exactly one of path / url")
+        if spec.get("path") and not os.path.isfile(spec["path"]):
+            raise ValueError(f"no such file: {spec['path']}")
+        mode = spec.get("mode")
+        if mode is not None and mode not in editorial.LOCATORS:
+            raise ValueError(f"unknown locate mode {mode!r}")
+        today = datetime.strptime(spec["date"], "%Y-%m-%d") if spec.get("date") else common.now_ist()
+
+        with self.lock:
+            # the same paper/date writes the same artifact files -- join the
+            # job already doing it rather than race it
+            for job in self.jobs.values():
+                if (job["paper"], job["date"]) == (code, today.strftime("%Y-%m-%d")) and not job["done"].is_set():
+                    return job
+            if not self.slots.acquire(blocking=False):
+                raise Busy()
+            job = {
+                "id": str(next(self.ids)),
+                "paper": code,
+                "date": today.strftime("%Y-%m-%d"),
+                "status": "queued",
+                "done": threading.Event(),
+            }
+            self.jobs[job["id"]] = job
+        threading.Thread(target=self._run, args=(job, spec, today, mode), daemon=True).start()
+        return job
+
+    def _run(self, job, spec, today, mode):
+        import pipeline
+
+        timings, outcome = {}, {"status": "failed", "error": "interrupted"}
+        path, downloaded = spec.get("path"), False
+        try:
+            if spec.get("url"):
+                t0 = time.perf_counter()
+                path, downloaded = self._download(job, spec["url"], today), True
+                timings["download"] = round(time.perf_counter() - t0, 3)
+            t0 = time.perf_counter()
+            job["future"] = self.pool.submit(pipeline.extract_in_worker, job["paper"], today, path, mode)
+            result, pages, seconds = job["future"].result()
+            timings["queued"] = round(time.perf_counter() - t0 - seconds, 3)
+            timings["extract"] = round(seconds, 3)
+            timings.update((result or {}).get("timings", {}))
+            outcome = {"status": "done", "result": result, "pages": pages}
+        except Exception as e:
+            logger.error("Job %s (%s) failed: %s", job["id"], job["paper"], e)
+            outcome = {"status": "failed", "error": str(e)}
+        finally:
+            if downloaded and os.path.exists(path):
+                os.remove(path)
+            # in one go, so a poll never sees "done" without its timings
+            job.update(outcome, timings=timings)
+            self.slots.release()
+            job["done"].set()
+            self._forget_old()
+
+    def _download(self, job, url, today):
+        import requests
+
+        name = common.dated_filename(common.PAPERS[job["paper"]]["name"], "FULL", today, "pdf")
+        # job id first: two jobs for the same paper and day mustn't share a file
+        path = os.path.join(common.artifact_dir_for(job["date"]), f"job{job['id']}-{name}")
+        r = requests.get(url, timeout=60, stream=True)
+        r.raise_for_status()
+        return common.stream_to_file(r, path)
+
+    def _forget_old(self):
+        with self.lock:
+            finished = [job_id for job_id, job in self.jobs.items() if job["done"].is_set()]
+            for job_id in finished[:max(0, len(finished) - KEEP_JOBS)]:
+                del self.jobs[job_id]
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def view(self, job):
+        """A job as JSON. "running" is as the pool reports it, which counts a
+        job handed to a process's call queue -- up to one per process early."""
+        out = {k: v for k, v in job.items() if k not in ("done", "future")}
+        if job["status"] == "queued" and job.get("future") and job["future"].running():
+            out["status"] = "running"
+        return out
+
+    def health(self):
+        with self.lock:
+            states = collections.Counter(self.view(job)["status"] for job in self.jobs.values())
+        return {
+            "service": SERVICE,
+            "root": os.getcwd(),
+            "pid": os.getpid(),
+            "workers": self.workers,
+            "queue": self.queue,
+            "queued": states["queued"],
+            "running": states["running"],
+        }
+
+
+def _handler(worker):
+    from http.server import BaseHTTPRequestHandler
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/health":
+                return self._reply(200, worker.health())
+            if self.path.startswith("/jobs/"):
+                job = worker.get(self.path[len("/jobs/"):])
+                if job is not None:
+                    return self._reply(200, worker.view(job))
+            self._reply(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/jobs":
+                return self._reply(404, {"error": "not found"})
+            try:
+                spec = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                job = worker.submit(spec)
+            except Busy:
+                return self._reply(503, {"error": "busy"}, {"Retry-After": str(RETRY_AFTER)})
+            except ValueError as e:
+                return self._reply(400, {"error": str(e)})
+            if spec.get("wait"):
+                job["done"].wait()
+                return self._reply(200, worker.view(job))
+            self._reply(202, worker.view(job))
+
+        def _reply(self, status, body, headers=None):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, fmt, *args):
+            logger.debug(fmt, *args)
+
+    return Handler
+
+
+def serve(addr, workers, queue):
+    from http.server import ThreadingHTTPServer
+
+    host, port = addr.rsplit(":", 1)
+    worker = Worker(workers, queue)
+    worker.warm()
+    server = ThreadingHTTPServer((host, int(port)), _handler(worker))
+    server.daemon_threads = True
+    logger.info("=== Worker listening on http://%s (%d processes, %d queued max) ===", addr, workers, queue)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        worker.pool.shutdown(cancel_futures=True)
+
+
+# -- client side: what the scrapers call -------------------------------------
+
+def _call(method, path, body=None, timeout=5):
+    import urllib.request
+
+    req = urllib.request.Request(
+        f"http://{WORKER_ADDR}{path}", method=method,
+        data=None if body is None else json.dumps(body).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(req, timeout=timeout) as r:
+        return json.load(r)
+
+
+def available():
+    """True when a worker for this checkout answers at WORKER_ADDR."""
+    if not WORKER_ADDR:
+        return False
+    try:
+        health = _call("GET", "/health", timeout=1)
+    except (OSError, ValueError):
+        return False
+    return health.get("service") == SERVICE and os.path.realpath(health.get("root", "")) == os.path.realpath(os.getcwd())
+
+
+class NotTaken(Exception):
+    """The worker didn't accept the job, so nothing of it is running there."""
+
+
+def _submit(spec, deadline):
+    """POST /jobs, retrying while the worker is busy; raises NotTaken when
+    it's unreachable or still busy at `deadline`."""
+    import urllib.error
+
+    while True:
+        try:
+            return _call("POST", "/jobs", spec)
+        except urllib.error.HTTPError as e:
+            retry = int(e.headers.get("Retry-After") or RETRY_AFTER)
+            if e.code != 503:
+                raise RuntimeError(f"worker refused the job: {e.code} {e.reason}") from e
+            if time.monotonic() + retry > deadline:
+                raise NotTaken("still busy") from e
+            logger.info("Worker busy, retrying in %ds", retry)
+            time.sleep(retry)
+        except urllib.error.URLError as e:
+            # a timeout may mean the worker has the job already -- only a
+            # refused connection is known not to have reached it
+            if isinstance(e.reason, ConnectionRefusedError):
+                raise NotTaken(str(e.reason)) from e
+            raise RuntimeError(f"worker didn't answer the submit: {e.reason}") from e
+        except OSError as e:
+            raise RuntimeError(f"worker didn't answer the submit: {e}") from e
+
+
+def _wait(job, deadline):
+    """Poll GET /jobs/<id> until the job finishes; its final state."""
+    while job["status"] in ("queued", "running"):
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"worker job {job['id']} still {job['status']} after {JOB_TIMEOUT}s")
+        time.sleep(POLL_INTERVAL)
+        try:
+            job = _call("GET", f"/jobs/{job['id']}")
+        except OSError as e:
+            raise RuntimeError(f"lost track of worker job {job['id']}: {e}") from e
+    return job
+
+
+def extract(code, path, today, timeout=JOB_TIMEOUT):
+    """pipeline.extract_paper for paper `code` -- by the warm worker when one
+    is running, otherwise in this process. Same result either way."""
+    paper = common.PAPERS[code]
+    if available():
+        deadline = time.monotonic() + timeout
+        spec = {"paper": code, "path": os.path.abspath(path), "date": today.strftime("%Y-%m-%d")}
+        try:
+            job = _submit(spec, deadline)
+        except NotTaken as e:
+            logger.warning("Worker at %s didn't take %s (%s) -- extracting in-process", WORKER_ADDR, paper["name"], e)
+        else:
+            job = _wait(job, deadline)
+            if job["status"] == "failed":
+                raise RuntimeError(job["error"])
+            logger.info("%s extracted by worker: %s", paper["name"],
+                        ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in job["timings"].items()))
+            return job["result"]
+
+    import pipeline
+
+    return pipeline.extract_paper(path, paper["name"], today, mode=paper["locate"], articles=paper["articles"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Warm extraction worker with a local JSON API")
+    parser.add_argument("--addr", default=WORKER_ADDR or "127.0.0.1:8765",
+                        help="host:port to listen on (default %(default)s, EPAPER_WORKER)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="extraction processes (default: CPU count)")
+    parser.add_argument("--queue", type=int, default=4,
+                        help="jobs waiting for a process before submits are refused (default %(default)s)")
+    args = parser.parse_args(argv)
+    serve(args.addr, args.workers, args.queue)
+
+
+if __name__ == "__main__":
+    main()